@@ -0,0 +1,130 @@
+# analytics/archive.py
+"""
+Columnar on-disk archive of activity logs.
+
+Each closed day of activity is one directory of NumPy column files:
+
+    <archive_dir>/2026-10-17/
+        log_id.npy       int64
+        timestamp.npy    datetime64[s]
+        player.npy       int32 codes into players.npy
+        players.npy      int64 dictionary of player ids
+        action_type.npy  uint8 codes into manifest["action_types"]
+        room.npy         int32 room id named by the event, -1 if none
+        manifest.json    window bounds, row count, dictionaries, room names
+
+A window is written to a temporary directory and renamed into place, so a
+directory that exists is always complete. Columns are opened memory-mapped.
+"""
+import os
+import json
+import shutil
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+COLUMNS = ["log_id", "timestamp", "player", "players", "action_type", "room"]
+MANIFEST = "manifest.json"
+NO_ROOM = -1
+
+
+def window_name(day):
+    return day.isoformat()
+
+
+def window_path(archive_dir, day):
+    return os.path.join(archive_dir, window_name(day))
+
+
+def archived_days(archive_dir):
+    """Days that have a complete window in the archive, oldest first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    days = []
+    for name in sorted(os.listdir(archive_dir)):
+        if os.path.exists(os.path.join(archive_dir, name, MANIFEST)):
+            try:
+                days.append(date.fromisoformat(name))
+            except ValueError:
+                continue
+    return days
+
+
+def write_window(archive_dir, day, log_ids, timestamps, player_ids, action_types, rooms, room_names=None):
+    """
+    Writes one day of rows (parallel sequences, in time order) as a window.
+    Player ids and action types are dictionary-encoded.
+    """
+    players, player_codes = np.unique(np.asarray(player_ids, dtype=np.int64), return_inverse=True)
+    type_names, type_codes = np.unique(np.asarray(action_types, dtype=str), return_inverse=True)
+    columns = {
+        "log_id": np.asarray(log_ids, dtype=np.int64),
+        "timestamp": np.asarray(timestamps, dtype="datetime64[s]"),
+        "player": player_codes.astype(np.int32),
+        "players": players,
+        "action_type": type_codes.astype(np.uint8),
+        "room": np.asarray(rooms, dtype=np.int32)
+    }
+    manifest = {
+        "start": datetime.combine(day, datetime.min.time()).isoformat(),
+        "end": datetime.combine(day + timedelta(days=1), datetime.min.time()).isoformat(),
+        "rows": int(len(columns["log_id"])),
+        "action_types": [str(name) for name in type_names],
+        "rooms": {str(room_id): name for room_id, name in (room_names or {}).items()},
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+    final_path = window_path(archive_dir, day)
+    temp_path = final_path + ".tmp"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+    for name, values in columns.items():
+        np.save(os.path.join(temp_path, f"{name}.npy"), values)
+    with open(os.path.join(temp_path, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+    shutil.rmtree(final_path, ignore_errors=True)
+    os.rename(temp_path, final_path)
+    return manifest
+
+
+def open_window(archive_dir, day):
+    """Returns (manifest, {column: memory-mapped array}) for one window."""
+    path = window_path(archive_dir, day)
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+    return manifest, columns
+
+
+def load_range(archive_dir, start=None, end=None):
+    """
+    Loads the windows for days in [start, end) into one set of columns,
+    with player ids decoded and action types re-coded against a shared
+    dictionary. Returns a dict with "player_id", "timestamp", "action_type",
+    "room", "action_types" and "rooms"; rows stay in time order.
+    """
+    days = [day for day in archived_days(archive_dir)
+            if (start is None or day >= start) and (end is None or day < end)]
+    windows = [open_window(archive_dir, day) for day in days]
+
+    action_types = sorted({name for manifest, _ in windows for name in manifest["action_types"]})
+    rooms = {}
+    parts = {"player_id": [], "timestamp": [], "action_type": [], "room": []}
+    for manifest, columns in windows:
+        rooms.update({int(room_id): name for room_id, name in manifest["rooms"].items()})
+        # Window code -> shared code
+        remap = np.array([action_types.index(name) for name in manifest["action_types"]], dtype=np.uint8)
+        parts["player_id"].append(columns["players"][columns["player"]])
+        parts["timestamp"].append(columns["timestamp"])
+        parts["action_type"].append(remap[columns["action_type"]] if len(remap) else np.asarray(columns["action_type"]))
+        parts["room"].append(columns["room"])
+
+    loaded = {
+        "player_id": np.concatenate(parts["player_id"]) if windows else np.zeros(0, dtype=np.int64),
+        "timestamp": np.concatenate(parts["timestamp"]) if windows else np.zeros(0, dtype="datetime64[s]"),
+        "action_type": np.concatenate(parts["action_type"]) if windows else np.zeros(0, dtype=np.uint8),
+        "room": np.concatenate(parts["room"]) if windows else np.zeros(0, dtype=np.int32)
+    }
+    loaded["action_types"] = action_types
+    loaded["rooms"] = rooms
+    return loaded
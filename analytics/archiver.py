@@ -0,0 +1,129 @@
+# analytics/archiver.py
+"""
+Compacts closed days of activity into the columnar archive (see archive.py).
+
+Rows are read once per day through the activity log service's streaming
+export (GET /log/export?format=ndjson), which already classifies each row
+into an action type, so analytics never query the activity database.
+A day is archived once it ended more than --grace-hours ago, to leave time
+for spooled or retried events to land. Days already archived are skipped.
+
+Usage:
+    python -m analytics.archiver --archive-dir /data/activity_archive
+    python -m analytics.archiver --since 2026-09-01 --until 2026-10-01
+"""
+import os
+import re
+import json
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+
+import requests
+
+from analytics.archive import write_window, archived_days, NO_ROOM
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_SERVICE_URL = os.getenv("ACTIVITY_LOG_SERVICE_URL", "http://localhost:5013")
+ACTIVITY_ARCHIVE_DIR = os.getenv("ACTIVITY_ARCHIVE_DIR", "activity_archive")
+ARCHIVE_GRACE_HOURS = float(os.getenv("ACTIVITY_ARCHIVE_GRACE_HOURS", "2"))
+
+ROOM_ENTERED = re.compile(r"^Entered Room (\d+): (.*)$")
+ROOM_MENTIONED = re.compile(r"from room (\d+)")
+
+
+def sg_now():
+    # Log timestamps are stored in Singapore time
+    return datetime.utcnow() + timedelta(hours=8)
+
+
+def room_of(action):
+    """(room_id, room_name) named by an Action string, or (NO_ROOM, None)."""
+    match = ROOM_ENTERED.match(action)
+    if match:
+        return int(match.group(1)), match.group(2)
+    match = ROOM_MENTIONED.search(action)
+    if match:
+        return int(match.group(1)), None
+    return NO_ROOM, None
+
+
+def fetch_day(day, base_url=ACTIVITY_LOG_SERVICE_URL):
+    """Streams one day of rows from the export endpoint, in time order."""
+    params = {
+        "format": "ndjson",
+        "start": datetime.combine(day, datetime.min.time()).isoformat(),
+        "end": datetime.combine(day + timedelta(days=1), datetime.min.time()).isoformat()
+    }
+    with requests.get(f"{base_url}/log/export", params=params, stream=True, timeout=(3.05, 300)) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+def archive_day(day, archive_dir=ACTIVITY_ARCHIVE_DIR, base_url=ACTIVITY_LOG_SERVICE_URL):
+    """Builds and writes the window for one day. Returns its manifest."""
+    log_ids, timestamps, player_ids, action_types, rooms = [], [], [], [], []
+    room_names = {}
+    for row in fetch_day(day, base_url):
+        room_id, room_name = room_of(row["action"])
+        if room_name:
+            room_names[room_id] = room_name
+        log_ids.append(row["log_id"])
+        timestamps.append(row["timestamp"])
+        player_ids.append(row["player_id"])
+        action_types.append(row.get("action_type") or "other")
+        rooms.append(room_id)
+    manifest = write_window(archive_dir, day, log_ids, timestamps, player_ids, action_types, rooms, room_names)
+    logger.info(f"Archived {manifest['rows']} activity rows for {day}")
+    return manifest
+
+
+def closed_days(since, until=None, grace_hours=ARCHIVE_GRACE_HOURS):
+    """Days from `since` up to (not including) `until` that ended more than grace_hours ago."""
+    last_closed = (sg_now() - timedelta(hours=grace_hours)).date()
+    end = min(until, last_closed) if until else last_closed
+    day = since
+    while day < end:
+        yield day
+        day += timedelta(days=1)
+
+
+def archive_pending(since=None, until=None, archive_dir=ACTIVITY_ARCHIVE_DIR,
+                    base_url=ACTIVITY_LOG_SERVICE_URL, grace_hours=ARCHIVE_GRACE_HOURS):
+    """
+    Archives every closed day not yet in the archive, starting at `since`
+    (default: the day after the newest archived day, or yesterday).
+    """
+    done = set(archived_days(archive_dir))
+    if since is None:
+        since = max(done) + timedelta(days=1) if done else (sg_now() - timedelta(days=1)).date()
+    archived = []
+    for day in closed_days(since, until, grace_hours):
+        if day in done:
+            continue
+        archive_day(day, archive_dir, base_url)
+        archived.append(day)
+    return archived
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compact closed days of activity into columnar files.")
+    parser.add_argument("--archive-dir", default=ACTIVITY_ARCHIVE_DIR)
+    parser.add_argument("--url", default=ACTIVITY_LOG_SERVICE_URL, help="activity log service base URL")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="first day to archive (YYYY-MM-DD)")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="stop before this day")
+    parser.add_argument("--grace-hours", type=float, default=ARCHIVE_GRACE_HOURS,
+                        help="how long after a day ends before it counts as closed")
+    args = parser.parse_args(argv)
+
+    archived = archive_pending(args.since, args.until, args.archive_dir, args.url, args.grace_hours)
+    print(f"Archived {len(archived)} days" + (f": {archived[0]} .. {archived[-1]}" if archived else ""))
+
+
+if __name__ == "__main__":
+    main()
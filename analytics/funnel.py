@@ -0,0 +1,190 @@
+# analytics/funnel.py
+"""
+Progression funnels and per-room drop-off over the columnar activity
+archive. Everything is computed with vectorized NumPy operations over the
+memory-mapped columns; the activity database is never queried.
+
+Usage:
+    python -m analytics.funnel --start 2026-09-01 --end 2026-10-01
+    python -m analytics.funnel --steps 1,2,3 --json
+"""
+import sys
+import json
+import argparse
+from datetime import date
+
+import numpy as np
+
+from analytics.archive import load_range, NO_ROOM
+from analytics.archiver import ACTIVITY_ARCHIVE_DIR
+
+
+def type_code(columns, name):
+    """Shared dictionary code for an action type, or -1 if it never occurs."""
+    types = columns["action_types"]
+    return types.index(name) if name in types else -1
+
+
+def by_player(columns, rows):
+    """
+    Returns (order, player_index, players) for the selected `rows` (a
+    boolean mask): their positions sorted by player, keeping each player's
+    events in time order, the dense player index of every sorted row, and
+    the player ids. Only the selected rows are sorted.
+    """
+    selected = np.flatnonzero(rows)
+    order = selected[np.argsort(columns["player_id"][selected], kind="stable")]
+    sorted_ids = columns["player_id"][order]
+    new_player = np.ones(len(sorted_ids), dtype=bool)
+    new_player[1:] = sorted_ids[1:] != sorted_ids[:-1]
+    return order, np.cumsum(new_player) - 1, sorted_ids[new_player]
+
+
+def segment_bounds(player_index, last=False):
+    """
+    For rows already grouped by player: positions of each player's first
+    (or last) row, and which player that is.
+    """
+    if len(player_index) == 0:
+        return np.zeros(0, dtype=np.intp), player_index
+    edge = np.ones(len(player_index), dtype=bool)
+    if last:
+        edge[:-1] = player_index[:-1] != player_index[1:]
+    else:
+        edge[1:] = player_index[1:] != player_index[:-1]
+    positions = np.flatnonzero(edge)
+    return positions, player_index[positions]
+
+
+def current_room(room, player_index):
+    """
+    Room each (player-sorted) event happened in: the last room named by an
+    earlier event of the same player, carried forward.
+    """
+    positions = np.arange(len(room))
+    segment_start = np.ones(len(room), dtype=bool)
+    segment_start[1:] = player_index[1:] != player_index[:-1]
+    last_known = np.maximum.accumulate(np.where((room != NO_ROOM) | segment_start, positions, 0))
+    return room[last_known]
+
+
+def funnel(columns, steps=None):
+    """
+    How many players entered each room in `steps`, in that order (each step
+    entered no earlier than the previous one). Defaults to every room seen,
+    by id.
+    """
+    entered = columns["action_type"] == type_code(columns, "room_entered")
+    rooms = columns["room"]
+    if steps is None:
+        steps = sorted(int(r) for r in np.unique(rooms[entered & (rooms != NO_ROOM)]))
+    # Only entries into funnel rooms matter
+    order, player_index, players = by_player(columns, entered & np.isin(rooms, steps))
+    rooms, timestamps = rooms[order], columns["timestamp"][order]
+
+    # First entry time per player and step (rows are time-ordered per player)
+    first = np.full((len(players), len(steps)), np.datetime64("NaT"), dtype="datetime64[s]")
+    for j, room_id in enumerate(steps):
+        rows = np.flatnonzero(rooms == room_id)
+        first_row, who = segment_bounds(player_index[rows])
+        first[who, j] = timestamps[rows[first_row]]
+
+    reached = np.zeros((len(players), len(steps)), dtype=bool)
+    if steps:
+        reached[:, 0] = ~np.isnat(first[:, 0])
+    for j in range(1, len(steps)):
+        reached[:, j] = reached[:, j - 1] & ~np.isnat(first[:, j]) & (first[:, j] >= first[:, j - 1])
+
+    counts = reached.sum(axis=0)
+    started = int(counts[0]) if steps else 0
+    result = []
+    for j, room_id in enumerate(steps):
+        previous = int(counts[j - 1]) if j else started
+        result.append({
+            "room_id": room_id,
+            "room_name": columns["rooms"].get(room_id),
+            "players": int(counts[j]),
+            "from_previous": round(int(counts[j]) / previous, 4) if previous else 0.0,
+            "from_start": round(int(counts[j]) / started, 4) if started else 0.0
+        })
+    return result
+
+
+def room_dropoff(columns):
+    """
+    Per room: players who entered it, deaths in it, players whose last
+    room entry was it (where they stopped), and the death rate.
+    """
+    entered = columns["action_type"] == type_code(columns, "room_entered")
+    died = columns["action_type"] == type_code(columns, "player_defeated")
+    # Events that name a room, plus deaths
+    order, player_index, players = by_player(columns, (columns["room"] != NO_ROOM) | died)
+    entered, died, rooms = entered[order], died[order], columns["room"][order]
+    where = current_room(rooms, player_index)
+
+    room_ids = np.unique(rooms[entered])
+    if len(room_ids) == 0:
+        return []
+    slot = np.searchsorted(room_ids, rooms)
+
+    # Unique (player, room) entries
+    visits = np.unique(player_index[entered].astype(np.int64) * len(room_ids) + slot[entered])
+    players_entered = np.bincount(visits % len(room_ids), minlength=len(room_ids))
+
+    death_rooms = where[died]
+    death_rooms = death_rooms[np.isin(death_rooms, room_ids)]
+    deaths = np.bincount(np.searchsorted(room_ids, death_rooms), minlength=len(room_ids))
+
+    # Each player's last room entry
+    entry_rows = np.flatnonzero(entered)
+    last_entry = entry_rows[segment_bounds(player_index[entry_rows], last=True)[0]]
+    stopped = np.bincount(slot[last_entry], minlength=len(room_ids))
+
+    return [
+        {
+            "room_id": int(room_id),
+            "room_name": columns["rooms"].get(int(room_id)),
+            "players_entered": int(players_entered[i]),
+            "deaths": int(deaths[i]),
+            "stopped_here": int(stopped[i]),
+            "death_rate": round(int(deaths[i]) / int(players_entered[i]), 4) if players_entered[i] else 0.0
+        }
+        for i, room_id in enumerate(room_ids)
+    ]
+
+
+def format_table(funnel_rows, dropoff_rows):
+    lines = [f"{'Step':<5} {'Room':<24} {'Players':>8} {'Prev %':>7} {'Start %':>8}"]
+    for i, r in enumerate(funnel_rows, start=1):
+        name = f"{r['room_id']} {r['room_name'] or ''}".strip()
+        lines.append(f"{i:<5} {name:<24} {r['players']:>8} {r['from_previous'] * 100:>6.1f}% {r['from_start'] * 100:>7.1f}%")
+    lines.append("")
+    lines.append(f"{'Room':<24} {'Entered':>8} {'Deaths':>7} {'Stopped':>8} {'Death %':>8}")
+    for r in dropoff_rows:
+        name = f"{r['room_id']} {r['room_name'] or ''}".strip()
+        lines.append(f"{name:<24} {r['players_entered']:>8} {r['deaths']:>7} {r['stopped_here']:>8} {r['death_rate'] * 100:>7.1f}%")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Room funnel and drop-off from the activity archive.")
+    parser.add_argument("--archive-dir", default=ACTIVITY_ARCHIVE_DIR)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="stop before this day")
+    parser.add_argument("--steps", default=None, help="comma-separated room ids, in funnel order")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    columns = load_range(args.archive_dir, args.start, args.end)
+    steps = [int(s) for s in args.steps.split(",")] if args.steps else None
+    results = {"rows": int(len(columns["player_id"])), "funnel": funnel(columns, steps), "rooms": room_dropoff(columns)}
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(results["funnel"], results["rooms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,25 @@
 import os
+import io
+import csv
+import base64
 import logging
 import pika
 import json
 from datetime import datetime
-from flask import Flask, jsonify, request, render_template, send_from_directory
-from models import db, ActivityLog
+from flask import Flask, Response, jsonify, request, render_template, send_from_directory, stream_with_context
+from sqlalchemy import inspect
+from models import db, ActivityLog, ActivityRollup, sg_now
+from publisher import publisher
+from live_feed import hub, REPLAY_LIMIT
+from rollups import upsert_rollups, classify_action, ACTION_TYPES
+from partitions import partition_manager, retention_cutoff, PARTITION_INTERVAL, RETENTION_DAYS
+from rabbitmq_consumer import (
+    consumer_metrics as collect_consumer_metrics,
+    declare_topology,
+    peek_dead_letters,
+    replay_dead_letters,
+    DEAD_LETTER_QUEUE
+)
 from datetime import datetime, timedelta
 
 # Configure logging
@@ -27,8 +42,25 @@ ACTIVITY_LOG_QUEUE = "activity_log_queue"
 
 db.init_app(app)
 
+
+def add_missing_indexes():
+    """
+    Creates ActivityLog indexes added to the model after the table was
+    (create_all() and mysql-init only build indexes with a new table).
+    """
+    existing = {index["name"] for index in inspect(db.engine).get_indexes(ActivityLog.__tablename__)}
+    for index in ActivityLog.__table__.indexes:
+        if index.name not in existing:
+            index.create(db.engine)
+            logger.info(f"Created index {index.name} on {ActivityLog.__tablename__}")
+
+
 with app.app_context():
     db.create_all()
+    add_missing_indexes()
+
+# Connect the activity publisher up front so /api/log knows whether the broker is reachable
+publisher.start()
 
 def get_sg_timestamp():
     """
@@ -41,34 +73,27 @@ def get_sg_timestamp():
 
 def send_to_rabbitmq(player_id, action):
     """
-    Helper function to send messages to RabbitMQ
+    Helper function to send messages to RabbitMQ.
+    Hands the message to the background publisher and returns immediately;
+    returns False if the broker is unreachable or the buffer is full so the
+    caller can fall back to writing the log entry directly.
     """
-    try:
-        connection = pika.BlockingConnection(
-            pika.ConnectionParameters(host=RABBITMQ_HOST))
-        channel = connection.channel()
-        channel.queue_declare(queue=ACTIVITY_LOG_QUEUE, durable=True)
-        
-        message = {
-            "player_id": player_id,
-            "action": action,
-            "timestamp": get_sg_timestamp()
-        }
-        
-        channel.basic_publish(
-            exchange='',
-            routing_key=ACTIVITY_LOG_QUEUE,
-            body=json.dumps(message),
-            properties=pika.BasicProperties(delivery_mode=2)
-        )
-        
-        connection.close()
-        logger.info(f"Message sent to RabbitMQ: Player {player_id} - {action}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send message to RabbitMQ: {str(e)}")
+    if not publisher.connected:
+        logger.warning("RabbitMQ publisher is not connected")
+        return False
+
+    message = {
+        "player_id": player_id,
+        "action": action,
+        "timestamp": get_sg_timestamp()
+    }
+
+    if not publisher.publish(message):
         return False
 
+    logger.info(f"Message queued for RabbitMQ: Player {player_id} - {action}")
+    return True
+
 def create_log_entry(player_id, action):
     """
     Creates a log entry directly in the database
@@ -80,7 +105,9 @@ def create_log_entry(player_id, action):
             Timestamp = get_sg_timestamp()
         )
         db.session.add(new_log)
+        upsert_rollups(db.session, [{"PlayerID": player_id, "Action": action, "Timestamp": new_log.Timestamp}])
         db.session.commit()
+        hub.publish([new_log.to_dict()])
         logger.info(f"Created log entry directly: {new_log.to_dict()}")
         return new_log
     except Exception as e:
@@ -125,24 +152,121 @@ def create_log():
     
     new_log = ActivityLog(
         PlayerID=data['player_id'],
-        Action=data['action']
+        Action=data['action'],
+        Timestamp=sg_now()
     )
     db.session.add(new_log)
+    upsert_rollups(db.session, [{"PlayerID": new_log.PlayerID, "Action": new_log.Action, "Timestamp": new_log.Timestamp}])
     db.session.commit()
+    hub.publish([new_log.to_dict()])
     
     logger.info(f"Created log entry: {new_log.to_dict()}")
     return jsonify(new_log.to_dict()), 201
 
-# API to get logs by player ID
+# Keyset pagination: pages are ordered newest first by (Timestamp, LogID)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = int(os.getenv("MAX_LOG_PAGE_SIZE", "500"))
+
+def encode_cursor(timestamp, log_id):
+    """
+    Packs a (Timestamp, LogID) position into an opaque cursor string.
+    """
+    raw = f"{timestamp.isoformat() if timestamp else ''}|{log_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Unpacks a cursor from encode_cursor(). Raises ValueError if invalid.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, log_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(log_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def page_size():
+    return max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+def latest_cursor():
+    """
+    Cursor for "everything up to now", to be passed back as since=.
+    Uses the newest LogID overall (a primary-key lookup).
+    """
+    newest = db.session.query(db.func.max(ActivityLog.LogID)).scalar() or 0
+    return encode_cursor(None, newest)
+
+def since_page(query, cursor, limit):
+    """
+    Rows added after `cursor`, oldest first. Follows LogID (insertion order)
+    so rows that arrive late with older timestamps are not skipped. Served
+    by the primary key, or idx_activity_player_log for one player.
+    """
+    _, log_id = decode_cursor(cursor)
+    logs = query.filter(ActivityLog.LogID > log_id).order_by(ActivityLog.LogID.asc()).limit(limit + 1).all()
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    return {
+        "logs": [log.to_dict() for log in logs],
+        "cursor": encode_cursor(logs[-1].Timestamp, logs[-1].LogID) if logs else cursor,
+        "has_more": has_more
+    }
+
+def history_page(query, before, limit):
+    """
+    One page of rows older than `before` (or the newest rows), newest first.
+    """
+    if before:
+        timestamp, log_id = decode_cursor(before)
+        query = query.filter(db.or_(
+            ActivityLog.Timestamp < timestamp,
+            db.and_(ActivityLog.Timestamp == timestamp, ActivityLog.LogID < log_id)
+        ))
+    logs = query.order_by(ActivityLog.Timestamp.desc(), ActivityLog.LogID.desc()).limit(limit + 1).all()
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    return {
+        "logs": [log.to_dict() for log in logs],
+        "next_cursor": encode_cursor(logs[-1].Timestamp, logs[-1].LogID) if has_more else None,
+        "has_more": has_more
+    }
+
+def keyset_response(query):
+    """
+    Serves either a history page (?before=<cursor>&limit=) or, with
+    ?since=<cursor>, only the rows added after that cursor.
+    """
+    limit = page_size()
+    try:
+        if request.args.get('since'):
+            return since_page(query, request.args['since'], limit)
+        response = history_page(query, request.args.get('before'), limit)
+    except ValueError as e:
+        return {"error": str(e)}
+    if not request.args.get('before'):
+        # Start point for since= polling
+        response["latest_cursor"] = latest_cursor()
+    return response
+
+# API to get logs by player ID (keyset paginated)
 @app.route("/log/<int:player_id>", methods=["GET"])
 def get_logs(player_id):
-    logs = ActivityLog.query.filter_by(PlayerID=player_id).all()
-    logger.info(f"Retrieved {len(logs)} logs for player {player_id}")
-    return jsonify([log.to_dict() for log in logs]), 200
+    response = keyset_response(ActivityLog.query.filter_by(PlayerID=player_id))
+    if "error" in response:
+        return jsonify(response), 400
+    logger.info(f"Retrieved {len(response['logs'])} logs for player {player_id}")
+    return jsonify(response), 200
 
-# API to get all logs with pagination
+# API to get all logs (keyset paginated; ?page= keeps the old offset paging)
 @app.route("/log", methods=["GET"])
 def get_all_logs():
+    if 'page' not in request.args:
+        response = keyset_response(ActivityLog.query)
+        if "error" in response:
+            return jsonify(response), 400
+        logger.info(f"Retrieved {len(response['logs'])} logs")
+        return jsonify(response), 200
+
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     
@@ -161,15 +285,284 @@ def get_all_logs():
     logger.info(f"Retrieved {len(logs)} logs (page {page}/{pagination.pages})")
     return jsonify(response), 200
 
-# API to clear all logs
+# Export configuration
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "activity_logs.ndjson"),
+    "csv": ("text/csv", "activity_logs.csv")
+}
+EXPORT_COLUMNS = ["log_id", "player_id", "action", "timestamp", "action_type"]
+
+def export_rows(player_id=None, start=None, end=None):
+    """
+    Yields (LogID, PlayerID, Action, Timestamp) tuples in time order.
+    Reads EXPORT_CHUNK_SIZE rows per query, continuing from the last
+    (Timestamp, LogID) seen, and releases the connection between chunks,
+    so memory stays flat and no transaction is held open for the export.
+    """
+    columns = (ActivityLog.LogID, ActivityLog.PlayerID, ActivityLog.Action, ActivityLog.Timestamp)
+    last = None
+    while True:
+        query = db.select(*columns)
+        if player_id is not None:
+            query = query.where(ActivityLog.PlayerID == player_id)
+        if start is not None:
+            query = query.where(ActivityLog.Timestamp >= start)
+        if end is not None:
+            query = query.where(ActivityLog.Timestamp < end)
+        if last is not None:
+            query = query.where(db.or_(
+                ActivityLog.Timestamp > last[1],
+                db.and_(ActivityLog.Timestamp == last[1], ActivityLog.LogID > last[0])
+            ))
+        query = query.order_by(ActivityLog.Timestamp.asc(), ActivityLog.LogID.asc()).limit(EXPORT_CHUNK_SIZE)
+
+        rows = db.session.execute(query).all()
+        db.session.close()
+        if not rows:
+            return
+        for row in rows:
+            yield row
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        last = (rows[-1].LogID, rows[-1].Timestamp)
+
+def export_ndjson(rows):
+    for log_id, player_id, action, timestamp in rows:
+        yield json.dumps({
+            "log_id": log_id,
+            "player_id": player_id,
+            "action": action,
+            "timestamp": timestamp.isoformat() if timestamp else None,
+            "action_type": classify_action(action)[0]
+        }) + "\n"
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, (log_id, player_id, action, timestamp) in enumerate(rows, start=1):
+        writer.writerow([log_id, player_id, action, timestamp.isoformat() if timestamp else "", classify_action(action)[0]])
+        # Hand over the text in blocks rather than per row
+        if count % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# API to stream logs as NDJSON or CSV (?format=, ?player_id=, ?start=, ?end=)
+@app.route("/log/export", methods=["GET"])
+def export_logs():
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO 8601 timestamps"}), 400
+
+    rows = export_rows(request.args.get('player_id', type=int), start, end)
+    body = export_ndjson(rows) if export_format == "ndjson" else export_csv(rows)
+
+    mimetype, filename = EXPORT_FORMATS[export_format]
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    logger.info(f"Streaming activity log export as {export_format}")
+    return response
+
+def stream_resume_id():
+    """
+    LogID a live stream resumes after: the Last-Event-ID an EventSource
+    sends when it reconnects, else ?since=<cursor>. None for a fresh stream.
+    Raises ValueError.
+    """
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        return int(last_event_id)
+    if request.args.get('since'):
+        return decode_cursor(request.args['since'])[1]
+    return None
+
+# Server-Sent Events stream of newly stored logs (?player_id= to filter,
+# resumes after Last-Event-ID or ?since=<cursor>)
+@app.route("/log/stream", methods=["GET"])
+def stream_logs():
+    player_id = request.args.get('player_id', type=int)
+    try:
+        resume_id = stream_resume_id()
+    except ValueError:
+        return jsonify({"error": "Invalid Last-Event-ID or since cursor"}), 400
+
+    subscriber = hub.subscribe(player_id)
+    if subscriber is None:
+        return jsonify({"error": "Too many live viewers, try again later"}), 503
+
+    # Rows stored since the resume point; subscribed first so none fall in between
+    backlog, lagged = [], False
+    if resume_id is not None:
+        query = ActivityLog.query.filter(ActivityLog.LogID > resume_id)
+        if player_id:
+            query = query.filter_by(PlayerID=player_id)
+        logs = query.order_by(ActivityLog.LogID.asc()).limit(REPLAY_LIMIT + 1).all()
+        if len(logs) > REPLAY_LIMIT:
+            lagged = True
+        else:
+            backlog = [log.to_dict() for log in logs]
+        # Don't hold a database connection for the life of the stream
+        db.session.close()
+
+    response = Response(stream_with_context(hub.stream(subscriber, backlog, lagged)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# API to report live-feed subscribers
+@app.route("/metrics/stream", methods=["GET"])
+def stream_metrics():
+    return jsonify(hub.stats()), 200
+
+# API to report per-player hourly activity counts from the rollup table
+# (?player_id=, ?start=, ?end=, ?type=, ?group=hour|total)
+@app.route("/log/stats", methods=["GET"])
+def get_log_stats():
+    group = request.args.get('group', 'total')
+    if group not in ("hour", "total"):
+        return jsonify({"error": "group must be 'hour' or 'total'"}), 400
+    action_type = request.args.get('type')
+    if action_type and action_type not in ACTION_TYPES:
+        return jsonify({"error": f"type must be one of {', '.join(ACTION_TYPES)}"}), 400
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO 8601 timestamps"}), 400
+
+    player_id = request.args.get('player_id', type=int)
+    columns = [ActivityRollup.ActionType]
+    if group == "hour":
+        columns.insert(0, ActivityRollup.Hour)
+    query = db.select(*columns, db.func.sum(ActivityRollup.Count), db.func.sum(ActivityRollup.Points))
+    if player_id is not None:
+        query = query.where(ActivityRollup.PlayerID == player_id)
+    if start is not None:
+        query = query.where(ActivityRollup.Hour >= start.replace(minute=0, second=0, microsecond=0))
+    if end is not None:
+        query = query.where(ActivityRollup.Hour < end)
+    if action_type:
+        query = query.where(ActivityRollup.ActionType == action_type)
+    query = query.group_by(*columns).order_by(*columns)
+
+    response = {"player_id": player_id}
+    rows = db.session.execute(query).all()
+    if group == "hour":
+        response["buckets"] = [
+            {"hour": hour.isoformat(), "action_type": name, "count": int(count), "points": int(points)}
+            for hour, name, count, points in rows
+        ]
+    else:
+        response["totals"] = {name: {"count": int(count), "points": int(points)} for name, count, points in rows}
+    return jsonify(response), 200
+
+# API to list the activity log's time partitions
+@app.route("/log/partitions", methods=["GET"])
+def get_partitions():
+    manager = partition_manager()
+    cutoff = retention_cutoff()
+    return jsonify({
+        "backend": manager.name,
+        "interval": PARTITION_INTERVAL,
+        "retention_days": RETENTION_DAYS,
+        "retention_cutoff": cutoff.isoformat() if cutoff else None,
+        "partitions": [
+            {
+                "name": p["name"],
+                "start": p["start"].isoformat() if p["start"] else None,
+                "end": p["end"].isoformat() if p["end"] else None,
+                "rows": p["rows"]
+            }
+            for p in manager.partitions()
+        ]
+    }), 200
+
+# API to clear logs: ?before=<ISO date> drops whole partitions older than it,
+# otherwise everything is removed (rollup counters included)
 @app.route("/log", methods=["DELETE"])
 def clear_logs():
-    count = ActivityLog.query.count()
-    ActivityLog.query.delete()
+    manager = partition_manager()
+    if request.args.get('before'):
+        try:
+            before = datetime.fromisoformat(request.args['before'])
+        except ValueError:
+            return jsonify({"error": "before must be an ISO 8601 timestamp"}), 400
+        dropped = manager.drop_before(before)
+        names = [p["name"] for p in dropped]
+        logger.info(f"Dropped activity log partitions before {before}: {names}")
+        return jsonify({"message": f"Dropped {len(names)} partitions", "partitions": names}), 200
+
+    count = manager.clear()
+    ActivityRollup.query.delete()
     db.session.commit()
     logger.info(f"Cleared {count} log entries")
     return jsonify({"message": f"Activity logs cleared! ({count} entries removed)"}), 200
 
+# API to report the RabbitMQ publisher's buffer depth and drop counters
+@app.route("/metrics/publisher", methods=["GET"])
+def publisher_metrics():
+    return jsonify(publisher.stats()), 200
+
+# API to report the queue consumer's ingestion rate and batch sizes
+@app.route("/metrics/consumer", methods=["GET"])
+def consumer_metrics():
+    return jsonify(collect_consumer_metrics()), 200
+
+def open_admin_channel():
+    """
+    Opens a short-lived channel for the dead-letter admin endpoints.
+    """
+    connection = pika.BlockingConnection(pika.ConnectionParameters(
+        host=RABBITMQ_HOST, connection_attempts=1, socket_timeout=5))
+    channel = connection.channel()
+    declare_topology(channel)
+    channel.confirm_delivery()
+    return connection, channel
+
+# API to inspect dead-lettered activity messages (they stay in the queue)
+@app.route("/dead-letters", methods=["GET"])
+def get_dead_letters():
+    limit = min(request.args.get('limit', 50, type=int), 500)
+    try:
+        connection, channel = open_admin_channel()
+    except Exception as e:
+        logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
+        return jsonify({"error": "RabbitMQ unavailable"}), 503
+    try:
+        depth = channel.queue_declare(queue=DEAD_LETTER_QUEUE, durable=True, passive=True).method.message_count
+        messages = peek_dead_letters(channel, limit)
+    finally:
+        connection.close()
+    return jsonify({"queue": DEAD_LETTER_QUEUE, "depth": depth, "messages": messages}), 200
+
+# API to move dead-lettered activity messages back onto the main queue
+@app.route("/dead-letters/replay", methods=["POST"])
+def replay_dead_letter_messages():
+    data = request.get_json(silent=True) or {}
+    limit = data.get('limit', 100)
+    if not isinstance(limit, int) or limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    try:
+        connection, channel = open_admin_channel()
+    except Exception as e:
+        logger.error(f"Failed to connect to RabbitMQ: {str(e)}")
+        return jsonify({"error": "RabbitMQ unavailable"}), 503
+    try:
+        replayed = replay_dead_letters(channel, limit)
+    finally:
+        connection.close()
+    logger.info(f"Replayed {replayed} dead-lettered activity messages")
+    return jsonify({"message": f"Replayed {replayed} messages", "replayed": replayed}), 200
+
 # Simple HTML page to view logs
 @app.route("/")
 def log_viewer():
@@ -218,44 +611,91 @@ def log_viewer():
                 <tr><td colspan="4">Loading logs...</td></tr>
             </tbody>
         </table>
+
+        <div class="controls">
+            <button class="btn" id="load-more" onclick="loadMore()" style="display:none">Load Older</button>
+        </div>
         
         <script>
             let currentFilter = null;
+            let nextCursor = null;
+            let liveStream = null;
             
             // Load logs when page loads
             window.onload = function() {
                 loadLogs();
             };
+
+            function logRow(log) {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${log.log_id ?? 'live'}</td>
+                    <td>${log.player_id}</td>
+                    <td>${log.action}</td>
+                    <td>${log.timestamp}</td>
+                `;
+                return row;
+            }
+
+            // New logs are pushed by the server as they are stored
+            // Starts after `since` (the first page's latest_cursor), so rows stored
+            // in between aren't missed; reconnects resume from the last event id
+            function startLiveStream(since) {
+                if (liveStream) {
+                    liveStream.close();
+                }
+                const params = new URLSearchParams();
+                if (currentFilter) {
+                    params.set('player_id', currentFilter);
+                }
+                if (since) {
+                    params.set('since', since);
+                }
+                liveStream = new EventSource(`/log/stream?${params}`);
+                liveStream.onmessage = function(event) {
+                    const logsContainer = document.getElementById('logs-container');
+                    if (logsContainer.querySelector('td[colspan]')) {
+                        logsContainer.innerHTML = '';
+                    }
+                    logsContainer.insertBefore(logRow(JSON.parse(event.data)), logsContainer.firstChild);
+                };
+                liveStream.addEventListener('lagged', function() {
+                    // Fell behind and missed events; reload the first page
+                    loadLogs();
+                });
+            }
             
-            function loadLogs() {
+            function loadLogs(before) {
                 let url = '/log';
                 if (currentFilter) {
                     url = `/log/${currentFilter}`;
                 }
+                if (before) {
+                    url += `?before=${encodeURIComponent(before)}`;
+                }
                 
                 fetch(url)
                     .then(response => response.json())
                     .then(data => {
                         const logsContainer = document.getElementById('logs-container');
-                        logsContainer.innerHTML = '';
+                        if (!before) {
+                            logsContainer.innerHTML = '';
+                            startLiveStream(data.latest_cursor);
+                        }
+
+                        nextCursor = data.next_cursor || null;
+                        document.getElementById('load-more').style.display = nextCursor ? 'inline-block' : 'none';
                         
                         // Handle both array response and paginated response
                         const logs = Array.isArray(data) ? data : (data.logs || []);
                         
-                        if (logs.length === 0) {
+                        if (logs.length === 0 && !before) {
                             logsContainer.innerHTML = '<tr><td colspan="4" style="text-align:center">No logs found</td></tr>';
                             return;
                         }
                         
                         logs.forEach(log => {
-                            const row = document.createElement('tr');
-                            row.innerHTML = `
-                                <td>${log.log_id}</td>
-                                <td>${log.player_id}</td>
-                                <td>${log.action}</td>
-                                <td>${log.timestamp}</td>
-                            `;
-                            logsContainer.appendChild(row);
+                            logsContainer.appendChild(logRow(log));
                         });
                     })
                     .catch(error => {
@@ -268,6 +708,12 @@ def log_viewer():
             function refreshLogs() {
                 loadLogs();
             }
+
+            function loadMore() {
+                if (nextCursor) {
+                    loadLogs(nextCursor);
+                }
+            }
             
             function clearLogs() {
                 if (confirm('Are you sure you want to clear all logs? This cannot be undone.')) {
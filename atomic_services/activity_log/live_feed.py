@@ -0,0 +1,146 @@
+# atomic_services/activity_log/live_feed.py
+import os
+import json
+import queue
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Live feed configuration
+MAX_SUBSCRIBERS = int(os.getenv("LIVE_FEED_MAX_SUBSCRIBERS", "1000"))
+SUBSCRIBER_BUFFER = int(os.getenv("LIVE_FEED_SUBSCRIBER_BUFFER", "256"))
+KEEPALIVE_SECONDS = float(os.getenv("LIVE_FEED_KEEPALIVE", "15"))
+# Most rows replayed to a stream resuming from Last-Event-ID; past that it gets "lagged"
+REPLAY_LIMIT = int(os.getenv("LIVE_FEED_REPLAY_LIMIT", "1000"))
+
+
+class Subscriber:
+    """
+    One open stream. Holds a bounded buffer of events; when a slow client
+    lets it fill up, the oldest events are dropped and counted.
+    """
+
+    def __init__(self, player_id=None, buffer_size=SUBSCRIBER_BUFFER):
+        self.player_id = player_id
+        self.events = queue.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def offer(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class LogHub:
+    """
+    In-process fan-out of newly stored log rows to open SSE streams. The
+    ingest path calls publish() once per batch; each subscriber only gets
+    the rows for its player (or everything if it has no filter).
+    """
+
+    def __init__(self, max_subscribers=MAX_SUBSCRIBERS):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, player_id=None):
+        """Returns a new Subscriber, or None if the hub is full."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscriber = Subscriber(player_id)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, events):
+        """Fans out event dicts (each with a player_id) to matching subscribers."""
+        if not events:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += len(events)
+        for subscriber in subscribers:
+            for event in events:
+                if subscriber.player_id is None or subscriber.player_id == event.get("player_id"):
+                    subscriber.offer(event)
+
+    def stream(self, subscriber, backlog=(), lagged=False):
+        """
+        Yields Server-Sent Events for a subscriber until the client goes
+        away: first the `backlog` events (rows stored since the point the
+        client resumes from), then live ones. Sends a comment line as
+        keepalive when idle. `lagged` starts the stream with a lagged event,
+        for when the backlog was too long to replay.
+        """
+        try:
+            yield "retry: 3000\n\n"
+            if lagged:
+                yield f"event: lagged\ndata: {json.dumps({'dropped': None})}\n\n"
+            # The subscription predates the backlog query, so a row can be in both
+            replayed = set()
+            for event in backlog:
+                replayed.add(event.get("log_id"))
+                yield sse_message(event)
+            while True:
+                try:
+                    event = subscriber.events.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscriber.dropped:
+                    yield f"event: lagged\ndata: {json.dumps({'dropped': subscriber.dropped})}\n\n"
+                    subscriber.dropped = 0
+                if replayed and event.get("log_id") in replayed:
+                    continue
+                yield sse_message(event)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "max_subscribers": self.max_subscribers,
+                "published": self.published
+            }
+
+
+def sse_message(event):
+    """
+    One SSE message. The LogID is its id, so a reconnecting EventSource
+    sends it back as Last-Event-ID and resumes after it.
+    """
+    if event.get("log_id") is None:
+        return f"data: {json.dumps(event)}\n\n"
+    return f"id: {event['log_id']}\ndata: {json.dumps(event)}\n\n"
+
+
+def row_event(row):
+    """Turns an ActivityLog row dict (PlayerID/Action/Timestamp) into a feed event."""
+    timestamp = row.get("Timestamp")
+    return {
+        "log_id": row.get("LogID"),
+        "player_id": row.get("PlayerID"),
+        "action": row.get("Action"),
+        # Stored as a naive DATETIME, so drop the offset to match to_dict()
+        "timestamp": timestamp.replace(tzinfo=None).isoformat() if hasattr(timestamp, "isoformat") else timestamp
+    }
+
+
+# One hub per process; the consumer thread and the web server share it
+hub = LogHub()
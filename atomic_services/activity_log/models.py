@@ -9,11 +9,21 @@ def sg_now():
 
 class ActivityLog(db.Model):
     __tablename__ = 'ActivityLog'
+    __table_args__ = (
+        # Per-player history in time order (keyset pagination)
+        db.Index('idx_activity_player_time', 'PlayerID', 'Timestamp', 'LogID'),
+        # Per-player rows added after a cursor, in LogID order (?since=)
+        db.Index('idx_activity_player_log', 'PlayerID', 'LogID'),
+        # Global listing in time order
+        db.Index('idx_activity_time', 'Timestamp', 'LogID'),
+    )
     
-    LogID = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # BIGINT for very long histories; SQLite only autoincrements INTEGER keys
+    LogID = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)
     PlayerID = db.Column(db.Integer, nullable=False)
     Action = db.Column(db.String(255), nullable=False)
-    Timestamp = db.Column(db.DateTime, default=sg_now)
+    # Partition key on MySQL (see partitions.py)
+    Timestamp = db.Column(db.DateTime, nullable=False, default=sg_now)
 
     def to_dict(self):
         return {
@@ -21,4 +31,30 @@ class ActivityLog(db.Model):
             'player_id': self.PlayerID,
             'action': self.Action,
             'timestamp': self.Timestamp.isoformat()
-        }
\ No newline at end of file
+        }
+
+class ActivityRollup(db.Model):
+    """
+    Per-player, per-hour event counters, kept up to date by the consumer in
+    the same transaction as the raw ActivityLog rows (see rollups.py).
+    """
+    __tablename__ = 'ActivityRollup'
+    __table_args__ = (
+        # Dashboard queries across all players for a time range
+        db.Index('idx_rollup_hour', 'Hour', 'ActionType'),
+    )
+
+    PlayerID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Hour = db.Column(db.DateTime, primary_key=True)
+    ActionType = db.Column(db.String(32), primary_key=True)
+    Count = db.Column(db.Integer, nullable=False, default=0)
+    Points = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'player_id': self.PlayerID,
+            'hour': self.Hour.isoformat(),
+            'action_type': self.ActionType,
+            'count': self.Count,
+            'points': self.Points
+        }
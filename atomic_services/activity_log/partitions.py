@@ -0,0 +1,245 @@
+# atomic_services/activity_log/partitions.py
+import os
+import time
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+from models import db, ActivityLog, sg_now
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Partitioning configuration
+# "auto" uses native partitions when the table has them, otherwise range deletes
+PARTITION_BACKEND = os.getenv("ACTIVITY_PARTITION_BACKEND", "auto")
+PARTITION_INTERVAL = os.getenv("ACTIVITY_PARTITION_INTERVAL", "month")  # "day" or "month"
+PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", "2"))
+# Partitions entirely older than this are dropped; 0 keeps everything
+RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "0"))
+MAINTENANCE_INTERVAL = float(os.getenv("ACTIVITY_MAINTENANCE_INTERVAL", "3600"))  # seconds
+DELETE_CHUNK_SIZE = int(os.getenv("ACTIVITY_DELETE_CHUNK_SIZE", "5000"))
+
+TABLE = ActivityLog.__tablename__
+MAXVALUE_PARTITION = "pmax"
+
+
+def period_start(value, interval=PARTITION_INTERVAL):
+    """First day of the partition period containing `value`."""
+    value = value.date() if isinstance(value, datetime) else value
+    return value if interval == "day" else value.replace(day=1)
+
+
+def next_period(start, interval=PARTITION_INTERVAL):
+    if interval == "day":
+        return start + timedelta(days=1)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(start, interval=PARTITION_INTERVAL):
+    return f"p{start:%Y%m%d}" if interval == "day" else f"p{start:%Y%m}"
+
+
+class RangeDeletePartitions:
+    """
+    Generic backend for databases without native partitioning (SQLite).
+
+    Partitions are the same day/month periods, but logical: they are
+    ranges of the (Timestamp, LogID) index. Time-bounded queries only read
+    their range through that index, and dropping a partition deletes its
+    rows DELETE_CHUNK_SIZE at a time, each chunk in its own short
+    transaction, so the table is never locked for a whole period.
+    """
+
+    name = "generic"
+
+    def __init__(self, interval=PARTITION_INTERVAL):
+        self.interval = interval
+
+    def ensure(self, now=None):
+        """Nothing to create ahead of time."""
+        return []
+
+    def partitions(self):
+        """Periods that currently hold rows, oldest first."""
+        oldest, newest = db.session.query(db.func.min(ActivityLog.Timestamp), db.func.max(ActivityLog.Timestamp)).one()
+        db.session.commit()
+        if oldest is None:
+            return []
+        periods = []
+        start = period_start(oldest, self.interval)
+        last = period_start(newest, self.interval)
+        while start <= last:
+            end = next_period(start, self.interval)
+            periods.append({"name": partition_name(start, self.interval), "start": start, "end": end, "rows": None})
+            start = end
+        return periods
+
+    def _delete_range(self, start=None, end=None):
+        """Deletes rows in [start, end) in chunks. Returns how many were removed."""
+        removed = 0
+        while True:
+            chunk = db.select(ActivityLog.LogID)
+            if start is not None:
+                chunk = chunk.where(ActivityLog.Timestamp >= start)
+            if end is not None:
+                chunk = chunk.where(ActivityLog.Timestamp < end)
+            ids = db.session.execute(chunk.order_by(ActivityLog.Timestamp, ActivityLog.LogID).limit(DELETE_CHUNK_SIZE)).scalars().all()
+            if not ids:
+                return removed
+            db.session.execute(db.delete(ActivityLog).where(ActivityLog.LogID.in_(ids)))
+            db.session.commit()
+            removed += len(ids)
+
+    def drop_before(self, cutoff):
+        """Drops every period that ends on or before `cutoff`."""
+        boundary = period_start(cutoff, self.interval)
+        dropped = [p for p in self.partitions() if p["end"] <= boundary]
+        if not dropped:
+            return []
+        removed = self._delete_range(end=datetime.combine(boundary, datetime.min.time()))
+        logger.info(f"Dropped {len(dropped)} activity log periods before {boundary} ({removed} rows)")
+        return dropped
+
+    def clear(self):
+        """Empties the table. Returns the number of rows removed."""
+        return self._delete_range()
+
+
+class MySQLRangePartitions(RangeDeletePartitions):
+    """
+    Native MySQL RANGE partitions on TO_DAYS(Timestamp), one per day or
+    month, plus a catch-all `pmax` that is kept empty by creating the next
+    PARTITIONS_AHEAD partitions in advance. MySQL prunes time-bounded
+    queries to the matching partitions, and retention is a metadata-only
+    DROP PARTITION.
+    """
+
+    name = "mysql"
+
+    @staticmethod
+    def is_partitioned():
+        method = db.session.execute(text(
+            "SELECT PARTITION_METHOD FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table LIMIT 1"
+        ), {"table": TABLE}).scalar()
+        db.session.commit()
+        return method == "RANGE"
+
+    def partitions(self):
+        rows = db.session.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"table": TABLE}).all()
+        db.session.commit()
+        periods = []
+        start = None
+        for name, description, table_rows in rows:
+            if description == "MAXVALUE":
+                end = None
+            else:
+                # TO_DAYS() counts from year 0; Python ordinals start at 0001-01-01
+                end = date.fromordinal(int(description) - 365)
+            periods.append({"name": name, "start": start, "end": end, "rows": table_rows})
+            start = end
+        return periods
+
+    def ensure(self, now=None):
+        """Splits pmax so partitions exist through PARTITIONS_AHEAD periods from now."""
+        bounds = [p["end"] for p in self.partitions() if p["end"] is not None]
+        target = period_start(now or sg_now(), self.interval)
+        for _ in range(PARTITIONS_AHEAD + 1):
+            target = next_period(target, self.interval)
+        # Continue from the last boundary (filling any gap) or start at the current period
+        start = bounds[-1] if bounds else period_start(now or sg_now(), self.interval)
+        wanted = []
+        while start < target:
+            end = next_period(start, self.interval)
+            wanted.append((partition_name(start, self.interval), end))
+            start = end
+        if not wanted:
+            return []
+        definitions = ", ".join(f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{end.isoformat()}'))" for name, end in wanted)
+        db.session.execute(text(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO "
+            f"({definitions}, PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE)"
+        ))
+        db.session.commit()
+        logger.info(f"Created activity log partitions {', '.join(name for name, _ in wanted)}")
+        return [name for name, _ in wanted]
+
+    def drop_before(self, cutoff):
+        boundary = period_start(cutoff, self.interval)
+        periods = self.partitions()
+        bounded = [p for p in periods if p["end"] is not None]
+        dropped = [p for p in bounded if p["end"] <= boundary]
+        # Always keep one bounded partition so pmax can still be split
+        if len(dropped) == len(bounded):
+            dropped = dropped[:-1]
+        if not dropped:
+            return []
+        db.session.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(p['name'] for p in dropped)}"))
+        db.session.commit()
+        logger.info(f"Dropped activity log partitions {', '.join(p['name'] for p in dropped)}")
+        return dropped
+
+    def clear(self):
+        removed = sum(p["rows"] or 0 for p in self.partitions())
+        # Keeps the partition layout, unlike DELETE it doesn't touch rows
+        db.session.execute(text(f"TRUNCATE TABLE {TABLE}"))
+        db.session.commit()
+        return removed
+
+
+BACKENDS = {
+    RangeDeletePartitions.name: RangeDeletePartitions,
+    MySQLRangePartitions.name: MySQLRangePartitions
+}
+
+_manager = None
+
+
+def partition_manager():
+    """
+    The partition backend for this database: ACTIVITY_PARTITION_BACKEND, or
+    with "auto" native MySQL partitions when the table is partitioned and
+    the generic backend otherwise. Call inside an app context.
+    """
+    global _manager
+    if _manager is not None:
+        return _manager
+    backend = PARTITION_BACKEND
+    if backend == "auto":
+        backend = "generic"
+        if db.engine.dialect.name == "mysql" and MySQLRangePartitions.is_partitioned():
+            backend = "mysql"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ACTIVITY_PARTITION_BACKEND: {backend}")
+    _manager = BACKENDS[backend]()
+    logger.info(f"Activity log partitioning: {backend} ({PARTITION_INTERVAL})")
+    return _manager
+
+
+def retention_cutoff(now=None):
+    """Rows older than this are expired, or None if retention is off."""
+    if RETENTION_DAYS <= 0:
+        return None
+    return (now or sg_now()) - timedelta(days=RETENTION_DAYS)
+
+
+def run_maintenance(app):
+    """
+    Background loop: creates upcoming partitions and drops the ones past
+    the retention period every MAINTENANCE_INTERVAL seconds.
+    """
+    while True:
+        try:
+            with app.app_context():
+                manager = partition_manager()
+                manager.ensure()
+                cutoff = retention_cutoff()
+                if cutoff is not None:
+                    manager.drop_before(cutoff)
+        except Exception as e:
+            logger.error(f"Activity log partition maintenance failed: {str(e)}")
+        time.sleep(MAINTENANCE_INTERVAL)
@@ -0,0 +1,10 @@
+# atomic_services/activity_log/publisher.py
+import atexit
+
+# Same publisher the composite services use (composite_services/utilities/activity_publisher.py)
+from composite_services.utilities.activity_publisher import ActivityPublisher
+
+# One publisher per process, shared by every request. No spool: while the
+# broker is down send_to_rabbitmq() writes the log entry directly instead.
+publisher = ActivityPublisher()
+atexit.register(publisher.flush)
@@ -1,16 +1,56 @@
 # atomic_services/activity_log/rabbitmq_consumer.py
 import pika, json
 from models import db, ActivityLog
+from live_feed import hub, row_event
+from rollups import upsert_rollups
 from datetime import datetime
 import logging
 import time
 import os
+import threading
+from collections import deque
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ACTIVITY_LOG_QUEUE = "activity_log_queue"
+
+# Retry / dead-letter topology. Failed messages wait in a delay queue whose
+# TTL dead-letters them back onto activity_log_queue; after the last delay
+# they are parked in the dead-letter queue. The main queue is unchanged.
+RETRY_DELAYS = [float(d) for d in os.getenv("ACTIVITY_RETRY_DELAYS", "1,5,30").split(",") if d.strip()]  # seconds
+DEAD_LETTER_QUEUE = f"{ACTIVITY_LOG_QUEUE}.dead"
+ATTEMPTS_HEADER = "x-attempts"
+
+# Consumer configuration
+# "batch" buffers rows and writes them with one multi-row insert; "single" commits per message
+CONSUMER_MODE = os.getenv("ACTIVITY_CONSUMER_MODE", "batch")
+CONSUMER_PREFETCH = int(os.getenv("ACTIVITY_CONSUMER_PREFETCH", "500"))
+CONSUMER_BATCH_SIZE = int(os.getenv("ACTIVITY_CONSUMER_BATCH_SIZE", "200"))
+CONSUMER_MAX_WAIT = float(os.getenv("ACTIVITY_CONSUMER_MAX_WAIT", "0.5"))  # seconds
+# Window used for the messages/sec figure
+RATE_WINDOW = 60.0
+
+_stats_lock = threading.Lock()
+_stats = {
+    "messages": 0,
+    "rejected": 0,
+    "retried": 0,
+    "dead_lettered": 0,
+    "batches": 0,
+    "failed_batches": 0,
+    "last_batch_size": 0,
+    "max_batch_size": 0,
+    "last_batch_ms": 0.0
+}
+# (finished_at, rows) for recent batches, used to compute messages/sec
+_recent_batches = deque()
+
+
 def to_sgt(dt):
     """
     Converts a datetime (naive or aware) to Singapore Time (UTC+8).
@@ -18,72 +58,365 @@ def to_sgt(dt):
     sg_offset = timedelta(hours=8)
     return dt.astimezone(timezone(sg_offset)) if dt.tzinfo else (dt + sg_offset).replace(tzinfo=timezone(sg_offset))
 
+
+def retry_queue_name(attempt):
+    """Delay queue used for the given retry attempt (1-based)."""
+    return f"{ACTIVITY_LOG_QUEUE}.retry.{attempt}"
+
+
+def declare_topology(channel):
+    """
+    Declares the main queue, one delay queue per RETRY_DELAYS entry and the
+    dead-letter queue.
+    """
+    channel.queue_declare(queue=ACTIVITY_LOG_QUEUE, durable=True)
+    for attempt, delay in enumerate(RETRY_DELAYS, start=1):
+        channel.queue_declare(
+            queue=retry_queue_name(attempt),
+            durable=True,
+            arguments={
+                "x-message-ttl": int(delay * 1000),
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": ACTIVITY_LOG_QUEUE
+            }
+        )
+    channel.queue_declare(queue=DEAD_LETTER_QUEUE, durable=True)
+
+
+def attempts_of(properties):
+    headers = (properties.headers if properties else None) or {}
+    try:
+        return int(headers.get(ATTEMPTS_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def route_failure(channel, body, properties, reason, retryable=True):
+    """
+    Moves a message that could not be processed out of the main queue:
+    into the next delay queue, or into the dead-letter queue once its
+    retries are used up (or straight away if it can never succeed).
+    The caller acks the original delivery afterwards.
+    """
+    attempts = attempts_of(properties) + 1
+    headers = dict((properties.headers if properties else None) or {})
+    headers[ATTEMPTS_HEADER] = attempts
+    headers["x-last-error"] = str(reason)[:255]
+
+    if retryable and attempts <= len(RETRY_DELAYS):
+        target = retry_queue_name(attempts)
+        counter = "retried"
+    else:
+        target = DEAD_LETTER_QUEUE
+        counter = "dead_lettered"
+        headers["x-dead-lettered-at"] = datetime.utcnow().isoformat()
+
+    channel.basic_publish(
+        exchange='',
+        routing_key=target,
+        body=body,
+        properties=pika.BasicProperties(delivery_mode=2, headers=headers)
+    )
+    with _stats_lock:
+        _stats[counter] += 1
+    logger.warning(f"Activity message moved to {target} after attempt {attempts}: {reason}")
+
+
+def parse_message(body):
+    """
+    Turns a queue message into an ActivityLog row dict.
+    Raises ValueError if the message is not usable.
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Message is not a JSON object")
+    player_id = data.get("player_id")
+    action = data.get("action")
+    timestamp = data.get("timestamp")
+
+    if not player_id or not action:
+        raise ValueError("Message missing required fields (player_id, action)")
+
+    if timestamp:
+        try:
+            timestamp = datetime.fromisoformat(timestamp)
+        except ValueError:
+            logger.warning(f"Invalid timestamp format: {timestamp}, using current time")
+            timestamp = datetime.utcnow()
+    else:
+        timestamp = datetime.utcnow()
+
+    timestamp = to_sgt(timestamp)  # ✅ Only convert after parsing/setting
+
+    return {"PlayerID": player_id, "Action": action, "Timestamp": timestamp}
+
+
+def insert_rows(rows):
+    """
+    Inserts ActivityLog rows with one multi-row INSERT and returns them
+    with their LogIDs, in LogID order. Uses RETURNING where the database has
+    it; on MySQL the ids of one multi-row INSERT are consecutive from
+    lastrowid (InnoDB autoinc lock modes 0 and 1, and "simple inserts"
+    like this one in mode 2).
+    """
+    statement = insert(ActivityLog).values(rows)
+    if db.session.get_bind().dialect.insert_returning:
+        result = db.session.execute(statement.returning(
+            ActivityLog.LogID, ActivityLog.PlayerID, ActivityLog.Action, ActivityLog.Timestamp
+        ))
+        return sorted((dict(row._mapping) for row in result), key=lambda row: row["LogID"])
+    first_id = db.session.execute(statement).lastrowid
+    return [dict(row, LogID=first_id + offset) for offset, row in enumerate(rows)]
+
+
+def ingest_rows(rows):
+    """
+    Writes ActivityLog rows in one multi-row INSERT, adds them to the
+    hourly rollup counters and commits both together, then pushes them
+    (with their LogIDs) to live-feed subscribers.
+    """
+    if not rows:
+        return
+    from app import app
+    with app.app_context():
+        try:
+            stored = insert_rows(rows)
+            upsert_rollups(db.session, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    hub.publish([row_event(row) for row in stored])
+
+
+def _record_batch(size, started, failed=False):
+    finished = time.monotonic()
+    with _stats_lock:
+        if failed:
+            _stats["failed_batches"] += 1
+            return
+        _stats["messages"] += size
+        _stats["batches"] += 1
+        _stats["last_batch_size"] = size
+        _stats["max_batch_size"] = max(_stats["max_batch_size"], size)
+        _stats["last_batch_ms"] = round((finished - started) * 1000, 1)
+        _recent_batches.append((finished, size))
+        while _recent_batches and finished - _recent_batches[0][0] > RATE_WINDOW:
+            _recent_batches.popleft()
+
+
+def consumer_metrics():
+    """
+    Reports ingestion counters, batch sizes and recent messages/sec.
+    """
+    now = time.monotonic()
+    with _stats_lock:
+        stats = dict(_stats)
+        recent = [(t, n) for t, n in _recent_batches if now - t <= RATE_WINDOW]
+    stats["mode"] = CONSUMER_MODE
+    stats["prefetch"] = CONSUMER_PREFETCH if CONSUMER_MODE == "batch" else 1
+    stats["batch_size_limit"] = CONSUMER_BATCH_SIZE
+    stats["avg_batch_size"] = round(stats["messages"] / stats["batches"], 2) if stats["batches"] else 0
+    stats["messages_per_sec"] = round(sum(n for _, n in recent) / RATE_WINDOW, 2)
+    return stats
+
+
+def consume_single(channel):
+    """
+    Original mode: one message in flight, one commit and one ack per message.
+    """
+    def callback(ch, method, properties, body):
+        started = time.monotonic()
+        logger.info(f"Received message: {body}")
+        try:
+            row = parse_message(body)
+        except ValueError as e:
+            logger.error(str(e))
+            # Park it, the message would never succeed
+            with _stats_lock:
+                _stats["rejected"] += 1
+            route_failure(ch, body, properties, e, retryable=False)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+            return
+
+        try:
+            ingest_rows([row])
+            logger.info(f"Logged activity: {row['Action']} for player {row['PlayerID']}")
+            _record_batch(1, started)
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            _record_batch(1, started, failed=True)
+            # Retry later from a delay queue instead of spinning on redelivery
+            route_failure(ch, body, properties, e)
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+    # Only fetch one message at a time
+    channel.basic_qos(prefetch_count=1)
+    channel.basic_consume(queue=ACTIVITY_LOG_QUEUE, on_message_callback=callback)
+
+    # Start consuming
+    channel.start_consuming()
+
+
+def _ingest_individually(channel, entries):
+    """
+    After a batch insert fails, writes the rows one by one so only the bad
+    messages go to the retry queues. If the database itself is unreachable
+    the remaining rows are routed without trying.
+    """
+    database_down = None
+    for row, body, properties in entries:
+        if database_down is not None:
+            route_failure(channel, body, properties, database_down)
+            continue
+        started = time.monotonic()
+        try:
+            ingest_rows([row])
+            _record_batch(1, started)
+        except OperationalError as e:
+            database_down = e
+            route_failure(channel, body, properties, e)
+        except Exception as e:
+            route_failure(channel, body, properties, e)
+
+
+def consume_batches(channel):
+    """
+    Batch mode: prefetches CONSUMER_PREFETCH messages, collects rows until
+    CONSUMER_BATCH_SIZE or CONSUMER_MAX_WAIT, writes them in one insert and
+    acks the whole batch with multiple=True.
+    """
+    channel.basic_qos(prefetch_count=CONSUMER_PREFETCH)
+
+    # (row, body, properties) for every message in the current batch
+    entries = []
+    last_tag = None
+    batch_started = None
+
+    def flush():
+        nonlocal entries, last_tag, batch_started
+        if last_tag is None:
+            return
+        started = time.monotonic()
+        try:
+            ingest_rows([row for row, _, _ in entries])
+            _record_batch(len(entries), started)
+            logger.info(f"Logged {len(entries)} activities in one batch")
+        except Exception as e:
+            logger.error(f"Error writing activity batch of {len(entries)}: {e}")
+            _record_batch(len(entries), started, failed=True)
+            _ingest_individually(channel, entries)
+        # Every message is now either stored or moved to a retry/dead-letter queue
+        channel.basic_ack(delivery_tag=last_tag, multiple=True)
+        entries = []
+        last_tag = None
+        batch_started = None
+
+    # inactivity_timeout yields (None, None, None) when idle so time-based flushes still happen
+    for method, properties, body in channel.consume(ACTIVITY_LOG_QUEUE, inactivity_timeout=min(0.1, CONSUMER_MAX_WAIT)):
+        if method is not None:
+            try:
+                row = parse_message(body)
+            except ValueError as e:
+                logger.error(f"{e}: {body}")
+                # Park it, the message would never succeed
+                with _stats_lock:
+                    _stats["rejected"] += 1
+                route_failure(channel, body, properties, e, retryable=False)
+                if last_tag is None:
+                    channel.basic_ack(delivery_tag=method.delivery_tag)
+                else:
+                    # Acked together with the batch it arrived in
+                    last_tag = method.delivery_tag
+            else:
+                entries.append((row, body, properties))
+                last_tag = method.delivery_tag
+                if batch_started is None:
+                    batch_started = time.monotonic()
+
+        if last_tag is None:
+            continue
+        if len(entries) >= CONSUMER_BATCH_SIZE or time.monotonic() - batch_started >= CONSUMER_MAX_WAIT:
+            flush()
+
+
+def peek_dead_letters(channel, limit=50):
+    """
+    Returns up to `limit` dead-lettered messages without removing them.
+    """
+    deliveries = []
+    messages = []
+    try:
+        for _ in range(limit):
+            method, properties, body = channel.basic_get(queue=DEAD_LETTER_QUEUE, auto_ack=False)
+            if method is None:
+                break
+            deliveries.append(method.delivery_tag)
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = body.decode("utf-8", errors="replace")
+            headers = properties.headers or {}
+            messages.append({
+                "message": payload,
+                "attempts": attempts_of(properties),
+                "last_error": headers.get("x-last-error"),
+                "dead_lettered_at": headers.get("x-dead-lettered-at")
+            })
+    finally:
+        # Put everything back in its original order
+        if deliveries:
+            channel.basic_nack(delivery_tag=deliveries[-1], multiple=True, requeue=True)
+    return messages
+
+
+def replay_dead_letters(channel, limit=100):
+    """
+    Moves up to `limit` dead-lettered messages back onto activity_log_queue
+    with a fresh attempt count. Returns how many were replayed.
+    """
+    replayed = 0
+    for _ in range(limit):
+        method, properties, body = channel.basic_get(queue=DEAD_LETTER_QUEUE, auto_ack=False)
+        if method is None:
+            break
+        headers = dict(properties.headers or {})
+        headers[ATTEMPTS_HEADER] = 0
+        headers.pop("x-dead-lettered-at", None)
+        channel.basic_publish(
+            exchange='',
+            routing_key=ACTIVITY_LOG_QUEUE,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2, headers=headers)
+        )
+        channel.basic_ack(delivery_tag=method.delivery_tag)
+        replayed += 1
+    return replayed
+
+
 def consume_messages():
     # Add delay to ensure RabbitMQ is fully started
     logger.info("Waiting for RabbitMQ to be fully available...")
     time.sleep(10)
-    
+
     rabbitmq_host = os.getenv("RABBITMQ_HOST", "rabbitmq")
     logger.info(f"Connecting to RabbitMQ at {rabbitmq_host}")
-    
+
     while True:
         try:
             connection = pika.BlockingConnection(pika.ConnectionParameters(host=rabbitmq_host))
             channel = connection.channel()
-            channel.queue_declare(queue='activity_log_queue', durable=True)
-            
-            logger.info("Connected to RabbitMQ, waiting for messages...")
-            
-            def callback(ch, method, properties, body):
-                try:
-                    logger.info(f"Received message: {body}")
-                    data = json.loads(body)
-                    player_id = data.get("player_id")
-                    action = data.get("action")
-                    timestamp = data.get("timestamp")
-                    
-                    if not player_id or not action:
-                        logger.error("Message missing required fields (player_id, action)")
-                        # Negative acknowledge, message will be requeued
-                        ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
-                        return
-                    
-                    if timestamp:
-                        try:
-                            timestamp = datetime.fromisoformat(timestamp)
-                        except ValueError:
-                            logger.warning(f"Invalid timestamp format: {timestamp}, using current time")
-                            timestamp = datetime.utcnow()
-                    else:
-                        timestamp = datetime.utcnow()
-
-                    timestamp = to_sgt(timestamp)  # ✅ Only convert after parsing/setting
-                    
-                    # Create new log entry
-                    from app import app
-                    with app.app_context():
-                        new_log = ActivityLog(
-                            PlayerID=player_id,
-                            Action=action,
-                            Timestamp=timestamp
-                        )
-                        db.session.add(new_log)
-                        db.session.commit()
-                        logger.info(f"Logged activity: {action} for player {player_id}")
-                    
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    # Negative acknowledge, message will be requeued
-                    ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
-            
-            # Only fetch one message at a time
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(queue='activity_log_queue', on_message_callback=callback)
-            
-            # Start consuming
-            channel.start_consuming()
-            
+            declare_topology(channel)
+            # Retry/dead-letter publishes are confirmed before the original is acked
+            channel.confirm_delivery()
+
+            logger.info(f"Connected to RabbitMQ, waiting for messages ({CONSUMER_MODE} mode)...")
+
+            if CONSUMER_MODE == "single":
+                consume_single(channel)
+            else:
+                consume_batches(channel)
+
         except pika.exceptions.AMQPConnectionError as e:
             logger.error(f"Connection to RabbitMQ failed: {e}. Retrying in 5 seconds...")
             time.sleep(5)
@@ -92,4 +425,4 @@ def consume_messages():
             time.sleep(5)
 
 if __name__ == "__main__":
-    consume_messages()
\ No newline at end of file
+    consume_messages()
@@ -0,0 +1,107 @@
+# atomic_services/activity_log/rollups.py
+import re
+import logging
+from datetime import datetime
+from models import ActivityRollup
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Action types, matched in order against the free-text Action. Services log
+# some events twice (the event itself, plus a "(+N score)" line when points
+# were awarded), so the score lines get their own type instead of counting
+# the same room entry or pickup twice.
+ACTION_PATTERNS = [
+    ("player_defeated", re.compile(r"^Defeated by ")),
+    ("enemy_defeated", re.compile(r"^Defeated ")),
+    ("combat_started", re.compile(r"^Engaged in combat with ")),
+    ("room_entered", re.compile(r"^Entered Room \d+: ")),
+    ("score_awarded", re.compile(r"^(Entered|Picked up) .*\(\+\d+ score\)$")),
+    ("item_picked", re.compile(r"^Picked up ")),
+    ("item_used", re.compile(r"^Increased .* from ")),
+    ("inventory_viewed", re.compile(r"^Viewed inventory")),
+    ("game_completed", re.compile(r"^Completed the game")),
+    ("game_reset", re.compile(r"reset", re.IGNORECASE)),
+]
+OTHER_ACTION = "other"
+ACTION_TYPES = [name for name, _ in ACTION_PATTERNS] + [OTHER_ACTION]
+
+SCORE_PATTERN = re.compile(r"\(\+(\d+) score\)")
+
+
+def classify_action(action):
+    """
+    Returns (action_type, points) for a logged Action string, e.g.
+    "Defeated Goblin (+50 score)" -> ("enemy_defeated", 50).
+    """
+    action = action or ""
+    match = SCORE_PATTERN.search(action)
+    points = int(match.group(1)) if match else 0
+    for action_type, pattern in ACTION_PATTERNS:
+        if pattern.search(action):
+            return action_type, points
+    return OTHER_ACTION, points
+
+
+def hour_bucket(timestamp):
+    """Start of the hour a row belongs to, as a naive datetime like the stored Timestamp."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+
+
+def aggregate(rows):
+    """
+    Folds ActivityLog row dicts into {(PlayerID, Hour, ActionType): [count, points]}.
+    """
+    buckets = {}
+    for row in rows:
+        action_type, points = classify_action(row["Action"])
+        key = (row["PlayerID"], hour_bucket(row["Timestamp"]), action_type)
+        bucket = buckets.setdefault(key, [0, 0])
+        bucket[0] += 1
+        bucket[1] += points
+    return buckets
+
+
+def upsert_statement(dialect):
+    """INSERT ... that adds to the counters of an existing bucket, for the given dialect."""
+    table = ActivityRollup.__table__
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        return stmt.on_duplicate_key_update(
+            Count=table.c.Count + stmt.inserted.Count,
+            Points=table.c.Points + stmt.inserted.Points
+        )
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.PlayerID, table.c.Hour, table.c.ActionType],
+        set_={
+            "Count": table.c.Count + stmt.excluded.Count,
+            "Points": table.c.Points + stmt.excluded.Points
+        }
+    )
+
+
+def upsert_rollups(session, rows):
+    """
+    Adds a batch of ActivityLog rows to the hourly counters in one
+    statement. Runs in the caller's transaction, so the counters commit or
+    roll back together with the raw rows.
+    """
+    buckets = aggregate(rows)
+    if not buckets:
+        return
+    # Same key order in every batch, so concurrent consumers lock rows in the same order
+    values = [
+        {"PlayerID": player_id, "Hour": hour, "ActionType": action_type, "Count": count, "Points": points}
+        for (player_id, hour, action_type), (count, points) in sorted(buckets.items())
+    ]
+    stmt = upsert_statement(session.get_bind().dialect.name)
+    session.execute(stmt.values(values))
@@ -2,6 +2,7 @@
 import threading
 import logging
 from rabbitmq_consumer import consume_messages
+from partitions import run_maintenance
 from app import app
 
 # Configure logging
@@ -15,5 +16,12 @@ if __name__ == "__main__":
     consumer_thread.daemon = True
     consumer_thread.start()
     
+    # Creates upcoming partitions and applies the retention policy
+    maintenance_thread = threading.Thread(target=run_maintenance, args=(app,), name="partition-maintenance")
+    maintenance_thread.daemon = True
+    maintenance_thread.start()
+
     logger.info("Starting Flask app...")
-    app.run(host="0.0.0.0", port=5013, debug=True)
\ No newline at end of file
+    # No reloader: it would run the app in a second process, away from the
+    # consumer thread that feeds the live log stream
+    app.run(host="0.0.0.0", port=5013, debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
@@ -2,7 +2,10 @@ import os
 import json
 import random
 from flask import Flask, jsonify, request
-from models import db, Enemy
+from models import db, Enemy, EnemyPlacement
+from atomic_services.utilities.catalog import CatalogCache, json_entry
+from atomic_services.utilities.ids import parse_id_list
+from sqlalchemy.exc import IntegrityError
 
 app = Flask(__name__)
 
@@ -14,31 +17,106 @@ DATABASE_URL = os.getenv(
 app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Upper bound on ids accepted by a single multi-get request
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "500"))
+
 db.init_app(app)
 
+# Enemy definitions rarely change after seeding: GET /enemy/<id> is served from memory
+enemy_catalog = CatalogCache("enemies", lambda enemy: json_entry(app, enemy.to_dict()), lambda enemy: enemy.EnemyID)
+enemy_catalog.watch(db.session, Enemy)
+
 with app.app_context():
     db.create_all()
+    enemy_catalog.warm(Enemy.query.all())
 
 # Get enemy by ID
 
 
 @app.route("/enemy/<int:enemy_id>", methods=["GET"])
 def get_enemy(enemy_id):
-    enemy = Enemy.query.get(enemy_id)
-    if enemy:
-        return jsonify(enemy.to_dict()), 200
+    entry = enemy_catalog.get(enemy_id, lambda key: db.session.get(Enemy, key))
+    if entry:
+        return app.response_class(entry[1], status=200, mimetype="application/json")
     return jsonify({"error": "Enemy not found"}), 404
 
+# Get all enemies, or several enemies by ID (?ids=1,2,3)
+
+
+@app.route("/enemies", methods=["GET"])
+def get_enemies():
+    raw_ids = request.args.getlist("ids")
+    if not raw_ids:
+        enemies = Enemy.query.all()
+        return jsonify({
+            "enemies": [enemy.to_dict() for enemy in enemies]
+        }), 200
+
+    try:
+        enemy_ids = parse_id_list(raw_ids)
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+
+    if len(enemy_ids) > MAX_BATCH_IDS:
+        return jsonify({"error": f"At most {MAX_BATCH_IDS} ids can be requested at once"}), 400
+
+    # Cached enemies, plus one IN (...) query for any that aren't; rows go back in request order
+    found = enemy_catalog.get_many(
+        enemy_ids, lambda missing: Enemy.query.filter(Enemy.EnemyID.in_(missing)).all()
+    ) if enemy_ids else {}
+
+    return jsonify({
+        "enemies": [found[enemy_id][0] for enemy_id in enemy_ids if enemy_id in found],
+        "missing": [enemy_id for enemy_id in enemy_ids if enemy_id not in found]
+    }), 200
+
 # Get enemies by room (using the EnemyIDs from Room table)
 
 
 @app.route("/enemy/room/<int:room_id>", methods=["GET"])
 def get_enemies_by_room(room_id):
-    # This would typically involve a call to the room service to get EnemyIDs
-    # For now, we'll just return all enemies
-    enemies = Enemy.query.all()
+    # Single indexed lookup on EnemyPlacement (RoomID is the leading PK column)
+    enemies = Enemy.query.join(
+        EnemyPlacement, EnemyPlacement.EnemyID == Enemy.EnemyID
+    ).filter(
+        EnemyPlacement.RoomID == room_id
+    ).order_by(EnemyPlacement.Position).all()
     return jsonify([enemy.to_dict() for enemy in enemies]), 200
 
+# Replace the enemy placements of a room (called by the room service)
+
+
+@app.route("/enemy/room/<int:room_id>/placements", methods=["PUT"])
+def set_room_placements(room_id):
+    data = request.get_json()
+    if not data or not isinstance(data.get("enemy_ids"), list):
+        return jsonify({"error": "enemy_ids must be a list"}), 400
+
+    try:
+        enemy_ids = list(dict.fromkeys(int(enemy_id) for enemy_id in data["enemy_ids"]))
+    except (ValueError, TypeError):
+        return jsonify({"error": "enemy_ids must be integers"}), 400
+
+    # Two syncs for the same room can race; the loser retries once
+    for attempt in range(2):
+        try:
+            EnemyPlacement.query.filter_by(RoomID=room_id).delete()
+            db.session.add_all([
+                EnemyPlacement(RoomID=room_id, EnemyID=enemy_id, Position=position)
+                for position, enemy_id in enumerate(enemy_ids)
+            ])
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == 1:
+                return jsonify({"error": "Concurrent placement update, please retry"}), 409
+
+    return jsonify({
+        "room_id": room_id,
+        "enemy_ids": enemy_ids
+    }), 200
+
 # Enemy attack
 
 
@@ -113,6 +191,13 @@ def create_enemy():
 
     return jsonify(new_enemy.to_dict()), 201
 
+# Catalog cache counters
+
+
+@app.route("/metrics/catalog", methods=["GET"])
+def catalog_metrics():
+    return jsonify(enemy_catalog.stats()), 200
+
 
 if __name__ == "__main__":
     with app.app_context():
@@ -23,4 +23,23 @@ class Enemy(db.Model):
             'damage': self.Damage,
             'attack': self.Attack,
             'loot': self.Loot
-        } 
\ No newline at end of file
+        } 
+
+class EnemyPlacement(db.Model):
+    """
+    Room -> enemy index. Mirrors Room.EnemyIDs from the room service so
+    enemies for a room can be found with one indexed lookup.
+    """
+    __tablename__ = 'EnemyPlacement'
+
+    RoomID = db.Column(db.Integer, primary_key=True)
+    EnemyID = db.Column(db.Integer, primary_key=True, index=True)
+    # Position of the enemy in the room's EnemyIDs list
+    Position = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'room_id': self.RoomID,
+            'enemy_id': self.EnemyID,
+            'position': self.Position
+        }
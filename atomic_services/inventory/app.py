@@ -1,8 +1,12 @@
 # atomic_services\inventory\app.py
 import os
+import time
 import logging
+import threading
+import requests
 from flask import Flask, jsonify, request
-from models import db, Inventory
+from models import db, Inventory, ItemHeld
+from atomic_services.utilities.ids import parse_id_list
 
 app = Flask(__name__)
 
@@ -20,10 +24,80 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db.init_app(app)
 
+
+def backfill_items_held():
+    """Seeds ItemHeld from the current inventories when it is empty (first start)."""
+    if db.session.query(ItemHeld.PlayerID).first():
+        return
+    rows = Inventory.query.all()
+    for row in rows:
+        db.session.add(ItemHeld(PlayerID=row.PlayerID, ItemID=row.ItemID))
+    db.session.commit()
+    if rows:
+        logger.info(f"Backfilled {len(rows)} held items from inventories")
+
+
+# Pickup history in the interaction service also counts as "held" (see sync_items_held)
+PLAYER_ROOM_INTERACTION_SERVICE_URL = os.getenv(
+    "PLAYER_ROOM_INTERACTION_SERVICE_URL", "http://player_room_interaction_service:5040"
+)
+ITEMS_HELD_SYNC_ATTEMPTS = int(os.getenv("ITEMS_HELD_SYNC_ATTEMPTS", "10"))
+interaction_service = requests.Session()
+
+
+def sync_items_held():
+    """
+    Adds an ItemHeld row for every item the interaction service has
+    recorded a player picking up, so items picked up before ItemHeld
+    existed and since used or dropped still count. Pages through
+    GET /items/picked; only missing rows are inserted, so it is safe to
+    repeat. Returns how many rows were added.
+    """
+    added = 0
+    after = None
+    while True:
+        params = {"after": after} if after else {}
+        response = interaction_service.get(f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/items/picked",
+                                           params=params, timeout=(2, 30))
+        response.raise_for_status()
+        page = response.json()
+        pairs = {(pair["player_id"], pair["item_id"]) for pair in page["pairs"]}
+        if pairs:
+            existing = set(db.session.execute(
+                db.select(ItemHeld.PlayerID, ItemHeld.ItemID).where(
+                    ItemHeld.PlayerID.in_({player_id for player_id, _ in pairs}))
+            ).all())
+            for player_id, item_id in sorted(pairs - existing):
+                db.session.add(ItemHeld(PlayerID=player_id, ItemID=item_id))
+                added += 1
+            db.session.commit()
+        after = page.get("next")
+        if not after:
+            return added
+
+
+def sync_items_held_in_background():
+    """Startup sync; retries with backoff while the interaction service comes up."""
+    delay = 1.0
+    for attempt in range(ITEMS_HELD_SYNC_ATTEMPTS):
+        try:
+            with app.app_context():
+                added = sync_items_held()
+            logger.info(f"Synced held items from pickup history ({added} added)")
+            return
+        except Exception as e:
+            logger.warning(f"Held item sync failed (attempt {attempt + 1}): {str(e)}")
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+    logger.error("Gave up syncing held items from pickup history; POST /inventory/held/sync to retry")
+
+
 with app.app_context():
     db.create_all()
+    backfill_items_held()
     logger.info("Database tables initialized")
 
+
 # ✅ API to Add an Item to Inventory - Using URL parameters instead of JSON body
 
 
@@ -51,6 +125,9 @@ def add_to_inventory(player_id, item_id):
     )
 
     db.session.add(inventory_item)
+    # Remember the item was held, even after it leaves the inventory
+    if not db.session.get(ItemHeld, (player_id, item_id)):
+        db.session.add(ItemHeld(PlayerID=player_id, ItemID=item_id))
     db.session.commit()
     logger.info(f"Added item {item_id} to player {player_id}'s inventory")
 
@@ -136,9 +213,12 @@ def check_item(player_id, item_id):
 @app.route("/inventory/player/<int:player_id>", methods=["DELETE"])
 def clear_inventory(player_id):
     logger.debug(f"Clearing inventory for player {player_id}")
-    items = Inventory.query.filter_by(PlayerID=player_id).all()
+    # A cleared inventory is a new game, so the held-item history goes too
+    items_count = db.session.execute(db.delete(Inventory).where(Inventory.PlayerID == player_id)).rowcount
+    db.session.execute(db.delete(ItemHeld).where(ItemHeld.PlayerID == player_id))
+    db.session.commit()
 
-    if not items:
+    if not items_count:
         logger.info(f"Inventory already empty for player {player_id}")
         return jsonify({
             "message": "Inventory already empty",
@@ -146,11 +226,6 @@ def clear_inventory(player_id):
             "items_removed": 0
         }), 200
 
-    items_count = len(items)
-    for item in items:
-        db.session.delete(item)
-
-    db.session.commit()
     logger.info(
         f"Cleared {items_count} items from player {player_id}'s inventory")
 
@@ -160,6 +235,42 @@ def clear_inventory(player_id):
         "items_removed": items_count
     }), 200
 
+# ✅ API to Re-sync Held Items from the Interaction Service's Pickup History
+
+
+@app.route("/inventory/held/sync", methods=["POST"])
+def sync_held():
+    try:
+        added = sync_items_held()
+    except Exception as e:
+        logger.error(f"Held item sync failed: {str(e)}")
+        return jsonify({"error": f"Sync failed: {str(e)}"}), 502
+    return jsonify({"message": "Held items synced", "added": added}), 200
+
+# ✅ API to Check Which Items a Player Has Ever Held (?ids=5,6)
+
+
+@app.route("/inventory/player/<int:player_id>/held", methods=["GET"])
+def items_held(player_id):
+    try:
+        item_ids = parse_id_list(request.args.getlist("ids"))
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    if not item_ids:
+        return jsonify({"error": "ids is required"}), 400
+
+    held = set(db.session.execute(
+        db.select(ItemHeld.ItemID).where(ItemHeld.PlayerID == player_id, ItemHeld.ItemID.in_(item_ids))
+    ).scalars())
+    logger.debug(f"Player {player_id} has held {sorted(held)} of {item_ids}")
+
+    return jsonify({
+        "player_id": player_id,
+        "held": [item_id for item_id in item_ids if item_id in held],
+        "missing": [item_id for item_id in item_ids if item_id not in held],
+        "has_all": len(held) == len(item_ids)
+    }), 200
+
 # ✅ API to Get All Inventories (admin endpoint)
 
 
@@ -179,4 +290,6 @@ if __name__ == "__main__":
     with app.app_context():
         db.create_all()
         logger.info("Database tables created on startup")
+    # Seeds ItemHeld from pickup history without delaying startup
+    threading.Thread(target=sync_items_held_in_background, name="items-held-sync", daemon=True).start()
     app.run(host="0.0.0.0", port=5001, debug=True)
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
 
 db = SQLAlchemy()
 
@@ -12,4 +13,16 @@ class Inventory(db.Model):
         return {
             "player_id": self.PlayerID,
             "item_id": self.ItemID
-        } 
\ No newline at end of file
+        } 
+
+class ItemHeld(db.Model):
+    """
+    Every item a player has ever held. Rows are added with the inventory
+    entry and kept when the item leaves the inventory (used or dropped), so
+    "has the player held item X" is a primary key lookup.
+    """
+    __tablename__ = 'ItemHeld'
+
+    PlayerID = db.Column(db.Integer, primary_key=True)
+    ItemID = db.Column(db.Integer, primary_key=True)
+    FirstHeldAt = db.Column(db.DateTime, default=datetime.utcnow)
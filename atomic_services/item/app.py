@@ -1,6 +1,8 @@
 import os
 from flask import Flask, jsonify, request
 from models import db, Item
+from atomic_services.utilities.catalog import CatalogCache, json_entry
+from atomic_services.utilities.ids import parse_id_list
 
 app = Flask(__name__)
 
@@ -12,11 +14,19 @@ DATABASE_URL = os.getenv(
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Upper bound on ids accepted by a single multi-get request
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "500"))
+
 db.init_app(app)
 
+# Items rarely change after seeding: GET /item/<id> is served from memory
+item_catalog = CatalogCache("items", lambda item: json_entry(app, item.to_dict()), lambda item: item.ItemID)
+item_catalog.watch(db.session, Item)
+
 # ✅ Initialize tables
 with app.app_context():
     db.create_all()
+    item_catalog.warm(Item.query.all())
 
 # ✅ API to Create an Item
 
@@ -67,22 +77,46 @@ def create_item():
 
 @app.route("/item/<int:item_id>", methods=["GET"])
 def get_item(item_id):
-    item = Item.query.get(item_id)
-    if not item:
+    entry = item_catalog.get(item_id, lambda key: db.session.get(Item, key))
+    if entry is None:
         return jsonify({
             "error": "Item not found"
         }), 404
 
-    return jsonify(item.to_dict()), 200
+    return app.response_class(entry[1], status=200, mimetype="application/json")
 
-# ✅ API to Fetch All Items
+# ✅ API to Fetch All Items, or several items by ID (?ids=1,2,3)
 
 
 @app.route("/items", methods=["GET"])
 def get_all_items():
-    items = Item.query.all()
+    raw_ids = request.args.getlist("ids")
+    if not raw_ids:
+        items = Item.query.all()
+        return jsonify({
+            "items": [item.to_dict() for item in items]
+        }), 200
+
+    try:
+        item_ids = parse_id_list(raw_ids)
+    except ValueError:
+        return jsonify({
+            "error": "ids must be a comma-separated list of integers"
+        }), 400
+
+    if len(item_ids) > MAX_BATCH_IDS:
+        return jsonify({
+            "error": f"At most {MAX_BATCH_IDS} ids can be requested at once"
+        }), 400
+
+    # Cached items, plus one IN (...) query for any that aren't; rows go back in request order
+    found = item_catalog.get_many(
+        item_ids, lambda missing: Item.query.filter(Item.ItemID.in_(missing)).all()
+    ) if item_ids else {}
+
     return jsonify({
-        "items": [item.to_dict() for item in items]
+        "items": [found[item_id][0] for item_id in item_ids if item_id in found],
+        "missing": [item_id for item_id in item_ids if item_id not in found]
     }), 200
 
 # ✅ API to Update an Item
@@ -145,6 +179,13 @@ def delete_item(item_id):
         "deleted_item": item.to_dict()
     }), 200
 
+# ✅ Catalog cache counters
+
+
+@app.route("/metrics/catalog", methods=["GET"])
+def catalog_metrics():
+    return jsonify(item_catalog.stats()), 200
+
 
 if __name__ == "__main__":
     with app.app_context():
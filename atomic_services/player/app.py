@@ -1,6 +1,8 @@
 import os
 from flask import Flask, jsonify, request
 from models import db, Player
+from leaderboard import leaderboard
+from classes import CLASS_STATS
 
 app = Flask(__name__)
 
@@ -14,8 +16,14 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
 
+# Leaderboard page limits
+DEFAULT_LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = int(os.getenv("MAX_LEADERBOARD_SIZE", "100"))
+
 with app.app_context():
     db.create_all()
+    # ✅ Load the leaderboard once; every score change after this updates it in place
+    leaderboard.rebuild(db.session.query(Player.PlayerID, Player.Name, Player.sum_score).all())
 
 # ✅ Create new player
 
@@ -32,7 +40,7 @@ def create_player():
         }), 400
 
     # Validate character class
-    valid_classes = ['Warrior', 'Rogue','Cleric', 'Ranger']
+    valid_classes = list(CLASS_STATS)
     if data['character_class'] not in valid_classes:
         return jsonify({
             "error": "Invalid character class",
@@ -47,19 +55,8 @@ def create_player():
         }), 409
 
     # Set class-specific stats
-
-    if data['character_class'] == 'Warrior':
-        max_health = 200
-        damage = 10
-    elif data['character_class'] == 'Rogue':
-        max_health = 150
-        damage = 20
-    elif data['character_class'] == 'Cleric':
-        max_health = 175
-        damage = 15
-    else:  # Ranger
-        max_health = 160
-        damage = 18
+    max_health = CLASS_STATS[data['character_class']]["max_health"]
+    damage = CLASS_STATS[data['character_class']]["damage"]
 
     print(f"Creating new player with RoomID=0")  # Add logging
     new_player = Player(
@@ -73,6 +70,7 @@ def create_player():
 
     db.session.add(new_player)
     db.session.commit()
+    leaderboard.update(new_player.PlayerID, new_player.sum_score or 0, new_player.Name)
 
     player_dict = new_player.to_dict()
     print(f"Player created: {player_dict}")  # Add logging
@@ -117,7 +115,7 @@ def update_player(player_id):
         player.Name = data['name']
 
     if "character_class" in data:
-        valid_classes = ['Warrior', 'Rogue', 'Cleric', 'Ranger']
+        valid_classes = list(CLASS_STATS)
         if data['character_class'] not in valid_classes:
             return jsonify({
                 "error": "Invalid character class",
@@ -143,6 +141,7 @@ def update_player(player_id):
 
 
     db.session.commit()
+    leaderboard.update(player.PlayerID, player.sum_score, player.Name)
 
     return jsonify({
         "message": "Player updated successfully",
@@ -162,6 +161,7 @@ def delete_player(player_id):
 
     db.session.delete(player)
     db.session.commit()
+    leaderboard.remove(player_id)
 
     return jsonify({
         "message": "Player deleted successfully",
@@ -189,6 +189,143 @@ def get_player_by_name(player_name):
 
     return jsonify(player.to_dict()), 200
 
+# Stats that take signed deltas, and stats that can be set outright
+DELTA_STATS = {"current_health", "max_health", "damage", "sum_score"}
+SET_STATS = {"current_health", "max_health", "damage", "sum_score", "room_id"}
+STAT_ALIASES = {"health": "current_health", "attack": "damage", "points": "sum_score"}
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def clamp(expr, low=None, high=None):
+    """CASE expression keeping `expr` within [low, high]."""
+    whens = []
+    if low is not None:
+        whens.append((expr < low, low))
+    if high is not None:
+        whens.append((expr > high, high))
+    if not whens:
+        return expr
+    return db.case(*whens, else_=expr)
+
+def stat_changes(data):
+    """
+    Turns a stats request into ordered (column, expression) pairs for one
+    UPDATE. Top-level fields are signed deltas, "set" holds absolute
+    values and "restore_health" fills health up to MaxHealth. Every
+    expression reads only the row's old values, so the result is the same
+    whatever order the database applies them in. Raises ValueError.
+    """
+    set_values = data.get("set") or {}
+    deltas = {STAT_ALIASES.get(k, k): v for k, v in data.items() if k not in ("set", "restore_health", "player_id")}
+    set_values = {STAT_ALIASES.get(k, k): v for k, v in set_values.items()}
+    for name, value in deltas.items():
+        if name not in DELTA_STATS:
+            raise ValueError(f"Unknown stat: {name}")
+        if not is_int(value):
+            raise ValueError(f"{name} must be an integer")
+    for name, value in set_values.items():
+        if name not in SET_STATS:
+            raise ValueError(f"Unknown stat: {name}")
+        if not is_int(value):
+            raise ValueError(f"{name} must be an integer")
+    restore_health = bool(data.get("restore_health"))
+    if not deltas and not set_values and not restore_health:
+        raise ValueError("No stat changes provided")
+
+    def changed(name, column, low=None, high=None):
+        base = set_values[name] if name in set_values else column
+        return clamp(base + deltas.get(name, 0), low, high)
+
+    max_health = changed("max_health", Player.MaxHealth, low=1)
+    changes = []
+    # Health first: MySQL applies SET left to right, so it must see the old MaxHealth
+    if restore_health:
+        changes.append((Player.CurrentHealth, max_health))
+    elif "current_health" in deltas or "current_health" in set_values or "max_health" in deltas or "max_health" in set_values:
+        changes.append((Player.CurrentHealth, changed("current_health", Player.CurrentHealth, low=0, high=max_health)))
+    if "max_health" in deltas or "max_health" in set_values:
+        changes.append((Player.MaxHealth, max_health))
+    if "damage" in deltas or "damage" in set_values:
+        changes.append((Player.Damage, changed("damage", Player.Damage, low=0)))
+    if "sum_score" in deltas or "sum_score" in set_values:
+        # Not clamped: a score can go negative, as it always could
+        changes.append((Player.sum_score, changed("sum_score", Player.sum_score)))
+    if "room_id" in set_values:
+        changes.append((Player.RoomID, set_values["room_id"]))
+    return changes
+
+def apply_stats(player_id, changes):
+    """
+    Applies stat_changes() to one player with a single UPDATE and returns
+    the refreshed Player, or None if there is no such player. The caller
+    commits.
+    """
+    result = db.session.execute(
+        db.update(Player).where(Player.PlayerID == player_id).ordered_values(*changes)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return None
+    return db.session.get(Player, player_id, populate_existing=True)
+
+# ✅ Apply signed stat deltas in one UPDATE (health is clamped to 0..MaxHealth)
+@app.route('/player/<int:player_id>/stats', methods=['PATCH'])
+def update_player_stats(player_id):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "No data provided"}), 400
+    try:
+        changes = stat_changes(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    player = apply_stats(player_id, changes)
+    if player is None:
+        db.session.rollback()
+        return jsonify({"error": "Player not found"}), 404
+    db.session.commit()
+    leaderboard.update(player.PlayerID, player.sum_score)
+
+    return jsonify({
+        "message": "Player stats updated",
+        "player": player.to_dict()
+    }), 200
+
+# ✅ Apply stat deltas to several players in one transaction
+@app.route('/players/stats', methods=['PATCH'])
+def update_players_stats():
+    data = request.get_json(silent=True) or {}
+    updates = data.get("updates")
+    if not isinstance(updates, list) or not updates:
+        return jsonify({"error": "updates must be a non-empty list"}), 400
+    try:
+        planned = []
+        for update in updates:
+            if not isinstance(update, dict) or not is_int(update.get("player_id")):
+                raise ValueError("Each update needs an integer player_id")
+            planned.append((update["player_id"], stat_changes(update)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    players = []
+    not_found = []
+    # Same lock order in every batch
+    for player_id, changes in sorted(planned, key=lambda p: p[0]):
+        player = apply_stats(player_id, changes)
+        if player is None:
+            not_found.append(player_id)
+        else:
+            players.append(player)
+    db.session.commit()
+    for player in players:
+        leaderboard.update(player.PlayerID, player.sum_score)
+
+    return jsonify({
+        "players": [player.to_dict() for player in players],
+        "not_found": not_found
+    }), 200
+
 # ✅ Patch sum_score for player
 @app.route('/player/<int:player_id>/score', methods=['PATCH'])
 def update_player_score(player_id):
@@ -197,19 +334,42 @@ def update_player_score(player_id):
 
     if points == 0:
         return jsonify({"error": "No points provided"}), 400
+    if not is_int(points):
+        return jsonify({"error": "points must be an integer"}), 400
 
-    player = Player.query.get(player_id)
-    if not player:
+    # Added in the database, so concurrent patches can't overwrite each other
+    player = apply_stats(player_id, stat_changes({"sum_score": points}))
+    if player is None:
+        db.session.rollback()
         return jsonify({"error": "Player not found"}), 404
-
-    player.sum_score += points
     db.session.commit()
+    leaderboard.update(player.PlayerID, player.sum_score)
 
     return jsonify({
         "message": f"Score updated by {points}",
         "new_sum_score": player.sum_score
     }), 200
 
+# ✅ Top players by sum_score (?limit=, ?offset=), served from memory
+@app.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    limit = max(1, min(request.args.get('limit', DEFAULT_LEADERBOARD_SIZE, type=int), MAX_LEADERBOARD_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    return jsonify({
+        "leaderboard": leaderboard.top(limit, offset),
+        "total_players": len(leaderboard)
+    }), 200
+
+# ✅ A player's rank (?around=N adds N players either side)
+@app.route('/leaderboard/rank/<int:player_id>', methods=['GET'])
+def get_leaderboard_rank(player_id):
+    around = max(0, min(request.args.get('around', 0, type=int), MAX_LEADERBOARD_SIZE))
+    entry = leaderboard.rank(player_id, around)
+    if entry is None:
+        return jsonify({"error": "Player not found"}), 404
+    entry["total_players"] = len(leaderboard)
+    return jsonify(entry), 200
+
 
 if __name__ == "__main__":
     with app.app_context():
@@ -0,0 +1,9 @@
+# atomic_services/player/classes.py
+
+# Starting stats of each character class (also read by simulation/combat_balance.py)
+CLASS_STATS = {
+    "Warrior": {"max_health": 200, "damage": 10},
+    "Rogue": {"max_health": 150, "damage": 20},
+    "Cleric": {"max_health": 175, "damage": 15},
+    "Ranger": {"max_health": 160, "damage": 18},
+}
@@ -0,0 +1,198 @@
+# atomic_services/player/leaderboard.py
+import random
+import threading
+
+MAX_LEVELS = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, height):
+        self.key = key
+        self.next = [None] * height
+        # Bottom-level steps from this node to next[level]
+        self.width = [1] * height
+
+
+class IndexableSkipList:
+    """
+    Sorted collection of unique keys with O(log n) expected insert, remove,
+    rank (bisect_left) and positional lookup. Each link records how many
+    bottom-level nodes it skips, so positions are counted on the way down.
+    """
+
+    def __init__(self, keys=()):
+        self._head = _Node(None, MAX_LEVELS)
+        self._levels = 1
+        self._size = 0
+        for key in sorted(keys):
+            self.insert(key)
+
+    def __len__(self):
+        return self._size
+
+    def _path(self, key):
+        """
+        For each level in use, the last node before `key` and its position
+        (the head is position 0, the first key position 1).
+        """
+        update = [self._head] * MAX_LEVELS
+        positions = [0] * MAX_LEVELS
+        node, position = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            update[level] = node
+            positions[level] = position
+        return update, positions
+
+    def insert(self, key):
+        update, positions = self._path(key)
+        height = 1
+        while height < MAX_LEVELS and random.random() < 0.5:
+            height += 1
+        node = _Node(key, height)
+        node_position = positions[0] + 1
+        for level in range(height):
+            previous = update[level]
+            if previous.next[level] is not None:
+                node.width[level] = previous.width[level] - (node_position - positions[level]) + 1
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            previous.width[level] = node_position - positions[level]
+        # Higher links that now jump over the new node
+        for level in range(height, self._levels):
+            if update[level].next[level] is not None:
+                update[level].width[level] += 1
+        self._levels = max(self._levels, height)
+        self._size += 1
+
+    def remove(self, key):
+        """Removes `key`. Returns False if it isn't there."""
+        update, _ = self._path(key)
+        node = update[0].next[0]
+        if node is None or node.key != key:
+            return False
+        for level in range(self._levels):
+            previous = update[level]
+            if previous.next[level] is node:
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            elif previous.next[level] is not None:
+                previous.width[level] -= 1
+        self._size -= 1
+        return True
+
+    def bisect_left(self, key):
+        """Number of keys smaller than `key`."""
+        _, positions = self._path(key)
+        return positions[0]
+
+    def slice(self, start, stop):
+        """Keys at positions [start, stop), in order."""
+        start, stop = max(0, start), min(stop, self._size)
+        if start >= stop:
+            return []
+        # Walk down to the node at position `start` (0-based), then along the bottom level
+        node, position = self._head, 0
+        for level in range(self._levels - 1, -1, -1):
+            while node.next[level] is not None and position + node.width[level] <= start:
+                position += node.width[level]
+                node = node.next[level]
+        keys = []
+        node = node.next[0]
+        while node is not None and len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """
+    In-memory ranking of players by sum_score.
+
+    Keeps (-score, player_id) keys in an indexable skip list, so the best
+    score is first and ties are broken by the older player. A score change,
+    a rank lookup and finding the start of a top-K page are all O(log n)
+    expected. Rebuilt from the Player table at startup and kept current by
+    every write that changes a player's score, name or existence.
+    """
+
+    def __init__(self):
+        self._keys = IndexableSkipList()
+        self._players = {}  # player_id -> (score, name)
+        self._lock = threading.Lock()
+
+    def rebuild(self, rows):
+        """Replaces the ranking with (player_id, name, score) rows."""
+        players = {player_id: (score or 0, name) for player_id, name, score in rows}
+        keys = IndexableSkipList((-score, player_id) for player_id, (score, _) in players.items())
+        with self._lock:
+            self._players = players
+            self._keys = keys
+
+    def _remove_key(self, player_id):
+        """Caller holds the lock."""
+        score, _ = self._players[player_id]
+        self._keys.remove((-score, player_id))
+
+    def update(self, player_id, score, name=None):
+        """Records a player's current score (and name, if given)."""
+        with self._lock:
+            if player_id in self._players:
+                old_score, old_name = self._players[player_id]
+                name = name if name is not None else old_name
+                if old_score == score:
+                    self._players[player_id] = (score, name)
+                    return
+                self._remove_key(player_id)
+            self._keys.insert((-score, player_id))
+            self._players[player_id] = (score, name)
+
+    def remove(self, player_id):
+        with self._lock:
+            if player_id in self._players:
+                self._remove_key(player_id)
+                del self._players[player_id]
+
+    def _entry(self, key):
+        """Caller holds the lock."""
+        score, player_id = key
+        # Players on the same score share the rank of the first of them
+        rank = self._keys.bisect_left((score,)) + 1
+        return {
+            "rank": rank,
+            "player_id": player_id,
+            "name": self._players[player_id][1],
+            "sum_score": -score
+        }
+
+    def top(self, limit=10, offset=0):
+        with self._lock:
+            return [self._entry(key) for key in self._keys.slice(offset, offset + limit)]
+
+    def rank(self, player_id, around=0):
+        """
+        The player's entry, plus `around` players either side of them.
+        Returns None if the player is unknown.
+        """
+        with self._lock:
+            if player_id not in self._players:
+                return None
+            score, _ = self._players[player_id]
+            key = (-score, player_id)
+            entry = self._entry(key)
+            if around:
+                index = self._keys.bisect_left(key)
+                keys = self._keys.slice(index - around, index + around + 1)
+                entry["neighbours"] = [self._entry(neighbour) for neighbour in keys]
+            return entry
+
+    def __len__(self):
+        return len(self._keys)
+
+
+# One leaderboard per process, shared by every request
+leaderboard = Leaderboard()
@@ -1,6 +1,11 @@
 import os
+import json
+from datetime import datetime
 from flask import Flask, jsonify, request
-from models import db, PlayerRoomInteraction
+from sqlalchemy import inspect, text
+from models import db, PlayerRoomInteraction, PickedItem, DefeatedEnemy
+from events import events
+from atomic_services.utilities.ids import parse_id_list
 import logging
 
 app = Flask(__name__)
@@ -19,25 +24,154 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
 
+
+def migrate_json_interactions():
+    """
+    Copies the item and enemy ids of tables created before picked_items and
+    defeated_enemies existed (JSON arrays in items_picked/enemies_defeated)
+    into the child tables. Runs only while the child tables are empty.
+    """
+    columns = {column["name"] for column in inspect(db.engine).get_columns(PlayerRoomInteraction.__tablename__)}
+    if "items_picked" not in columns:
+        return
+    if db.session.query(PickedItem.player_id).first() or db.session.query(DefeatedEnemy.player_id).first():
+        return
+    rows = db.session.execute(text(
+        f"SELECT player_id, room_id, items_picked, enemies_defeated FROM {PlayerRoomInteraction.__tablename__}"
+    )).all()
+    picked, defeated = 0, 0
+    for player_id, room_id, items_picked, enemies_defeated in rows:
+        for item_id in set(json.loads(items_picked or "[]")):
+            db.session.add(PickedItem(player_id=player_id, room_id=room_id, item_id=item_id))
+            picked += 1
+        for enemy_id in set(json.loads(enemies_defeated or "[]")):
+            db.session.add(DefeatedEnemy(player_id=player_id, room_id=room_id, enemy_id=enemy_id))
+            defeated += 1
+    db.session.commit()
+    if picked or defeated:
+        logger.info(f"Migrated {picked} picked items and {defeated} defeated enemies out of the JSON columns")
+
+
 with app.app_context():
     db.create_all()
+    migrate_json_interactions()
 
-# Helper function to get or create a player-room interaction
-def get_or_create_interaction(player_id, room_id):
-    """Get or create a player-room interaction record."""
-    interaction = PlayerRoomInteraction.query.filter_by(
-        player_id=player_id, room_id=room_id
-    ).first()
-    
-    if not interaction:
-        interaction = PlayerRoomInteraction(
-            player_id=player_id,
-            room_id=room_id
+
+# Largest page of GET /items/picked
+PICKED_PAGE_SIZE = int(os.getenv("PICKED_PAGE_SIZE", "5000"))
+
+
+def ids_by_room(id_column, player_id=None, room_id=None, ids=None):
+    """
+    {(player_id, room_id): [ids]} from picked_items or defeated_enemies
+    (picked by `id_column`) in one indexed query, oldest first.
+    """
+    model = id_column.class_
+    query = db.select(model.player_id, model.room_id, id_column)
+    if player_id is not None:
+        query = query.where(model.player_id == player_id)
+    if room_id is not None:
+        query = query.where(model.room_id == room_id)
+    if ids is not None:
+        query = query.where(id_column.in_(ids))
+    timestamp = model.picked_at if model is PickedItem else model.defeated_at
+    grouped = {}
+    for row_player, row_room, value in db.session.execute(query.order_by(timestamp, id_column)):
+        grouped.setdefault((row_player, row_room), []).append(value)
+    return grouped
+
+
+def interactions_to_dicts(interactions, player_id=None):
+    """Serializes interaction rows with their ids, using two queries in total."""
+    items = ids_by_room(PickedItem.item_id, player_id)
+    enemies = ids_by_room(DefeatedEnemy.enemy_id, player_id)
+    return [
+        interaction.to_dict(
+            items.get((interaction.player_id, interaction.room_id), []),
+            enemies.get((interaction.player_id, interaction.room_id), [])
+        )
+        for interaction in interactions
+    ]
+
+
+def requested_ids():
+    """The ?ids= filter, None when absent. Raises ValueError if malformed."""
+    raw_ids = request.args.getlist("ids")
+    return parse_id_list(raw_ids) if raw_ids else None
+
+def dialect_insert(model):
+    """INSERT for the current database dialect (for its upsert clauses)."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model.__table__)
+
+
+def insert_ignore(model):
+    """INSERT that does nothing when the primary key already exists."""
+    stmt = dialect_insert(model)
+    if db.session.get_bind().dialect.name == "mysql":
+        return stmt.prefix_with("IGNORE")
+    return stmt.on_conflict_do_nothing()
+
+
+def touch_interaction(player_id, room_id, now):
+    """Creates the player's interaction row for a room, or bumps its updated_at."""
+    table = PlayerRoomInteraction.__table__
+    stmt = dialect_insert(PlayerRoomInteraction).values(
+        player_id=player_id, room_id=room_id, created_at=now, updated_at=now)
+    if db.session.get_bind().dialect.name == "mysql":
+        stmt = stmt.on_duplicate_key_update(updated_at=stmt.inserted.updated_at)
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.player_id, table.c.room_id],
+            set_={"updated_at": stmt.excluded.updated_at}
         )
-        db.session.add(interaction)
+    db.session.execute(stmt)
+
+
+def record(id_column, player_id, room_id, ids):
+    """
+    Records picked items or defeated enemies (picked by `id_column`) in one
+    transaction, without reading first: each id is an INSERT that is
+    ignored if the row already exists, so concurrent requests for the same
+    id can't both insert it or fail on a duplicate. Returns the ids that
+    were new.
+    """
+    model = id_column.class_
+    timestamp = "picked_at" if model is PickedItem else "defeated_at"
+    now = datetime.utcnow()
+    recorded = []
+    try:
+        # Sorted, so concurrent batches take row locks in the same order
+        for value in sorted(ids):
+            result = db.session.execute(insert_ignore(model).values(
+                player_id=player_id, room_id=room_id, **{id_column.key: value, timestamp: now}))
+            if result.rowcount:
+                recorded.append(value)
+        if recorded:
+            touch_interaction(player_id, room_id, now)
         db.session.commit()
-    
-    return interaction
+    except Exception:
+        db.session.rollback()
+        raise
+    if recorded:
+        # Lets the room service drop its cached view of this room for the player
+        events.publish("item_picked" if model is PickedItem else "enemy_defeated", player_id, room_id, recorded)
+    return recorded
+
+
+def requested_body_ids(field):
+    """A non-empty list of unique ints from the JSON body, or None if invalid."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get(field)
+    if not isinstance(ids, list) or not ids or not all(isinstance(v, int) and not isinstance(v, bool) for v in ids):
+        return None
+    return list(dict.fromkeys(ids))
 
 # API Routes
 
@@ -46,7 +180,7 @@ def get_all_interactions():
     """Get all player-room interactions."""
     interactions = PlayerRoomInteraction.query.all()
     return jsonify({
-        "interactions": [interaction.to_dict() for interaction in interactions]
+        "interactions": interactions_to_dicts(interactions)
     }), 200
 
 @app.route('/player/<int:player_id>/room/<int:room_id>/interactions', methods=['GET'])
@@ -65,7 +199,9 @@ def get_player_room_interaction(player_id, room_id):
             "enemies_defeated": []
         }), 200
     
-    return jsonify(interaction.to_dict()), 200
+    items = ids_by_room(PickedItem.item_id, player_id, room_id).get((player_id, room_id), [])
+    enemies = ids_by_room(DefeatedEnemy.enemy_id, player_id, room_id).get((player_id, room_id), [])
+    return jsonify(interaction.to_dict(items, enemies)), 200
 
 @app.route('/player/<int:player_id>/interactions', methods=['GET'])
 def get_player_interactions(player_id):
@@ -73,16 +209,87 @@ def get_player_interactions(player_id):
     interactions = PlayerRoomInteraction.query.filter_by(player_id=player_id).all()
     return jsonify({
         "player_id": player_id,
-        "interactions": [interaction.to_dict() for interaction in interactions]
+        "interactions": interactions_to_dicts(interactions, player_id)
+    }), 200
+
+# ✅ Set queries: which of these ids (?ids=1,2,3) has the player picked up / defeated.
+# Without ?ids= they return every id.
+
+@app.route('/player/<int:player_id>/room/<int:room_id>/items/picked', methods=['GET'])
+def get_picked_items(player_id, room_id):
+    """Which of the requested items the player has picked up in a room."""
+    try:
+        ids = requested_ids()
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    picked = ids_by_room(PickedItem.item_id, player_id, room_id, ids).get((player_id, room_id), [])
+    return jsonify({
+        "player_id": player_id,
+        "room_id": room_id,
+        "items_picked": picked
+    }), 200
+
+@app.route('/player/<int:player_id>/room/<int:room_id>/enemies/defeated', methods=['GET'])
+def get_defeated_enemies(player_id, room_id):
+    """Which of the requested enemies the player has defeated in a room."""
+    try:
+        ids = requested_ids()
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    defeated = ids_by_room(DefeatedEnemy.enemy_id, player_id, room_id, ids).get((player_id, room_id), [])
+    return jsonify({
+        "player_id": player_id,
+        "room_id": room_id,
+        "enemies_defeated": defeated
+    }), 200
+
+@app.route('/player/<int:player_id>/items/picked', methods=['GET'])
+def get_picked_items_any_room(player_id):
+    """Which of the requested items the player has picked up in any room, and where."""
+    try:
+        ids = requested_ids()
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of integers"}), 400
+    rooms = {}
+    for (_, room_id), item_ids in ids_by_room(PickedItem.item_id, player_id, ids=ids).items():
+        for item_id in item_ids:
+            rooms.setdefault(item_id, room_id)
+    return jsonify({
+        "player_id": player_id,
+        "items_picked": list(rooms),
+        "rooms": {str(item_id): room_id for item_id, room_id in rooms.items()}
+    }), 200
+
+# ✅ Every (player, item) pickup pair, paged by (player_id, item_id): ?after=<player_id>:<item_id>&limit=
+# Used by the inventory service to seed its "ever held" index from pickup history.
+
+@app.route('/items/picked', methods=['GET'])
+def get_all_picked_pairs():
+    limit = request.args.get('limit', default=PICKED_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= PICKED_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {PICKED_PAGE_SIZE}"}), 400
+    query = db.select(PickedItem.player_id, PickedItem.item_id).distinct()
+    after = request.args.get('after')
+    if after:
+        try:
+            after_player, after_item = (int(part) for part in after.split(":"))
+        except ValueError:
+            return jsonify({"error": "after must be <player_id>:<item_id>"}), 400
+        query = query.where(db.or_(
+            PickedItem.player_id > after_player,
+            db.and_(PickedItem.player_id == after_player, PickedItem.item_id > after_item)
+        ))
+    rows = db.session.execute(query.order_by(PickedItem.player_id, PickedItem.item_id).limit(limit)).all()
+    pairs = [{"player_id": player_id, "item_id": item_id} for player_id, item_id in rows]
+    return jsonify({
+        "pairs": pairs,
+        "next": f"{rows[-1][0]}:{rows[-1][1]}" if len(rows) == limit else None
     }), 200
 
 @app.route('/player/<int:player_id>/room/<int:room_id>/item/<int:item_id>/pickup', methods=['POST'])
 def pickup_item(player_id, room_id, item_id):
     """Record that a player has picked up an item in a room."""
-    interaction = get_or_create_interaction(player_id, room_id)
-    
-    # Check if already picked up
-    if interaction.has_picked_item(item_id):
+    if not record(PickedItem.item_id, player_id, room_id, [item_id]):
         return jsonify({
             "message": "Item already picked up",
             "player_id": player_id,
@@ -90,10 +297,6 @@ def pickup_item(player_id, room_id, item_id):
             "item_id": item_id
         }), 200
     
-    # Add the item to picked items
-    interaction.add_picked_item(item_id)
-    db.session.commit()
-    
     logger.debug(f"Player {player_id} picked up item {item_id} in room {room_id}")
     
     return jsonify({
@@ -106,10 +309,7 @@ def pickup_item(player_id, room_id, item_id):
 @app.route('/player/<int:player_id>/room/<int:room_id>/enemy/<int:enemy_id>/defeat', methods=['POST'])
 def defeat_enemy(player_id, room_id, enemy_id):
     """Record that a player has defeated an enemy in a room."""
-    interaction = get_or_create_interaction(player_id, room_id)
-    
-    # Check if already defeated
-    if interaction.has_defeated_enemy(enemy_id):
+    if not record(DefeatedEnemy.enemy_id, player_id, room_id, [enemy_id]):
         return jsonify({
             "message": "Enemy already defeated",
             "player_id": player_id,
@@ -117,10 +317,6 @@ def defeat_enemy(player_id, room_id, enemy_id):
             "enemy_id": enemy_id
         }), 200
     
-    # Add the enemy to defeated enemies
-    interaction.add_defeated_enemy(enemy_id)
-    db.session.commit()
-    
     logger.debug(f"Player {player_id} defeated enemy {enemy_id} in room {room_id}")
     
     return jsonify({
@@ -130,15 +326,51 @@ def defeat_enemy(player_id, room_id, enemy_id):
         "enemy_id": enemy_id
     }), 201
 
+# ✅ Batch variants: {"item_ids": [...]} / {"enemy_ids": [...]}, recorded in one transaction.
+# 201 if anything was new, 200 if everything was already recorded.
+
+@app.route('/player/<int:player_id>/room/<int:room_id>/items/pickup', methods=['POST'])
+def pickup_items(player_id, room_id):
+    """Record that a player has picked up several items in a room."""
+    item_ids = requested_body_ids("item_ids")
+    if item_ids is None:
+        return jsonify({"error": "item_ids must be a non-empty list of integers"}), 400
+    
+    recorded = record(PickedItem.item_id, player_id, room_id, item_ids)
+    logger.debug(f"Player {player_id} picked up items {recorded} in room {room_id}")
+    
+    return jsonify({
+        "player_id": player_id,
+        "room_id": room_id,
+        "recorded": [item_id for item_id in item_ids if item_id in recorded],
+        "already_recorded": [item_id for item_id in item_ids if item_id not in recorded]
+    }), 201 if recorded else 200
+
+@app.route('/player/<int:player_id>/room/<int:room_id>/enemies/defeat', methods=['POST'])
+def defeat_enemies(player_id, room_id):
+    """Record that a player has defeated several enemies in a room."""
+    enemy_ids = requested_body_ids("enemy_ids")
+    if enemy_ids is None:
+        return jsonify({"error": "enemy_ids must be a non-empty list of integers"}), 400
+    
+    recorded = record(DefeatedEnemy.enemy_id, player_id, room_id, enemy_ids)
+    logger.debug(f"Player {player_id} defeated enemies {recorded} in room {room_id}")
+    
+    return jsonify({
+        "player_id": player_id,
+        "room_id": room_id,
+        "recorded": [enemy_id for enemy_id in enemy_ids if enemy_id in recorded],
+        "already_recorded": [enemy_id for enemy_id in enemy_ids if enemy_id not in recorded]
+    }), 201 if recorded else 200
+
 @app.route('/player/<int:player_id>/reset', methods=['POST'])
 def reset_player(player_id):
     """Reset all interactions for a specific player."""
-    interactions = PlayerRoomInteraction.query.filter_by(player_id=player_id).all()
-    
-    for interaction in interactions:
-        db.session.delete(interaction)
+    for model in (PickedItem, DefeatedEnemy, PlayerRoomInteraction):
+        db.session.execute(db.delete(model).where(model.player_id == player_id))
     
     db.session.commit()
+    events.publish("player_reset", player_id)
     
     logger.debug(f"Reset all interactions for player {player_id}")
     
@@ -147,6 +379,11 @@ def reset_player(player_id):
         "player_id": player_id
     }), 200
 
+@app.route('/metrics/events', methods=['GET'])
+def event_metrics():
+    """Interaction event publisher counters."""
+    return jsonify(events.stats()), 200
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
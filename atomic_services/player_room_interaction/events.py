@@ -0,0 +1,94 @@
+# atomic_services/player_room_interaction/events.py
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import pika
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+# Fanout exchange: every subscriber (e.g. the room service's view cache) gets every event
+INTERACTION_EVENTS_EXCHANGE = os.getenv("INTERACTION_EVENTS_EXCHANGE", "player_room_interaction.events")
+EVENT_BUFFER_SIZE = int(os.getenv("INTERACTION_EVENT_BUFFER_SIZE", "10000"))
+RECONNECT_MAX_DELAY = float(os.getenv("INTERACTION_EVENT_RECONNECT_MAX_DELAY", "30"))
+
+
+class InteractionEvents:
+    """
+    Publishes pickup, defeat and reset events from a background thread.
+
+    Requests only put the event on a bounded buffer. The thread keeps one
+    connection to the broker and reconnects with backoff; events queued
+    meanwhile are sent once it is back. Events are notifications for
+    caches, not a record, so when the buffer is full they are dropped and
+    counted, and subscribers bound how long they trust a cached view.
+    """
+
+    def __init__(self, host=RABBITMQ_HOST, exchange=INTERACTION_EVENTS_EXCHANGE, buffer_size=EVENT_BUFFER_SIZE):
+        self.host = host
+        self.exchange = exchange
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._counters = {"published": 0, "dropped": 0, "connects": 0, "connect_failures": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="interaction-events", daemon=True)
+                self._thread.start()
+
+    def publish(self, event_type, player_id, room_id=None, ids=()):
+        """Queues one event; never blocks the caller."""
+        self._ensure_started()
+        event = {"type": event_type, "player_id": player_id, "room_id": room_id, "ids": list(ids)}
+        try:
+            self._buffer.put_nowait(event)
+        except queue.Full:
+            self._count("dropped")
+
+    def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                connection = pika.BlockingConnection(pika.ConnectionParameters(host=self.host, heartbeat=60))
+                channel = connection.channel()
+                channel.exchange_declare(exchange=self.exchange, exchange_type="fanout", durable=True)
+                self._count("connects")
+                delay = 1.0
+                while True:
+                    try:
+                        event = self._buffer.get(timeout=1.0)
+                    except queue.Empty:
+                        connection.process_data_events(time_limit=0)
+                        continue
+                    try:
+                        channel.basic_publish(exchange=self.exchange, routing_key="", body=json.dumps(event))
+                        self._count("published")
+                    except Exception:
+                        self._count("dropped")
+                        raise
+            except Exception as e:
+                self._count("connect_failures")
+                logger.warning(f"Interaction event publisher disconnected: {str(e)}; retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["buffered"] = self._buffer.qsize()
+        return stats
+
+
+# One publisher per process
+events = InteractionEvents()
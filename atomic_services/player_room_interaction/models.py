@@ -1,74 +1,68 @@
 from flask_sqlalchemy import SQLAlchemy
-import json
 from datetime import datetime
 
 db = SQLAlchemy()
 
 class PlayerRoomInteraction(db.Model):
     """
-    Model to track a player's interactions with rooms, including:
-    - Items picked up
-    - Enemies defeated
-    - Other interactions as needed
+    Model to track a player's interactions with rooms. The items picked up
+    and enemies defeated are rows in the picked_items and defeated_enemies
+    tables, keyed by (player_id, room_id, id); this row records when the
+    player first and last interacted with the room.
     """
     __tablename__ = 'player_room_interactions'
-    
+
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, nullable=False, index=True)
     room_id = db.Column(db.Integer, nullable=False, index=True)
-    
-    # Store item IDs and enemy IDs as JSON arrays
-    items_picked = db.Column(db.Text, default='[]')  # JSON array of item IDs
-    enemies_defeated = db.Column(db.Text, default='[]')  # JSON array of enemy IDs
-    
+
     # Timestamp for when this interaction was first recorded
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     # Timestamp for when this interaction was last updated
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
+
     # Add a unique constraint to prevent duplicates
     __table_args__ = (
         db.UniqueConstraint('player_id', 'room_id', name='uix_player_room'),
     )
-    
-    def to_dict(self):
-        """Convert model to dictionary."""
+
+    def to_dict(self, items_picked=(), enemies_defeated=()):
+        """Convert model to dictionary, with the room's picked item and defeated enemy ids."""
         return {
             'id': self.id,
             'player_id': self.player_id,
             'room_id': self.room_id,
-            'items_picked': json.loads(self.items_picked),
-            'enemies_defeated': json.loads(self.enemies_defeated),
+            'items_picked': list(items_picked),
+            'enemies_defeated': list(enemies_defeated),
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
-    
-    def add_picked_item(self, item_id):
-        """Add an item to the list of picked items."""
-        items = json.loads(self.items_picked)
-        if item_id not in items:
-            items.append(item_id)
-            self.items_picked = json.dumps(items)
-            self.updated_at = datetime.utcnow()
-            return True
-        return False
-    
-    def add_defeated_enemy(self, enemy_id):
-        """Add an enemy to the list of defeated enemies."""
-        enemies = json.loads(self.enemies_defeated)
-        if enemy_id not in enemies:
-            enemies.append(enemy_id)
-            self.enemies_defeated = json.dumps(enemies)
-            self.updated_at = datetime.utcnow()
-            return True
-        return False
-    
-    def has_picked_item(self, item_id):
-        """Check if an item has been picked up."""
-        items = json.loads(self.items_picked)
-        return item_id in items
-    
-    def has_defeated_enemy(self, enemy_id):
-        """Check if an enemy has been defeated."""
-        enemies = json.loads(self.enemies_defeated)
-        return enemy_id in enemies 
\ No newline at end of file
+
+
+class PickedItem(db.Model):
+    """One item a player picked up in a room."""
+    __tablename__ = 'picked_items'
+
+    player_id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    picked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # "Has the player picked up item X anywhere" without scanning their rooms
+    __table_args__ = (
+        db.Index('idx_picked_player_item', 'player_id', 'item_id'),
+    )
+
+
+class DefeatedEnemy(db.Model):
+    """One enemy a player defeated in a room."""
+    __tablename__ = 'defeated_enemies'
+
+    player_id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, primary_key=True)
+    enemy_id = db.Column(db.Integer, primary_key=True)
+    defeated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_defeated_player_enemy', 'player_id', 'enemy_id'),
+    )
@@ -1,7 +1,18 @@
 #atomic_services\room\app.py
 import os
+import logging
+import threading
+import requests
 from flask import Flask, jsonify, request
-from models import db, Room
+from sqlalchemy import event
+from models import db, Room, DoorRequirement
+from atomic_services.utilities.catalog import CatalogCache, json_entry
+from room_views import room_views, listen_for_interaction_events
+from placement_sync import placement_sync
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
@@ -13,10 +24,79 @@ DATABASE_URL = os.getenv(
 app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
+# Player interactions back the per-player room views (?player_id=)
+PLAYER_ROOM_INTERACTION_SERVICE_URL = os.getenv(
+    "PLAYER_ROOM_INTERACTION_SERVICE_URL", "http://player_room_interaction_service:5040"
+)
+interaction_service = requests.Session()
+
 db.init_app(app)
 
+# Rooms rarely change after seeding: GET /room/<id> is served from memory
+room_catalog = CatalogCache("rooms", lambda room: json_entry(app, room.to_dict()), lambda room: room.RoomID)
+# A door requirement change is a change to its room
+room_catalog.watch(db.session, (Room, DoorRequirement))
+
+# Door requirements seeded on first start ("room:item,room:item"), matching mysql-init
+DEFAULT_DOOR_REQUIREMENTS = os.getenv("DEFAULT_DOOR_REQUIREMENTS", "3:5")
+
+
+def backfill_door_requirements():
+    """
+    Seeds DoorRequirement from DEFAULT_DOOR_REQUIREMENTS when it is empty,
+    e.g. on a database created before the table existed (mysql-init only
+    runs on a fresh volume). Rooms that don't exist are skipped.
+    """
+    if db.session.query(DoorRequirement.RoomID).first():
+        return
+    added = 0
+    for pair in DEFAULT_DOOR_REQUIREMENTS.split(","):
+        if not pair.strip():
+            continue
+        room_id, item_id = (int(part) for part in pair.split(":"))
+        if db.session.get(Room, room_id):
+            db.session.add(DoorRequirement(RoomID=room_id, ItemID=item_id))
+            added += 1
+    db.session.commit()
+    if added:
+        logger.info(f"Seeded {added} door requirements")
+
+
 with app.app_context():
     db.create_all()
+    backfill_door_requirements()
+    room_catalog.warm(Room.query.all())
+
+
+# Rooms changed by a transaction; their cached player views are dropped once it commits
+@event.listens_for(db.session, "after_flush")
+def collect_changed_rooms(session, flush_context):
+    changed = session.info.setdefault("changed_rooms", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Room, DoorRequirement)) and obj.RoomID is not None:
+            changed.add(obj.RoomID)
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_changed_rooms(session):
+    for room_id in session.info.pop("changed_rooms", ()):
+        room_views.invalidate_room(room_id)
+
+
+@event.listens_for(db.session, "after_rollback")
+def forget_changed_rooms(session):
+    session.info.pop("changed_rooms", None)
+
+def sync_enemy_placements(room_id, enemy_ids):
+    """
+    Queues a room's EnemyIDs for the enemy service's placement index; the
+    sync thread retries until it is accepted. Called after every commit
+    that changes Room.EnemyIDs.
+    """
+    placement_sync.submit(room_id, enemy_ids)
+
+def valid_id_list(value):
+    return isinstance(value, list) and all(isinstance(v, int) and not isinstance(v, bool) for v in value)
 
 # ✅ API to Create a Room
 @app.route("/room", methods=["POST"])
@@ -28,15 +108,23 @@ def create_room():
             "error": "Description is required"
         }), 400
 
+    required_item_ids = data.get('required_item_ids', [])
+    if not valid_id_list(required_item_ids):
+        return jsonify({
+            "error": "required_item_ids must be a list of integers"
+        }), 400
+
     new_room = Room(
         Description=data['description'],
         ItemIDs=data.get('item_ids', []),
         EnemyIDs=data.get('enemy_ids', []),
         DoorLocked=data.get('door_locked', False)
     )
+    new_room.set_required_item_ids(required_item_ids)
     
     db.session.add(new_room)
     db.session.commit()
+    sync_enemy_placements(new_room.RoomID, new_room.EnemyIDs)
 
     return jsonify({
         "message": "Room created successfully",
@@ -46,40 +134,49 @@ def create_room():
 # ✅ API to Get a Room
 @app.route("/room/<int:room_id>", methods=["GET"])
 def get_room(room_id):
-    room = Room.query.get(room_id)
-    if not room:
+    # With ?player_id=, items the player picked up and enemies they defeated are filtered out
+    player_id = request.args.get('player_id', type=int)
+    if player_id is not None:
+        view = room_views.get(player_id, room_id)
+        if view is not None:
+            return jsonify(view), 200
+        # Taken before the interactions are read, so a view made stale meanwhile isn't cached
+        generation = room_views.generation(player_id)
+
+    entry = room_catalog.get(room_id, lambda key: db.session.get(Room, key))
+    if entry is None:
         return jsonify({
             "error": "Room not found"
         }), 404
     
-    # Get the basic room data as a dictionary
-    room_data = room.to_dict()
+    if player_id is None:
+        return app.response_class(entry[1], status=200, mimetype="application/json")
     
-    # Check if player_id is provided as a query parameter
-    player_id = request.args.get('player_id')
+    # The cached room data is shared, so the player's view is a copy
+    room_data = dict(entry[0])
     
-    # If player_id is provided, filter items and enemies based on player interactions
-    if player_id:
-        try:
-            # Call the player_room_interaction service to get player's interactions with this room
-            import requests
-            interaction_url = f"http://player_room_interaction_service:5040/player/{player_id}/room/{room_id}/interactions"
-            response = requests.get(interaction_url)
+    try:
+        # Call the player_room_interaction service to get player's interactions with this room
+        response = interaction_service.get(
+            f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/interactions",
+            timeout=(2, 5)
+        )
+        
+        if response.status_code == 200:
+            interaction_data = response.json()
             
-            if response.status_code == 200:
-                # Get the interaction data
-                interaction_data = response.json()
-                
-                # Filter out items that the player has already picked up
-                items_picked = interaction_data.get('items_picked', [])
-                room_data['ItemIDs'] = [item_id for item_id in room_data.get('ItemIDs', []) if item_id not in items_picked]
-                
-                # Filter out enemies that the player has already defeated
-                enemies_defeated = interaction_data.get('enemies_defeated', [])
-                room_data['EnemyIDs'] = [enemy_id for enemy_id in room_data.get('EnemyIDs', []) if enemy_id not in enemies_defeated]
-        except Exception as e:
-            # Log the error but don't fail the request
-            print(f"Error filtering room data for player {player_id}: {str(e)}")
+            # Filter out items that the player has already picked up
+            items_picked = set(interaction_data.get('items_picked', []))
+            room_data['item_ids'] = [item_id for item_id in room_data['item_ids'] if item_id not in items_picked]
+            
+            # Filter out enemies that the player has already defeated
+            enemies_defeated = set(interaction_data.get('enemies_defeated', []))
+            room_data['enemy_ids'] = [enemy_id for enemy_id in room_data['enemy_ids'] if enemy_id not in enemies_defeated]
+            
+            room_views.put(player_id, room_id, room_data, generation)
+    except Exception as e:
+        # Log the error but don't fail the request
+        logger.error(f"Error filtering room data for player {player_id}: {str(e)}")
     
     return jsonify(room_data), 200
 
@@ -101,6 +198,10 @@ def update_room(room_id):
         }), 404
 
     data = request.get_json()
+    if "required_item_ids" in data and not valid_id_list(data['required_item_ids']):
+        return jsonify({
+            "error": "required_item_ids must be a list of integers"
+        }), 400
     
     if "description" in data:
         room.Description = data['description']
@@ -110,8 +211,12 @@ def update_room(room_id):
         room.EnemyIDs = data['enemy_ids']
     if "door_locked" in data:
         room.DoorLocked = data['door_locked']
+    if "required_item_ids" in data:
+        room.set_required_item_ids(data['required_item_ids'])
 
     db.session.commit()
+    if "enemy_ids" in data:
+        sync_enemy_placements(room_id, room.EnemyIDs)
 
     return jsonify({
         "message": "Room updated successfully",
@@ -129,6 +234,7 @@ def delete_room(room_id):
 
     db.session.delete(room)
     db.session.commit()
+    sync_enemy_placements(room_id, [])
 
     return jsonify({
         "message": "Room deleted successfully",
@@ -144,7 +250,7 @@ def add_item_to_room(room_id, item_id):
             "error": "Room not found"
         }), 404
 
-    current_items = room.ItemIDs or []
+    current_items = list(room.ItemIDs or [])
     if item_id in current_items:
         return jsonify({
             "error": "Item already in room"
@@ -169,7 +275,7 @@ def remove_item_from_room(room_id, item_id):
         }), 404
 
     # Make sure we're working with a list, not None
-    current_items = room.ItemIDs or []
+    current_items = list(room.ItemIDs or [])
     # Convert string item_id to int for comparison if needed
     try:
         item_id_int = int(item_id)
@@ -216,15 +322,16 @@ def add_enemy_to_room(room_id, enemy_id):
             "error": "Room not found"
         }), 404
 
-    current_enemies = room.EnemyIDs or []
+    current_enemies = list(room.EnemyIDs or [])
     if enemy_id in current_enemies:
         return jsonify({
             "error": "Enemy already in room"
         }), 409
 
-    current_enemies.append(enemy_id)
-    room.EnemyIDs = current_enemies
+    # Assign a new list so SQLAlchemy sees the JSON column change
+    room.EnemyIDs = current_enemies + [enemy_id]
     db.session.commit()
+    sync_enemy_placements(room_id, room.EnemyIDs)
 
     return jsonify({
         "message": "Enemy added to room",
@@ -241,7 +348,7 @@ def remove_enemy_from_room(room_id, enemy_id):
         }), 404
 
     # Make sure we're working with a list, not None
-    current_enemies = room.EnemyIDs or []
+    current_enemies = list(room.EnemyIDs or [])
     # Convert string enemy_id to int for comparison if needed
     try:
         enemy_id_int = int(enemy_id)
@@ -274,12 +381,44 @@ def remove_enemy_from_room(room_id, enemy_id):
         updated_room.EnemyIDs = filtered_enemies
         db.session.commit()
 
+    sync_enemy_placements(room_id, room.EnemyIDs)
+
     return jsonify({
         "message": "Enemy removed from room",
         "room": room.to_dict()
     }), 200
 
+# ✅ API to re-push every room's enemies to the enemy service's placement index
+@app.route("/rooms/enemy-placements/sync", methods=["POST"])
+def sync_all_enemy_placements():
+    rooms = db.session.query(Room.RoomID, Room.EnemyIDs).all()
+    placement_sync.reconcile(rooms)
+    return jsonify({
+        "message": "Enemy placements queued for sync",
+        "rooms_queued": len(rooms)
+    }), 202
+
+# ✅ Enemy placement sync counters (backlog is rooms not yet accepted by the enemy service)
+@app.route("/metrics/enemy-placements", methods=["GET"])
+def enemy_placement_metrics():
+    return jsonify(placement_sync.stats()), 200
+
+# ✅ Room view cache counters
+@app.route("/metrics/room-views", methods=["GET"])
+def room_view_metrics():
+    return jsonify(room_views.stats()), 200
+
+# ✅ Catalog cache counters
+@app.route("/metrics/catalog", methods=["GET"])
+def catalog_metrics():
+    return jsonify(room_catalog.stats()), 200
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
-    app.run(host="0.0.0.0", port=5016, debug=True)
\ No newline at end of file
+        # Repairs the enemy service's placement index after anything missed while this service was down
+        placement_sync.reconcile(db.session.query(Room.RoomID, Room.EnemyIDs).all())
+    # Keeps the per-player room views in step with pickups and defeats
+    threading.Thread(target=listen_for_interaction_events, name="room-view-events", daemon=True).start()
+    # No reloader: it would serve from a second process, away from the listener thread
+    app.run(host="0.0.0.0", port=5016, debug=True, use_reloader=False)
\ No newline at end of file
@@ -12,6 +12,9 @@ class Room(db.Model):
     ItemIDs = db.Column(JSON)  # Stores array of ItemIDs
     EnemyIDs = db.Column(JSON) # Stores array of EnemyIDs
     DoorLocked = db.Column(db.Boolean, default=False)
+    # Items the player must have held to open the locked door
+    DoorRequirements = db.relationship("DoorRequirement", lazy="selectin", cascade="all, delete-orphan",
+                                       order_by="DoorRequirement.ItemID")
 
     def __init__(self, Description=None, ItemIDs=None, EnemyIDs=None, DoorLocked=False):
         self.Description = Description
@@ -25,5 +28,20 @@ class Room(db.Model):
             "description": self.Description,
             "item_ids": self.ItemIDs if self.ItemIDs is not None else [],
             "enemy_ids": self.EnemyIDs if self.EnemyIDs is not None else [],
-            "door_locked": bool(self.DoorLocked)
-        } 
\ No newline at end of file
+            "door_locked": bool(self.DoorLocked),
+            "required_item_ids": self.required_item_ids()
+        }
+
+    def required_item_ids(self):
+        return [requirement.ItemID for requirement in self.DoorRequirements]
+
+    def set_required_item_ids(self, item_ids):
+        self.DoorRequirements = [DoorRequirement(ItemID=item_id) for item_id in dict.fromkeys(item_ids)]
+
+
+class DoorRequirement(db.Model):
+    """An item needed to open a room's locked door (all of a room's rows are needed)."""
+    __tablename__ = "DoorRequirement"
+
+    RoomID = db.Column(db.Integer, db.ForeignKey("Room.RoomID", ondelete="CASCADE"), primary_key=True)
+    ItemID = db.Column(db.Integer, primary_key=True) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+# atomic_services/room/placement_sync.py
+import os
+import time
+import logging
+import threading
+import requests
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Enemy service keeps the room -> enemy index that backs /enemy/room/<room_id>
+ENEMY_SERVICE_URL = os.getenv("ENEMY_SERVICE_URL", "http://enemy_service:5005")
+PLACEMENT_SYNC_RETRY_DELAY = float(os.getenv("PLACEMENT_SYNC_RETRY_DELAY", "1"))  # seconds
+PLACEMENT_SYNC_MAX_DELAY = float(os.getenv("PLACEMENT_SYNC_MAX_DELAY", "30"))
+
+
+class PlacementSync:
+    """
+    Keeps the enemy service's placement index in step with Room.EnemyIDs.
+
+    Room writes only record the room's new EnemyIDs here, after their
+    commit; a background thread pushes them to the enemy service and keeps
+    retrying with backoff until it accepts them, so an enemy service that
+    is down or slow doesn't lose an update. Only the latest EnemyIDs of a
+    room are kept: a later write replaces an unsent one. reconcile() queues
+    every room, which the service does at startup to repair anything missed
+    while it was down.
+    """
+
+    def __init__(self, url=ENEMY_SERVICE_URL, retry_delay=PLACEMENT_SYNC_RETRY_DELAY,
+                 max_delay=PLACEMENT_SYNC_MAX_DELAY):
+        self.url = url
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self._session = requests.Session()
+        self._pending = {}  # room_id -> enemy_ids, in the order rooms were queued
+        self._cond = threading.Condition()
+        self._thread = None
+        self._counters = {"queued": 0, "synced": 0, "failures": 0}
+
+    def start(self):
+        """Starts the background thread if it is not already running."""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="enemy-placement-sync", daemon=True)
+            self._thread.start()
+
+    def submit(self, room_id, enemy_ids):
+        """Queues a room's current EnemyIDs (an empty list for a deleted room)."""
+        with self._cond:
+            # Re-queued rooms move to the back with their latest EnemyIDs
+            self._pending.pop(room_id, None)
+            self._pending[room_id] = list(enemy_ids or [])
+            self._counters["queued"] += 1
+            self._cond.notify()
+        self.start()
+
+    def reconcile(self, rooms):
+        """Queues every (room_id, enemy_ids) pair, e.g. all rooms at startup."""
+        for room_id, enemy_ids in rooms:
+            self.submit(room_id, enemy_ids)
+
+    def push(self, room_id, enemy_ids):
+        """Sends one room's EnemyIDs to the enemy service. Returns True if it accepted them."""
+        try:
+            response = self._session.put(
+                f"{self.url}/enemy/room/{room_id}/placements",
+                json={"enemy_ids": enemy_ids},
+                timeout=(2, 5)
+            )
+            if response.status_code == 200:
+                return True
+            logger.warning(f"Enemy service refused placements for room {room_id}: "
+                           f"{response.status_code} {response.text}")
+        except requests.RequestException as e:
+            logger.warning(f"Error syncing enemy placements for room {room_id}: {str(e)}")
+        return False
+
+    def _run(self):
+        delay = self.retry_delay
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                room_id = next(iter(self._pending))
+                enemy_ids = self._pending[room_id]
+
+            if self.push(room_id, enemy_ids):
+                with self._cond:
+                    # Unless a newer write queued the room again meanwhile
+                    if self._pending.get(room_id) is enemy_ids:
+                        del self._pending[room_id]
+                    self._counters["synced"] += 1
+                delay = self.retry_delay
+                continue
+
+            with self._cond:
+                self._counters["failures"] += 1
+                backlog = len(self._pending)
+            logger.warning(f"{backlog} rooms waiting for the enemy placement index; retrying in {delay:.0f}s")
+            # The enemy service is likely down for every room, so wait before the next one
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    def stats(self):
+        with self._cond:
+            return dict(self._counters, backlog=len(self._pending))
+
+
+# One placement sync per process, shared by every request
+placement_sync = PlacementSync()
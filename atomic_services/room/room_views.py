@@ -0,0 +1,167 @@
+# atomic_services/room/room_views.py
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+import pika
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+INTERACTION_EVENTS_EXCHANGE = os.getenv("INTERACTION_EVENTS_EXCHANGE", "player_room_interaction.events")
+ROOM_VIEW_CACHE_SIZE = int(os.getenv("ROOM_VIEW_CACHE_SIZE", "10000"))
+# Upper bound on how long a view is trusted, in case an event is lost
+ROOM_VIEW_TTL = float(os.getenv("ROOM_VIEW_TTL", "300"))  # seconds
+RECONNECT_MAX_DELAY = float(os.getenv("ROOM_VIEW_RECONNECT_MAX_DELAY", "30"))
+
+
+class RoomViewCache:
+    """
+    LRU cache of per-player room views: a room's data with the items the
+    player picked up and the enemies they defeated filtered out, keyed by
+    (player_id, room_id).
+
+    Views are only served while the listener is subscribed to the
+    interaction service's events, which drop the views they affect. Room
+    writes drop every view of that room. A view computed while an
+    invalidation for its player was in flight is not stored (each player
+    has a generation number that invalidations bump).
+    """
+
+    def __init__(self, max_size=ROOM_VIEW_CACHE_SIZE, ttl=ROOM_VIEW_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._views = OrderedDict()  # (player_id, room_id) -> (stored_at, view)
+        self._generations = {}  # player_id -> generation
+        self._epoch = 0  # bumped when everything is dropped
+        self._lock = threading.Lock()
+        self.subscribed = False
+        self._counters = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0,
+                          "invalidations": 0, "events": 0}
+
+    def generation(self, player_id):
+        """Token to pass to put(); taken before fetching the player's interactions."""
+        with self._lock:
+            return (self._epoch, self._generations.get(player_id, 0))
+
+    def get(self, player_id, room_id):
+        with self._lock:
+            if not self.subscribed:
+                self._counters["bypassed"] += 1
+                return None
+            entry = self._views.get((player_id, room_id))
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self._counters["misses"] += 1
+                return None
+            self._views.move_to_end((player_id, room_id))
+            self._counters["hits"] += 1
+            return entry[1]
+
+    def put(self, player_id, room_id, view, generation):
+        with self._lock:
+            if not self.subscribed or generation != (self._epoch, self._generations.get(player_id, 0)):
+                return
+            self._views[(player_id, room_id)] = (time.monotonic(), view)
+            self._views.move_to_end((player_id, room_id))
+            self._counters["stores"] += 1
+            while len(self._views) > self.max_size:
+                self._views.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate_player(self, player_id, room_id=None):
+        """Drops the player's view of one room, or of every room."""
+        with self._lock:
+            self._generations[player_id] = self._generations.get(player_id, 0) + 1
+            if room_id is not None:
+                keys = [(player_id, room_id)]
+            else:
+                keys = [key for key in self._views if key[0] == player_id]
+            for key in keys:
+                if self._views.pop(key, None) is not None:
+                    self._counters["invalidations"] += 1
+
+    def invalidate_room(self, room_id):
+        """Drops every player's view of a room (after the room itself changed)."""
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._views if key[1] == room_id]:
+                del self._views[key]
+                self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._counters["invalidations"] += len(self._views)
+            self._views.clear()
+
+    def set_subscribed(self, subscribed):
+        """While unsubscribed events may be missed, so nothing is served or kept."""
+        with self._lock:
+            self.subscribed = subscribed
+            self._epoch += 1
+            self._views.clear()
+
+    def handle_event(self, event):
+        with self._lock:
+            self._counters["events"] += 1
+        player_id = event.get("player_id")
+        if player_id is None:
+            return
+        if event.get("type") == "player_reset":
+            self.invalidate_player(player_id)
+        else:
+            self.invalidate_player(player_id, event.get("room_id"))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._views)
+            stats["max_size"] = self.max_size
+            stats["subscribed"] = self.subscribed
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# One cache per process, shared by every request
+room_views = RoomViewCache()
+
+
+def listen_for_interaction_events(cache=room_views, host=RABBITMQ_HOST):
+    """
+    Background loop: subscribes a private queue to the interaction events
+    exchange and invalidates cached views as events arrive. Reconnects with
+    backoff; the cache is disabled while disconnected.
+    """
+    delay = 1.0
+    while True:
+        try:
+            connection = pika.BlockingConnection(pika.ConnectionParameters(host=host, heartbeat=60))
+            channel = connection.channel()
+            channel.exchange_declare(exchange=INTERACTION_EVENTS_EXCHANGE, exchange_type="fanout", durable=True)
+            # Exclusive, server-named queue: goes away with this connection
+            queue_name = channel.queue_declare(queue="", exclusive=True).method.queue
+            channel.queue_bind(exchange=INTERACTION_EVENTS_EXCHANGE, queue=queue_name)
+
+            def callback(ch, method, properties, body):
+                try:
+                    cache.handle_event(json.loads(body))
+                except Exception as e:
+                    logger.error(f"Bad interaction event {body!r}: {str(e)}")
+                    # Don't guess what it touched
+                    cache.clear()
+
+            channel.basic_consume(queue=queue_name, on_message_callback=callback, auto_ack=True)
+            cache.set_subscribed(True)
+            logger.info(f"Room view cache subscribed to {INTERACTION_EVENTS_EXCHANGE}")
+            delay = 1.0
+            channel.start_consuming()
+        except Exception as e:
+            logger.warning(f"Room view cache listener disconnected: {str(e)}; retrying in {delay:.0f}s")
+        cache.set_subscribed(False)
+        time.sleep(delay)
+        delay = min(delay * 2, RECONNECT_MAX_DELAY)
@@ -1,6 +1,8 @@
 import os
+import base64
+from datetime import datetime
 from flask import Flask, jsonify, request
-from models import db, Score
+from models import db, Score, ScoreTotal, ScoreBucket
 from sqlalchemy import func
 
 app = Flask(__name__)
@@ -11,8 +13,131 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
 
+VALID_REASONS = ['enemy_defeat', 'item_pickup', 'enter_room']
+# Older callers used these names
+REASON_ALIASES = {'combat': 'enemy_defeat', 'item_collection': 'item_pickup'}
+
+# History pages are bounded however many entries a player has
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = int(os.getenv("MAX_SCORE_PAGE_SIZE", "500"))
+SCORE_HISTORY_PREVIEW = int(os.getenv("SCORE_HISTORY_PREVIEW", "20"))
+
+def upsert_statement(model, keys, counters):
+    """
+    INSERT ... that adds `counters` onto an existing row with the same
+    `keys`, for the current database dialect.
+    """
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        return stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in counters})
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[k] for k in keys],
+        set_={c: table.c[c] + stmt.excluded[c] for c in counters}
+    )
+
+def hour_of(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def add_to_totals(player_id, reason, points, timestamp, entries=1):
+    """
+    Adds points to the player's running total and hourly bucket. Runs in
+    the caller's transaction, next to the Score insert.
+    """
+    db.session.execute(upsert_statement(ScoreTotal, ["PlayerID", "Reason"], ["Points", "Entries"]).values(
+        PlayerID=player_id, Reason=reason, Points=points, Entries=entries))
+    db.session.execute(upsert_statement(ScoreBucket, ["PlayerID", "Hour"], ["Points", "Entries"]).values(
+        PlayerID=player_id, Hour=hour_of(timestamp), Points=points, Entries=entries))
+
+def rebuild_totals():
+    """
+    Fills ScoreTotal and ScoreBucket from existing Score rows. Only runs
+    when the totals are empty, e.g. on the first start after upgrading.
+    """
+    if db.session.query(ScoreTotal.PlayerID).first() is not None or db.session.query(Score.ScoreID).first() is None:
+        return
+    totals = db.session.query(Score.PlayerID, Score.Reason, func.sum(Score.Points), func.count()).group_by(
+        Score.PlayerID, Score.Reason).all()
+    for player_id, reason, points, entries in totals:
+        db.session.add(ScoreTotal(PlayerID=player_id, Reason=reason, Points=points, Entries=entries))
+    buckets = {}
+    for player_id, points, timestamp in db.session.query(Score.PlayerID, Score.Points, Score.Timestamp).yield_per(5000):
+        bucket = buckets.setdefault((player_id, hour_of(timestamp)), [0, 0])
+        bucket[0] += points
+        bucket[1] += 1
+    for (player_id, hour), (points, entries) in buckets.items():
+        db.session.add(ScoreBucket(PlayerID=player_id, Hour=hour, Points=points, Entries=entries))
+    db.session.commit()
+    app.logger.info(f"Rebuilt score totals for {len(totals)} player/reason pairs")
+
 with app.app_context():
     db.create_all()
+    rebuild_totals()
+
+def encode_cursor(timestamp, entry_id):
+    """
+    Packs a (Timestamp, ScoreID) position into an opaque cursor string.
+    """
+    raw = f"{timestamp.isoformat()}|{entry_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Unpacks a cursor from encode_cursor(). Raises ValueError if invalid.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, entry_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(entry_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def page_size():
+    return max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+def entry_page(query, before, limit):
+    """
+    One page of Score entries older than the `before` cursor (or the
+    newest ones), newest first.
+    """
+    if before:
+        timestamp, score_id = decode_cursor(before)
+        query = query.filter(db.or_(
+            Score.Timestamp < timestamp,
+            db.and_(Score.Timestamp == timestamp, Score.ScoreID < score_id)
+        ))
+    entries = query.order_by(Score.Timestamp.desc(), Score.ScoreID.desc()).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    return {
+        "entries": [entry.to_dict() for entry in entries],
+        "next_cursor": encode_cursor(entries[-1].Timestamp, entries[-1].ScoreID) if has_more else None,
+        "has_more": has_more
+    }
+
+def bucket_page(player_id, before, limit):
+    """
+    One page of hourly buckets older than the `before` cursor, newest first.
+    """
+    query = ScoreBucket.query.filter_by(PlayerID=player_id)
+    if before:
+        hour, _ = decode_cursor(before)
+        query = query.filter(ScoreBucket.Hour < hour)
+    buckets = query.order_by(ScoreBucket.Hour.desc()).limit(limit + 1).all()
+    has_more = len(buckets) > limit
+    buckets = buckets[:limit]
+    return {
+        "buckets": [bucket.to_dict() for bucket in buckets],
+        "next_cursor": encode_cursor(buckets[-1].Hour, 0) if has_more else None,
+        "has_more": has_more
+    }
 
 @app.route("/score", methods=["POST"])
 def add_score():
@@ -25,20 +150,26 @@ def add_score():
             "required": required_fields
         }), 400
 
-    valid_reasons = ['combat', 'item_collection']
-    if data['reason'] not in valid_reasons:
+    reason = REASON_ALIASES.get(data['reason'], data['reason'])
+    if reason not in VALID_REASONS:
         return jsonify({
             "error": "Invalid reason",
-            "valid_reasons": valid_reasons
+            "valid_reasons": VALID_REASONS
         }), 400
 
+    if not isinstance(data['points'], int) or not isinstance(data['player_id'], int):
+        return jsonify({"error": "player_id and points must be integers"}), 400
+
     new_score = Score(
         PlayerID=data['player_id'],
         Points=data['points'],
-        Reason=data['reason']
+        Reason=reason,
+        Timestamp=datetime.utcnow()
     )
     
+    # The entry and the totals commit together
     db.session.add(new_score)
+    add_to_totals(new_score.PlayerID, reason, new_score.Points, new_score.Timestamp)
     db.session.commit()
 
     return jsonify({
@@ -48,41 +179,64 @@ def add_score():
 
 @app.route("/score/total/<int:player_id>", methods=["GET"])
 def get_total_score(player_id):
-    total_score = db.session.query(
-        func.sum(Score.Points)
-    ).filter_by(PlayerID=player_id).scalar() or 0
+    # At most one row per reason
+    totals = ScoreTotal.query.filter_by(PlayerID=player_id).all()
+    total_score = sum(total.Points for total in totals)
 
-    score_entries = Score.query.filter_by(PlayerID=player_id).all()
+    # Only the latest entries; older ones come from /score/history
+    page = entry_page(Score.query.filter_by(PlayerID=player_id), None, SCORE_HISTORY_PREVIEW)
     
     return jsonify({
         "player_id": player_id,
         "total_score": total_score,
-        "score_history": [entry.to_dict() for entry in score_entries]
+        "totals_by_reason": {total.Reason: total.Points for total in totals},
+        "score_history": page["entries"],
+        "next_cursor": page["next_cursor"]
     }), 200
 
 @app.route("/score/<int:player_id>/reason/<string:reason>", methods=["GET"])
 def get_scores_by_reason(player_id, reason):
-    valid_reasons = ['combat', 'item_collection']
-    if reason not in valid_reasons:
+    reason = REASON_ALIASES.get(reason, reason)
+    if reason not in VALID_REASONS:
         return jsonify({
             "error": "Invalid reason",
-            "valid_reasons": valid_reasons
+            "valid_reasons": VALID_REASONS
         }), 400
 
-    scores = Score.query.filter_by(
-        PlayerID=player_id,
-        Reason=reason
-    ).all()
-
-    total = sum(score.Points for score in scores)
+    total = db.session.get(ScoreTotal, (player_id, reason))
+    try:
+        page = entry_page(Score.query.filter_by(PlayerID=player_id, Reason=reason),
+                          request.args.get('before'), page_size())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({
         "player_id": player_id,
         "reason": reason,
-        "total_score": total,
-        "score_entries": [score.to_dict() for score in scores]
+        "total_score": total.Points if total else 0,
+        "score_entries": page["entries"],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"]
     }), 200
 
+# API for a player's score history, newest first: hourly buckets by default,
+# ?bucket=entry for individual entries; ?before=<next_cursor>&limit= to page
+@app.route("/score/history/<int:player_id>", methods=["GET"])
+def get_score_history(player_id):
+    bucket = request.args.get('bucket', 'hour')
+    if bucket not in ("hour", "entry"):
+        return jsonify({"error": "bucket must be 'hour' or 'entry'"}), 400
+    try:
+        if bucket == "hour":
+            page = bucket_page(player_id, request.args.get('before'), page_size())
+        else:
+            page = entry_page(Score.query.filter_by(PlayerID=player_id), request.args.get('before'), page_size())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page["player_id"] = player_id
+    page["bucket"] = bucket
+    return jsonify(page), 200
+
 @app.route("/scores", methods=["GET"])
 def get_all_scores():
     scores = Score.query.all()
@@ -92,14 +246,15 @@ def get_all_scores():
 
 @app.route("/score/<int:player_id>", methods=["DELETE"])
 def delete_player_scores(player_id):
-    scores = Score.query.filter_by(PlayerID=player_id).all()
-    if not scores:
+    deleted = Score.query.filter_by(PlayerID=player_id).delete()
+    if not deleted:
+        db.session.rollback()
         return jsonify({
             "message": "No scores found for this player"
         }), 404
 
-    for score in scores:
-        db.session.delete(score)
+    ScoreTotal.query.filter_by(PlayerID=player_id).delete()
+    ScoreBucket.query.filter_by(PlayerID=player_id).delete()
     db.session.commit()
 
     return jsonify({
@@ -5,16 +5,54 @@ db = SQLAlchemy()
 
 class Score(db.Model):
     __tablename__ = "Score"
+    __table_args__ = (
+        # Per-player history in time order (keyset pagination)
+        db.Index('idx_score_player_time', 'PlayerID', 'Timestamp', 'ScoreID'),
+        db.Index('idx_score_player_reason', 'PlayerID', 'Reason', 'Timestamp', 'ScoreID'),
+    )
     
     ScoreID = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    PlayerID = db.Column(db.Integer, nullable=False)
     Points = db.Column(db.Integer, nullable=False)
     Reason = db.Column(db.Enum('enemy_defeat', 'item_pickup', 'enter_room'), nullable=False)
-    Timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    Timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
     def to_dict(self):
         return {
             "score_id": self.ScoreID,
+            "player_id": self.PlayerID,
             "points": self.Points,
             "reason": self.Reason,
             "timestamp": self.Timestamp.isoformat()
-        } 
\ No newline at end of file
+        } 
+
+class ScoreTotal(db.Model):
+    """
+    Running total per player and reason, updated in the same transaction
+    as every Score insert.
+    """
+    __tablename__ = "ScoreTotal"
+
+    PlayerID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Reason = db.Column(db.Enum('enemy_defeat', 'item_pickup', 'enter_room'), primary_key=True)
+    Points = db.Column(db.Integer, nullable=False, default=0)
+    Entries = db.Column(db.Integer, nullable=False, default=0)
+
+class ScoreBucket(db.Model):
+    """
+    Points per player per hour, updated in the same transaction as every
+    Score insert.
+    """
+    __tablename__ = "ScoreBucket"
+
+    PlayerID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    Hour = db.Column(db.DateTime, primary_key=True)
+    Points = db.Column(db.Integer, nullable=False, default=0)
+    Entries = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "hour": self.Hour.isoformat(),
+            "points": self.Points,
+            "entries": self.Entries
+        }
@@ -0,0 +1,125 @@
+# atomic_services/utilities/catalog.py
+import threading
+from sqlalchemy import event
+
+
+class CatalogCache:
+    """
+    In-process read-through cache of catalog rows, by primary key. Each
+    entry holds the row's dict and its pre-serialized JSON body, so a hit
+    is a dict lookup with no query and no serialization.
+
+    Warmed with every row at startup. Misses read the row once and cache
+    it. Commits made through the owning session drop the entries of the
+    rows they inserted, updated or deleted (see watch()); rows changed
+    behind the service's back are only seen after a restart.
+    """
+
+    def __init__(self, name, serialize, key_of):
+        self.name = name
+        # model instance -> cache key
+        self._key_of = key_of
+        # model instance -> (dict, JSON bytes)
+        self._serialize = serialize
+        self._entries = {}
+        # Bumped by every invalidation, so a load racing a commit isn't cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "invalidations": 0, "warmed": 0}
+
+    def warm(self, rows):
+        """Replaces the contents with the model instances in `rows`."""
+        entries = {self._key_of(obj): self._serialize(obj) for obj in rows}
+        with self._lock:
+            self._generation += 1
+            self._entries = entries
+            self._counters["warmed"] = len(entries)
+
+    def get(self, key, load):
+        """
+        The (dict, JSON bytes) entry for `key`, calling load(key) on a miss.
+        Returns None if the row doesn't exist (not cached).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            self._counters["hits" if entry is not None else "misses"] += 1
+            generation = self._generation
+        if entry is not None:
+            return entry
+        obj = load(key)
+        if obj is None:
+            return None
+        entry = self._serialize(obj)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = entry
+                self._counters["loads"] += 1
+        return entry
+
+    def get_many(self, keys, load_many):
+        """
+        {key: entry} for the `keys` that exist, calling load_many(missing
+        keys) once for whatever isn't cached.
+        """
+        with self._lock:
+            found = {key: self._entries[key] for key in keys if key in self._entries}
+            self._counters["hits"] += len(found)
+            self._counters["misses"] += len(keys) - len(found)
+            generation = self._generation
+        missing = [key for key in keys if key not in found]
+        if missing:
+            loaded = {self._key_of(obj): self._serialize(obj) for obj in load_many(missing)}
+            with self._lock:
+                if generation == self._generation:
+                    self._entries.update(loaded)
+                    self._counters["loads"] += len(loaded)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, keys):
+        if not keys:
+            return
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._counters["invalidations"] += 1
+
+    def watch(self, session, model):
+        """
+        Drops cached entries for `model` rows once a transaction on
+        `session` that flushed them commits.
+        """
+        info_key = f"catalog_changes_{self.name}"
+
+        @event.listens_for(session, "after_flush")
+        def collect(session, flush_context):
+            changed = session.info.setdefault(info_key, set())
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                if isinstance(obj, model) and self._key_of(obj) is not None:
+                    changed.add(self._key_of(obj))
+
+        @event.listens_for(session, "after_commit")
+        def invalidate(session):
+            self.invalidate(session.info.pop(info_key, ()))
+
+        @event.listens_for(session, "after_rollback")
+        def forget(session):
+            session.info.pop(info_key, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+def json_entry(app, data):
+    """
+    (dict, JSON bytes) serialized the same way jsonify() would. The dict is
+    decoded back from the JSON, so it shares nothing with the model instance.
+    """
+    body = app.json.dumps(data)
+    return app.json.loads(body), (body + "\n").encode()
@@ -0,0 +1,21 @@
+# atomic_services/utilities/ids.py
+
+
+def parse_id_list(raw_ids):
+    """
+    Parses "1,2,3" (or repeated ?ids= values) into a list of unique ints,
+    keeping the order they were requested in. Raises ValueError on a
+    part that isn't an integer.
+    """
+    ids = []
+    seen = set()
+    for raw in raw_ids:
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            value = int(part)
+            if value not in seen:
+                seen.add(value)
+                ids.append(value)
+    return ids
@@ -1,11 +1,11 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import pika
 import json
 import logging
 from datetime import datetime
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
 
 
 app = Flask(__name__)
@@ -47,7 +47,7 @@ def apply_item_effect():
     
     # Get item details first
     try:
-        item_response = requests.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
+        item_response = http_client.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
         if item_response.status_code != 200:
             return jsonify({"error": f"Item not found: {item_id}"}), 404
             
@@ -70,99 +70,47 @@ def apply_item_effect():
         logger.error(f"Error fetching item details: {str(e)}")
         return jsonify({"error": f"Error fetching item details: {str(e)}"}), 500
     
-    # Get current player stats
-    try:
-        player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-        if player_response.status_code != 200:
-            return jsonify({"error": "Player not found"}), 404
-            
-        player_data = player_response.json()
-        
-    except Exception as e:
-        logger.error(f"Error fetching player data: {str(e)}")
-        return jsonify({"error": f"Error fetching player data: {str(e)}"}), 500
-    
     # Apply effect based on effect_type
     effect_applied = False
     effect_description = ""
     effect_data = {}
-    update_data = {}
+    deltas = {}
+    
+    # The player service adds the bonus in one UPDATE (health capped at MaxHealth),
+    # so there is no need to read the player first
+    if effect_type == "attack":
+        deltas = {"damage": 20}
+        effect_description = f"Increased attack by 20"
+    elif effect_type == "health":
+        # Don't increase max health, only increase current health
+        deltas = {"current_health": 50}
+        effect_description = f"Increased current health by 50"
     
     try:
-        # Apply attack effect
-        if effect_type == "attack":
-            # Check for different possible damage/attack attribute names
-            current_damage = None
-            damage_key = None
-            for key in ["damage", "Damage", "attack", "Attack"]:
-                if key in player_data:
-                    current_damage = player_data[key]
-                    damage_key = key
-                    break
-            
-            if current_damage is None:
-                return jsonify({"error": "Could not find damage/attack attribute in player data"}), 500
-                
-            # Update player's damage/attack value
-            new_damage = current_damage + 20
-            update_data = {damage_key: new_damage}
-            
-            logger.debug(f"Updating player's {damage_key} from {current_damage} to {new_damage}")
-            
-            effect_applied = True
-            effect_description = f"Increased attack by 20"
-            effect_data = {
-                "attack_increased": True,
-                "new_attack": new_damage
-            }
-            
-        # Apply health effect
-        elif effect_type == "health":
-            # Check for different possible health attribute names
-            current_health = None
-            max_health = None
-            health_key = None
-            
-            for key in ["health", "Health", "current_health", "CurrentHealth"]:
-                if key in player_data:
-                    current_health = player_data[key]
-                    health_key = key
-                    break
-                    
-            for key in ["max_health", "MaxHealth"]:
-                if key in player_data:
-                    max_health = player_data[key]
-                    break
-            
-            if current_health is None or health_key is None:
-                return jsonify({"error": "Could not find current health attribute in player data"}), 500
-                
-            # Don't increase max health, only increase current health
-            # Ensure current health doesn't exceed max health if known
-            new_current_health = current_health + 50
-            if max_health is not None and new_current_health > max_health:
-                new_current_health = max_health
-                
-            update_data = {health_key: new_current_health}
-            
-            logger.debug(f"Updating player's {health_key} from {current_health} to {new_current_health}")
-            
-            effect_applied = True
-            effect_description = f"Increased current health by 50"
-            effect_data = {
-                "health_increased": True,
-                "new_current_health": new_current_health
-            }
-        
-        # Update player stats in database
-        if update_data:
-            update_response = requests.put(
-                f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                json=update_data
+        if deltas:
+            update_response = http_client.patch(
+                f"{PLAYER_SERVICE_URL}/player/{player_id}/stats", 
+                json=deltas
             )
             
+            if update_response.status_code == 404:
+                return jsonify({"error": "Player not found"}), 404
             if update_response.status_code != 200:
                 return jsonify({"error": f"Failed to update player stats: {update_response.text}"}), 500
+            
+            player_data = update_response.json()["player"]
+            effect_applied = True
+            if effect_type == "attack":
+                effect_data = {
+                    "attack_increased": True,
+                    "new_attack": player_data["damage"]
+                }
+            else:
+                effect_data = {
+                    "health_increased": True,
+                    "new_current_health": player_data["current_health"]
+                }
+            logger.debug(f"Applied {deltas} to player {player_id}: {effect_data}")
                 
             # Log the activity
             log_activity(player_id, f"{effect_description} from {item_name}")
@@ -190,5 +138,19 @@ def apply_item_effect():
         **effect_data
     })
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5025, debug=True) 
\ No newline at end of file
@@ -0,0 +1,42 @@
+from flask import Flask, jsonify, request
+import os
+import logging
+from composite_services.utilities.dice import DicePool, DICE_SIDES
+
+app = Flask(__name__)
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Largest batch a single request may ask for
+MAX_ROLLS_PER_REQUEST = int(os.getenv("MAX_ROLLS_PER_REQUEST", "1000"))
+
+
+@app.route('/roll', methods=['GET'])
+def roll():
+    """
+    Local stand-in for the external dice endpoint.
+    - No count (or count=1): returns a bare number, like the external service
+    - count=n: returns a JSON list of n rolls
+    Optional: sides (default 6), seed (for reproducible rolls)
+    """
+    sides = request.args.get('sides', DICE_SIDES, type=int)
+    count = request.args.get('count', 1, type=int)
+    seed = request.args.get('seed', type=int)
+
+    if sides is None or sides < 2:
+        return jsonify({"error": "sides must be an integer of at least 2"}), 400
+    if count is None or count < 1 or count > MAX_ROLLS_PER_REQUEST:
+        return jsonify({"error": f"count must be between 1 and {MAX_ROLLS_PER_REQUEST}"}), 400
+
+    pool = DicePool(seed=seed, sides=sides, size=count)
+    rolls = [pool.roll() for _ in range(count)]
+
+    if 'count' not in request.args and count == 1:
+        return jsonify(rolls[0])
+    return jsonify(rolls)
+
+
+if __name__ == '__main__':
+    app.run(host="0.0.0.0", port=5030, debug=True)
@@ -1,11 +1,13 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import pika
 import json
 from datetime import datetime
 import logging
-from composite_services.utilities.activity_logger import log_activity
+from functools import partial
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
+from composite_services.utilities.fanout import FanOut
 
 
 app = Flask(__name__)
@@ -25,6 +27,164 @@ INVENTORY_SERVICE_URL = os.getenv("INVENTORY_SERVICE_URL", "http://inventory_ser
 ACTIVITY_LOG_SERVICE_URL = os.getenv("ACTIVITY_LOG_SERVICE_URL", "http://activity_log_service:5013")
 PLAYER_ROOM_INTERACTION_SERVICE_URL = os.getenv("PLAYER_ROOM_INTERACTION_SERVICE_URL", "http://player_room_interaction_service:5014")
 
+# Overall time budget (seconds) for all downstream calls made while entering a room
+ENTER_ROOM_DEADLINE = float(os.getenv("ENTER_ROOM_DEADLINE", "8"))
+
+
+PLURALS = {"item": "items", "enemy": "enemies"}
+
+
+def _respond(fan, payload, status=200):
+    """
+    Builds the JSON response and attaches per-downstream timings as a
+    Server-Timing header.
+    """
+    response = jsonify(payload)
+    response.status_code = status
+    response.headers["Server-Timing"] = fan.server_timing()
+    logger.debug(f"Downstream timings: {fan.timings_ms()}")
+    return response
+
+
+def _room_contents(room, kind):
+    """
+    Returns (ids, inline_entities) for `kind` ("item" or "enemy") from a room
+    payload, handling all the key formats the room service may return.
+    """
+    ids = []
+    inline = []
+    plural = PLURALS[kind]
+    id_field = f"{kind.capitalize()}ID"
+    default_name = kind.capitalize()
+
+    if f"{kind}_ids" in room and isinstance(room[f"{kind}_ids"], list):
+        ids = list(room[f"{kind}_ids"])
+    elif f"{kind.capitalize()}IDs" in room and isinstance(room[f"{kind.capitalize()}IDs"], list):
+        ids = list(room[f"{kind.capitalize()}IDs"])
+    elif plural in room and isinstance(room[plural], list):
+        # If the room has a direct list of entities
+        for entity in room[plural]:
+            if isinstance(entity, dict):
+                inline.append({
+                    "id": entity.get("id") or entity.get(id_field, ""),
+                    "name": entity.get("name") or entity.get("Name", default_name),
+                    "description": entity.get("description") or entity.get("Description", "No description")
+                })
+            elif isinstance(entity, int):
+                ids.append(entity)
+
+    return ids, inline
+
+
+def _batch_by_id(response, kind):
+    """
+    Indexes a multi-get response from the item or enemy service by id.
+    Returns an empty dict if the call failed.
+    """
+    if response is None or response.status_code != 200:
+        logger.warning(f"Failed to get {kind} details: "
+                       f"{response.status_code if response is not None else 'no response'}")
+        return {}
+
+    body = response.json()
+    if body.get("missing"):
+        logger.warning(f"{kind.capitalize()} ids not found: {body['missing']}")
+    return {entity[f"{kind}_id"]: entity for entity in body.get(PLURALS[kind], [])}
+
+
+def _summarize(entity, entity_id, kind):
+    """Extracts id/name/description from an item or enemy payload."""
+    summary = {
+        "id": entity_id,
+        "name": kind.capitalize(),
+        "description": "No description available"
+    }
+
+    # Try multiple possible property names
+    for name_key in ["Name", "name"]:
+        if name_key in entity and entity[name_key]:
+            summary["name"] = entity[name_key]
+            break
+
+    for desc_key in ["Description", "description"]:
+        if desc_key in entity and entity[desc_key]:
+            summary["description"] = entity[desc_key]
+            break
+
+    for id_key in [f"{kind.capitalize()}ID", f"{kind}_id", "id"]:
+        if id_key in entity and entity[id_key]:
+            summary["id"] = entity[id_key]
+            break
+
+    return summary
+
+
+def _check_current_room_cleared(fan, player_id, player_response):
+    """
+    Returns an (error, status) pair if the player still has undefeated enemies
+    in their current room, otherwise None.
+    """
+    if player_response is None or player_response.status_code != 200:
+        return None
+
+    player_data = player_response.json()
+    current_room_id = None
+
+    # Get current room ID
+    for key in ["RoomID", "room_id"]:
+        if key in player_data and player_data[key] is not None:
+            current_room_id = player_data[key]
+            break
+
+    if current_room_id is None or current_room_id <= 0:
+        return None
+
+    # Current room and the player's interactions with it are independent
+    interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{current_room_id}/interactions"
+    logger.debug(f"Checking player interactions: {interaction_url}")
+    results = fan.run({
+        "current_room": ("room", http_client.get, f"{ROOM_SERVICE_URL}/room/{current_room_id}"),
+        "current_room_interactions": ("player_room_interaction", http_client.get, interaction_url)
+    })
+
+    current_room_response = results["current_room"]
+    if current_room_response is None or current_room_response.status_code != 200:
+        return None
+
+    enemy_ids, inline_enemies = _room_contents(current_room_response.json(), "enemy")
+    room_enemy_ids = enemy_ids + [enemy["id"] for enemy in inline_enemies if enemy["id"]]
+    logger.debug(f"Room {current_room_id} has enemies: {room_enemy_ids}")
+
+    # If there are no enemies in the room, the player is free to leave
+    if not room_enemy_ids:
+        return None
+
+    interaction_response = results["current_room_interactions"]
+    if interaction_response is None or interaction_response.status_code != 200:
+        logger.error("Failed to get player interactions: "
+                     f"{interaction_response.text if interaction_response is not None else 'no response'}")
+        # We'll be cautious and not allow the player to proceed if we can't verify
+        return {
+            "error": "Could not verify enemy status. Please try again.",
+            "enemies_present": True
+        }, 500
+
+    interaction_data = interaction_response.json()
+    logger.debug(f"Player interactions: {interaction_data}")
+
+    # Check if there are undefeated enemies
+    defeated_enemies = interaction_data.get('enemies_defeated', [])
+    undefeated_enemies = [enemy_id for enemy_id in room_enemy_ids if enemy_id not in defeated_enemies]
+
+    if undefeated_enemies:
+        logger.debug(f"Player {player_id} cannot proceed - undefeated enemies remain in room {current_room_id}: {undefeated_enemies}")
+        return {
+            "error": "You cannot leave this room until you defeat all enemies!",
+            "enemies_present": True
+        }, 403
+
+    return None
+
 
 @app.route('/room/<int:room_id>', methods=['POST'])
 def enter_room(room_id):
@@ -34,349 +194,123 @@ def enter_room(room_id):
     if not player_id:
         return jsonify({"error": "Player ID is required"}), 400
 
+    fan = FanOut(deadline=ENTER_ROOM_DEADLINE)
+
+    # ✅ Fetch everything that doesn't depend on another response concurrently
+    logger.debug(f"Fetching details for room {room_id}")
+    calls = {
+        "room": ("room", http_client.get, f"{ROOM_SERVICE_URL}/room/{room_id}"),
+        "room_interactions": ("player_room_interaction", http_client.get,
+                              f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/interactions")
+    }
     # Check if the player is trying to move to the next room (not room 0 - game start)
     if room_id > 0:
-        # First check if player has undefeated enemies in their current room
-        player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-        if player_response.status_code == 200:
-            player_data = player_response.json()
-            current_room_id = None
-            
-            # Get current room ID
-            for key in ["RoomID", "room_id"]:
-                if key in player_data and player_data[key] is not None:
-                    current_room_id = player_data[key]
-                    break
-                    
-            if current_room_id is not None and current_room_id > 0:
-                # Get enemies in current room
-                current_room_response = requests.get(f"{ROOM_SERVICE_URL}/room/{current_room_id}")
-                if current_room_response.status_code == 200:
-                    current_room = current_room_response.json()
-                    
-                    # Get all enemy IDs from the room
-                    room_enemy_ids = []
-                    if 'enemy_ids' in current_room and isinstance(current_room['enemy_ids'], list):
-                        room_enemy_ids = current_room['enemy_ids']
-                    elif 'EnemyIDs' in current_room and isinstance(current_room['EnemyIDs'], list):
-                        room_enemy_ids = current_room['EnemyIDs']
-                    elif 'enemies' in current_room and isinstance(current_room['enemies'], list):
-                        for enemy in current_room['enemies']:
-                            if isinstance(enemy, dict):
-                                enemy_id = enemy.get("id") or enemy.get("EnemyID")
-                                if enemy_id:
-                                    room_enemy_ids.append(enemy_id)
-                            elif isinstance(enemy, int):
-                                room_enemy_ids.append(enemy)
-                    
-                    logger.debug(f"Room {current_room_id} has enemies: {room_enemy_ids}")
-                    
-                    # If there are enemies in the room, check if all have been defeated
-                    if room_enemy_ids:
-                        # Get player's interactions with this room
-                        interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{current_room_id}/interactions"
-                        logger.debug(f"Checking player interactions: {interaction_url}")
-                        
-                        try:
-                            interaction_response = requests.get(interaction_url)
-                            if interaction_response.status_code == 200:
-                                interaction_data = interaction_response.json()
-                                logger.debug(f"Player interactions: {interaction_data}")
-                                
-                                # Get the list of enemies the player has defeated in this room
-                                defeated_enemies = interaction_data.get('enemies_defeated', [])
-                                logger.debug(f"Player has defeated enemies: {defeated_enemies}")
-                                
-                                # Check if there are undefeated enemies
-                                undefeated_enemies = [enemy_id for enemy_id in room_enemy_ids if enemy_id not in defeated_enemies]
-                                
-                                if undefeated_enemies:
-                                    logger.debug(f"Player {player_id} cannot proceed - undefeated enemies remain in room {current_room_id}: {undefeated_enemies}")
-                                    return jsonify({
-                                        "error": "You cannot leave this room until you defeat all enemies!",
-                                        "enemies_present": True
-                                    }), 403
-                            else:
-                                logger.error(f"Failed to get player interactions: {interaction_response.text}")
-                                # We'll be cautious and not allow the player to proceed if we can't verify
-                                return jsonify({
-                                    "error": "Could not verify enemy status. Please try again.",
-                                    "enemies_present": True
-                                }), 500
-                        except Exception as e:
-                            logger.error(f"Error checking player interactions: {str(e)}")
-                            return jsonify({
-                                "error": "Could not verify enemy status. Please try again.",
-                                "enemies_present": True
-                            }), 500
-
-    # ✅ Fetch room details
-    logger.debug(f"Fetching details for room {room_id}")
-    room_response = requests.get(f"{ROOM_SERVICE_URL}/room/{room_id}")
+        calls["player"] = ("player", http_client.get, f"{PLAYER_SERVICE_URL}/player/{player_id}")
+    results = fan.run(calls)
+
+    # First check if player has undefeated enemies in their current room
+    if room_id > 0:
+        blocked = _check_current_room_cleared(fan, player_id, results.get("player"))
+        if blocked:
+            return _respond(fan, *blocked)
+
+    # ✅ Room details
+    room_response = results["room"]
+    if room_response is None:
+        logger.error(f"Room service did not answer for room {room_id}")
+        return _respond(fan, {"error": "Room service unavailable"}, 503)
     if room_response.status_code != 200:
         logger.error(f"Room not found: {room_response.text}")
-        return jsonify({"error": "Room not found"}), 404
+        return _respond(fan, {"error": "Room not found"}, 404)
 
     room = room_response.json()
     logger.debug(f"Room data received: {room}")
     
-    # ✅ Check if door is locked - using BOOLEAN type directly
-    door_locked = False
-    
-    if "DoorLocked" in room:
-        # Get the boolean value directly
-        raw_value = room["DoorLocked"]
-        logger.debug(f"DoorLocked value: {raw_value}, Type: {type(raw_value).__name__}")
-        
-        # MySQL BOOLEAN is returned as a Python boolean in most cases
-        if isinstance(raw_value, bool):
-            door_locked = raw_value
-        else:
-            # Simple fallback for any non-boolean types
-            try:
-                # Convert to boolean (works for 0/1, "True"/"False", etc.)
-                door_locked = bool(raw_value)
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert DoorLocked value {raw_value} to boolean")
-    
-    # For room_id 3, verify the door is locked
-    if room_id == 3:
-        logger.debug(f"Room 3 door lock status: {door_locked}")
-        # Ensure door lock state matches what we expect for room 3
-        door_locked = True
-    
-    logger.debug(f"Final door locked status for room {room_id}: {door_locked}")
+    # ✅ Locked doors open for players who have held every item the room requires
+    door_locked = bool(room.get("door_locked", room.get("DoorLocked", False)))
+    logger.debug(f"Door locked status for room {room_id}: {door_locked}")
     
     if door_locked:
-        logger.debug(f"Room {room_id} door is locked, checking if player {player_id} has the key (item ID 5)")
-        
-        # Check inventory first - the player might have the key in their inventory
-        inventory_url = f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}"
-        logger.debug(f"Requesting inventory from: {inventory_url}")
-        
-        has_key = False
+        required_item_ids = room.get("required_item_ids") or []
+        logger.debug(f"Room {room_id} door is locked, checking if player {player_id} has held items {required_item_ids}")
+        locked_response = {
+            "error": "This door is locked! You need the right item to proceed.",
+            "door_locked": True,
+            "required_item_ids": required_item_ids
+        }
+        if not required_item_ids:
+            # No item opens this door
+            return _respond(fan, locked_response, 403)
         
         try:
-            # Check if the player has the key in their inventory
-            inventory_response = requests.get(inventory_url)
-            
-            if inventory_response.status_code == 200:
-                inventory_data = inventory_response.json()
-                logger.debug(f"Inventory data received: {inventory_data}")
-                
-                # The atomic inventory service returns {"player_id": X, "inventory": [1,2,3]}
-                item_ids = inventory_data.get("inventory", [])
-                logger.debug(f"Player's inventory item IDs: {item_ids}")
-                
-                # Check if item ID 5 (the lockpick) is in the inventory
-                has_key = 5 in item_ids
-                
-                logger.debug(f"Player has key in inventory: {has_key}")
-            
-            # If player doesn't have the key in inventory, check if they've picked it up before
-            # by looking at the player_room_interaction service
-            if not has_key:
-                # We need to check all previous rooms to see if the player picked up the key
-                # Get player interactions across all rooms
-                all_interactions_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/interactions"
-                interactions_response = requests.get(all_interactions_url)
-                
-                if interactions_response.status_code == 200:
-                    interactions_data = interactions_response.json()
-                    logger.debug(f"All player interactions: {interactions_data}")
-                    
-                    # Loop through all room interactions
-                    for interaction in interactions_data.get('interactions', []):
-                        # Check if item 5 was picked up in any room
-                        if 5 in interaction.get('items_picked', []):
-                            has_key = True
-                            logger.debug(f"Player has previously picked up the key in room {interaction.get('room_id')}")
-                            break
-                else:
-                    logger.error(f"Failed to check player's interaction history: {interactions_response.text}")
-            
-            if not has_key:
-                logger.debug("Player does not have the required key")
-                return jsonify({
-                    "error": "This door is locked! You need a Lockpick to proceed.",
-                    "door_locked": True
-                }), 403
-                
+            # One primary key lookup in the inventory service's ItemHeld table
+            held_response = fan.run({
+                "held": ("inventory", partial(http_client.get, params={"ids": ",".join(map(str, required_item_ids))}),
+                         f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}/held")
+            })["held"]
+            if held_response is None or held_response.status_code != 200:
+                logger.error("Failed to check the player's held items")
+                return _respond(fan, dict(locked_response, details="Could not check held items"), 403)
+            if not held_response.json().get("has_all"):
+                logger.debug(f"Player is missing items {held_response.json().get('missing')}")
+                return _respond(fan, locked_response, 403)
         except Exception as e:
             logger.error(f"Exception when checking for key: {str(e)}")
-            return jsonify({
-                "error": "This door is locked! You need a Lockpick to proceed.",
-                "door_locked": True,
-                "details": f"Error checking for key: {str(e)}"
-            }), 403
+            return _respond(fan, dict(locked_response, details=f"Error checking for key: {str(e)}"), 403)
 
-    # ✅ Update player's location
-    logger.debug(f"Setting player {player_id} location to room {room_id}")
-    update_response = requests.put(f"{PLAYER_SERVICE_URL}/player/{player_id}",
-                 json={"room_id": room_id})
-    if update_response.status_code != 200:
-        logger.error(f"Failed to update player location: {update_response.text}")
-    else:
-        logger.debug(f"Successfully updated player location to room {room_id}")
-
-    # ✅ Add score for entering room (+5)
-    try:
-        score_update_url = f"{PLAYER_SERVICE_URL}/player/{player_id}/score"
-        score_payload = {"points": 5}
-        score_response = requests.patch(score_update_url, json=score_payload)
+    room_name = room.get('name') or room.get('Name') or f"Room {room_id}"
 
-        if score_response.status_code != 200:
-            logger.warning(f"Score update failed: {score_response.status_code} - {score_response.text}")
-        else:
-            logger.debug(f"Score updated successfully for player {player_id} (entered room)")
-            # ✅ Log room entry and score together (combine)
-            room_name = "Unknown"
-            if isinstance(room, dict):
-                room_name = room.get('name') or room.get('Name') or f"Room {room_id}"
-            log_activity(player_id, f"Entered {room_name} (+5 score)")
+    # ✅ Item/enemy lookups and the player updates don't depend on each other
+    item_ids, items = _room_contents(room, "item")
+    enemy_ids, enemies = _room_contents(room, "enemy")
+    logger.debug(f"Found item IDs: {item_ids}")
+    logger.debug(f"Found enemy IDs: {enemy_ids}")
 
-    except Exception as e:
-        logger.error(f"Error updating score on room entry: {str(e)}")
+    logger.debug(f"Setting player {player_id} location to room {room_id}")
+    calls = {
+        # Move the player and add the score for entering the room (+5) in one update
+        "player": ("player", partial(http_client.patch, json={"sum_score": 5, "set": {"room_id": room_id}}),
+                   f"{PLAYER_SERVICE_URL}/player/{player_id}/stats")
+    }
+    # One multi-get per catalog instead of one request per entity
+    if item_ids:
+        calls["items"] = ("item", partial(http_client.get, params={"ids": ",".join(map(str, item_ids))}),
+                          f"{ITEM_SERVICE_URL}/items")
+    if enemy_ids:
+        calls["enemies"] = ("enemy", partial(http_client.get, params={"ids": ",".join(map(str, enemy_ids))}),
+                            f"{ENEMY_SERVICE_URL}/enemies")
+    results.update(fan.run(calls))
+
+    update_response = results["player"]
+    if update_response is None or update_response.status_code != 200:
+        logger.error("Failed to update player location and score")
+    else:
+        logger.debug(f"Moved player {player_id} to room {room_id} and added entry score")
+        # ✅ Log room entry and score together (combine)
+        log_activity(player_id, f"Entered {room_name} (+5 score)")
 
     # ✅ Log room entry via RabbitMQ
-    room_name = room.get('name') or room.get('Name') or f"Room {room_id}"
     log_activity(player_id, f"Entered Room {room_id}: {room_name}")
 
-
-    # ✅ Fetch items in the room - Handle all possible data structures
-    items = []
-
-    # Check different possible property names and formats for item IDs
-    item_ids = []
-    if 'item_ids' in room and isinstance(room['item_ids'], list):
-        item_ids = room['item_ids']
-    elif 'ItemIDs' in room and isinstance(room['ItemIDs'], list):
-        item_ids = room['ItemIDs']
-    elif 'items' in room and isinstance(room['items'], list):
-        # If the room has a direct items list
-        for item in room['items']:
-            if isinstance(item, dict):
-                items.append({
-                    "id": item.get("id") or item.get("ItemID", ""),
-                    "name": item.get("name") or item.get("Name", "Item"),
-                    "description": item.get("description") or item.get("Description", "No description")
-                })
-            elif isinstance(item, int):
-                item_ids.append(item)
-
-    # If we have item IDs to look up
-    logger.debug(f"Found item IDs: {item_ids}")
+    # ✅ Collect item and enemy details
+    found_items = _batch_by_id(results.get("items"), "item")
     for item_id in item_ids:
-        try:
-            item_url = f"{ITEM_SERVICE_URL}/item/{item_id}"
-            logger.debug(f"Fetching item from: {item_url}")
-            item_response = requests.get(item_url)
-
-            if item_response.status_code == 200:
-                item = item_response.json()
-                logger.debug(f"Item data received: {item}")
-
-                # More flexible property extraction
-                item_data = {
-                    "id": item_id,
-                    "name": "Item",
-                    "description": "No description available"
-                }
-
-                # Try multiple possible property names
-                for name_key in ["Name", "name"]:
-                    if name_key in item and item[name_key]:
-                        item_data["name"] = item[name_key]
-                        break
-
-                for desc_key in ["Description", "description"]:
-                    if desc_key in item and item[desc_key]:
-                        item_data["description"] = item[desc_key]
-                        break
-
-                for id_key in ["ItemID", "item_id", "id"]:
-                    if id_key in item and item[id_key]:
-                        item_data["id"] = item[id_key]
-                        break
-
-                items.append(item_data)
-            else:
-                logger.warning(
-                    f"Failed to get item {item_id}: {item_response.status_code} - {item_response.text}")
-        except Exception as e:
-            logger.error(f"Error getting item {item_id}: {str(e)}")
-
-    # ✅ Fetch enemies in the room - Handle all possible data structures
-    enemies = []
-
-    # Check different possible property names and formats for enemy IDs
-    enemy_ids = []
-    if 'enemy_ids' in room and isinstance(room['enemy_ids'], list):
-        enemy_ids = room['enemy_ids']
-    elif 'EnemyIDs' in room and isinstance(room['EnemyIDs'], list):
-        enemy_ids = room['EnemyIDs']
-    elif 'enemies' in room and isinstance(room['enemies'], list):
-        # If the room has a direct enemies list
-        for enemy in room['enemies']:
-            if isinstance(enemy, dict):
-                enemies.append({
-                    "id": enemy.get("id") or enemy.get("EnemyID", ""),
-                    "name": enemy.get("name") or enemy.get("Name", "Enemy"),
-                    "description": enemy.get("description") or enemy.get("Description", "No description")
-                })
-            elif isinstance(enemy, int):
-                enemy_ids.append(enemy)
+        if item_id in found_items:
+            items.append(_summarize(found_items[item_id], item_id, "item"))
+        else:
+            logger.warning(f"Failed to get item {item_id}")
 
-    # If we have enemy IDs to look up
-    logger.debug(f"Found enemy IDs: {enemy_ids}")
+    found_enemies = _batch_by_id(results.get("enemies"), "enemy")
     for enemy_id in enemy_ids:
-        try:
-            enemy_url = f"{ENEMY_SERVICE_URL}/enemy/{enemy_id}"
-            logger.debug(f"Fetching enemy from: {enemy_url}")
-            enemy_response = requests.get(enemy_url)
-
-            if enemy_response.status_code == 200:
-                enemy = enemy_response.json()
-                logger.debug(f"Enemy data received: {enemy}")
-
-                # More flexible property extraction
-                enemy_data = {
-                    "id": enemy_id,
-                    "name": "Enemy",
-                    "description": "No description available"
-                }
-
-                # Try multiple possible property names
-                for name_key in ["Name", "name"]:
-                    if name_key in enemy and enemy[name_key]:
-                        enemy_data["name"] = enemy[name_key]
-                        break
-
-                for desc_key in ["Description", "description"]:
-                    if desc_key in enemy and enemy[desc_key]:
-                        enemy_data["description"] = enemy[desc_key]
-                        break
-
-                for id_key in ["EnemyID", "enemy_id", "id"]:
-                    if id_key in enemy and enemy[id_key]:
-                        enemy_data["id"] = enemy[id_key]
-                        break
-
-                enemies.append(enemy_data)
-            else:
-                logger.warning(
-                    f"Failed to get enemy {enemy_id}: {enemy_response.status_code} - {enemy_response.text}")
-        except Exception as e:
-            logger.error(f"Error getting enemy {enemy_id}: {str(e)}")
+        if enemy_id in found_enemies:
+            enemies.append(_summarize(found_enemies[enemy_id], enemy_id, "enemy"))
+        else:
+            logger.warning(f"Failed to get enemy {enemy_id}")
 
     # ✅ Filter out items and enemies based on player interactions
     try:
-        # Get player's interactions with this specific room
-        interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/interactions"
-        logger.debug(f"Checking player room interactions: {interaction_url}")
-        
-        interaction_response = requests.get(interaction_url)
-        if interaction_response.status_code == 200:
+        interaction_response = results["room_interactions"]
+        if interaction_response is not None and interaction_response.status_code == 200:
             interaction_data = interaction_response.json()
             logger.debug(f"Player room interactions: {interaction_data}")
             
@@ -388,14 +322,10 @@ def enter_room(room_id):
             logger.debug(f"Player has defeated enemies: {defeated_enemies}")
             
             # Filter out items that have already been picked up
-            filtered_items = [item for item in items if item['id'] not in picked_items]
+            items = [item for item in items if item['id'] not in picked_items]
             
             # Filter out enemies that have already been defeated
-            filtered_enemies = [enemy for enemy in enemies if enemy['id'] not in defeated_enemies]
-            
-            # Update our lists
-            items = filtered_items
-            enemies = filtered_enemies
+            enemies = [enemy for enemy in enemies if enemy['id'] not in defeated_enemies]
             
             logger.debug(f"After filtering - Remaining items: {[item['id'] for item in items]}")
             logger.debug(f"After filtering - Remaining enemies: {[enemy['id'] for enemy in enemies]}")
@@ -414,7 +344,7 @@ def enter_room(room_id):
     }
 
     logger.debug(f"Returning room data: {response_data}")
-    return jsonify(response_data)
+    return _respond(fan, response_data)
 
 
 @app.route('/next_room', methods=['POST'])
@@ -432,7 +362,7 @@ def enter_next_room():
     
     # Get player's current room
     try:
-        player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
+        player_response = http_client.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
         if player_response.status_code != 200:
             logger.error(f"Failed to get player data: {player_response.text}")
             return jsonify({"error": "Could not retrieve player data"}), player_response.status_code
@@ -469,5 +399,19 @@ def enter_next_room():
         return jsonify({"error": f"Failed to process room progression: {str(e)}"}), 500
 
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5011, debug=True)
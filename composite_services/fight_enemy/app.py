@@ -1,10 +1,12 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import pika, json
 from datetime import datetime
 import logging
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
+from composite_services.utilities.dice import DicePoolRegistry
+from composite_services.utilities.combat import CombatSession, CombatSessionStore
 
 
 app = Flask(__name__)
@@ -16,11 +18,158 @@ logger = logging.getLogger(__name__)
 # ✅ Microservice URLs
 ENEMY_SERVICE_URL = os.getenv("ENEMY_SERVICE_URL", "http://enemy_service:5005")
 PLAYER_SERVICE_URL = os.getenv("PLAYER_SERVICE_URL", "http://player_service:5000")
-DICE_SERVICE_URL = os.getenv("DICE_SERVICE_URL", "http://personal-eamy64us.outsystemscloud.com/DiceService/rest/DiceRollAPI/RESTAPIMethod1")
 ROOM_SERVICE_URL = os.getenv("ROOM_SERVICE_URL", "http://room_service:5016")
 ACTIVITY_LOG_SERVICE_URL = os.getenv("ACTIVITY_LOG_SERVICE_URL", "http://activity_log_service:5013")
 PLAYER_ROOM_INTERACTION_SERVICE_URL = os.getenv("PLAYER_ROOM_INTERACTION_SERVICE_URL", "http://player_room_interaction_service:5040")
 
+# ✅ Dice are rolled in-process from a per-combat pool (see utilities/dice.py)
+dice_pools = DicePoolRegistry()
+
+# ✅ Fights in progress live here, keyed by combat id (bounded, idle ones expire)
+combat_sessions = CombatSessionStore()
+
+# Points awarded for defeating an enemy
+DEFEAT_POINTS = 50
+
+
+def combat_key(player_id, enemy_id):
+    """Identifies a player's fight with an enemy."""
+    return f"{int(player_id)}:{int(enemy_id)}"
+
+
+def record_outcome(session, combat_log):
+    """
+    Persists a finished combat once: one player stats patch, one
+    interaction write and one activity log event, however many turns it took.
+    """
+    if session.persisted:
+        return
+    session.persisted = True
+
+    player_id = session.player_id
+    enemy_name = session.enemy_name
+
+    if session.winner == "enemy":
+        log_activity(player_id, f"Defeated by {enemy_name}")
+        return
+
+    # ✅ Award the score and keep the health the player finished on, in one update
+    scored = False
+    try:
+        stats_response = http_client.patch(
+            f"{PLAYER_SERVICE_URL}/player/{player_id}/stats",
+            json={"sum_score": DEFEAT_POINTS, "set": {"current_health": session.player_health}}
+        )
+
+        if stats_response.status_code != 200:
+            logger.warning(f"Player update failed after enemy defeat: {stats_response.status_code} - {stats_response.text}")
+            combat_log.append("Victory registered, but score update failed.")
+        else:
+            logger.info(f"Score and health updated for player {player_id} after defeating {enemy_name}")
+            combat_log.append(f"You gained {DEFEAT_POINTS} points for defeating the enemy!")
+            scored = True
+    except Exception as e:
+        logger.error(f"Error while updating player after enemy defeat: {str(e)}")
+        combat_log.append("Could not update score due to server error.")
+
+    # Record enemy defeat in player_room_interaction service if room_id is provided
+    if session.room_id:
+        try:
+            logger.info(f"Player {player_id} defeated enemy {session.enemy_id} in room {session.room_id}")
+
+            interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{session.room_id}/enemy/{session.enemy_id}/defeat"
+            interaction_response = http_client.post(interaction_url)
+
+            if interaction_response.status_code in (200, 201):
+                logger.info(f"Successfully recorded enemy {session.enemy_id} defeat for player {player_id} in room {session.room_id}")
+                combat_log.append("Your victory was recorded.")
+            else:
+                logger.error(f"Failed to record enemy defeat: {interaction_response.status_code} - {interaction_response.text}")
+                combat_log.append("The enemy appears to be defeated, but something went wrong.")
+        except Exception as e:
+            logger.error(f"Error recording enemy defeat: {str(e)}")
+            logger.exception("Stack trace:")
+
+    # ✅ Log the victory once, with the score when it was awarded
+    if scored:
+        log_activity(player_id, f"Defeated {enemy_name} (+{DEFEAT_POINTS} score)")
+    else:
+        log_activity(player_id, f"Defeated {enemy_name}")
+
+    combat_log.append("You were victorious!")
+
+
+def combat_response(session, combat_log):
+    """Builds the attack/resolve response body from a session."""
+    return {
+        "combat_id": session.combat_id,
+        "combat_log": combat_log,
+        "player_health": session.player_health,
+        "enemy_health": session.enemy_health,
+        "turn": session.turn,
+        "rounds": session.rounds,
+        "is_combat_over": session.is_over,
+        "winner": session.winner,
+        "enemy_id": session.enemy_id,
+        "room_id": session.room_id
+    }
+
+
+def finish_if_over(session, combat_log):
+    """Persists the outcome and frees the session once the fight has ended."""
+    if not session.is_over:
+        return
+    record_outcome(session, combat_log)
+    combat_sessions.discard(session.combat_id)
+    dice_pools.discard(combat_key(session.player_id, session.enemy_id))
+
+
+def legacy_session(data):
+    """
+    Builds a throwaway session from a stateless attack request (the caller
+    sends the full combat state every turn). Returns (session, error_response).
+    """
+    player_id = data.get("player_id")
+    enemy_id = data.get("enemy_id")
+    room_id = data.get("room_id")  # Room ID parameter
+
+    # Validate critical parameters
+    if not enemy_id:
+        logger.error("Missing enemy_id parameter")
+        return None, (jsonify({"error": "enemy_id is required"}), 400)
+
+    if not player_id:
+        logger.error("Missing player_id parameter")
+        return None, (jsonify({"error": "player_id is required"}), 400)
+
+    # Validate room_id is provided
+    if not room_id:
+        logger.warning("Missing room_id parameter - enemy won't be removed from room on defeat")
+
+    # Convert any string values to integers
+    try:
+        enemy_id = int(enemy_id)
+        player_id = int(player_id)
+        if room_id:  # Only convert if it exists
+            room_id = int(room_id)
+    except (ValueError, TypeError):
+        logger.error(f"Invalid ID values: enemy_id={enemy_id}, player_id={player_id}, room_id={room_id}")
+        return None, (jsonify({"error": "Invalid ID values"}), 400)
+
+    session = CombatSession(
+        player_id=player_id,
+        enemy_id=enemy_id,
+        room_id=room_id,
+        enemy_name=data.get("enemy_name", "enemy"),
+        player_health=int(data.get("player_health", 100)),
+        enemy_health=int(data.get("enemy_health", 100)),
+        player_damage=int(data.get("player_damage", 10)),
+        enemy_damage=int(data.get("enemy_damage", 10)),
+        enemy_attack=int(data.get("enemy_attack", 1)),
+        dice=dice_pools.get(combat_key(player_id, enemy_id))
+    )
+    session.turn = data.get("turn", "player")
+    return session, None
 
 
 @app.route('/combat/start/<int:enemy_id>', methods=['POST'])
@@ -30,7 +179,7 @@ def start_combat(enemy_id):
         return jsonify({"error": "Player ID is required"}), 400
 
     # ✅ Fetch enemy details
-    enemy_response = requests.get(f"{ENEMY_SERVICE_URL}/enemy/{enemy_id}")
+    enemy_response = http_client.get(f"{ENEMY_SERVICE_URL}/enemy/{enemy_id}")
     if enemy_response.status_code != 200:
         return jsonify({"message": "No enemy found.", "combat": False}), 404
 
@@ -41,7 +190,7 @@ def start_combat(enemy_id):
     enemy_data = {k.lower(): v for k, v in enemy.items()}
     
     # ✅ Fetch player details
-    player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
+    player_response = http_client.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
     if player_response.status_code != 200:
         return jsonify({"error": "Player not found"}), 404
     
@@ -50,12 +199,35 @@ def start_combat(enemy_id):
     # Extract player health data
     player_max_health = player.get("max_health", player.get("MaxHealth", 100))
     player_current_health = player.get("current_health", player.get("CurrentHealth", player.get("health", player.get("Health", 100))))
+    player_damage = player.get("Damage", player.get("damage", 10))
+
+    # ✅ Seed this combat's dice pool (pass "seed" to replay a fight exactly)
+    try:
+        dice_pool = dice_pools.start(combat_key(player_id, enemy_id), request.json.get("seed"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # ✅ Keep the fight's state server-side; later turns only need the combat id
+    room_id = request.json.get("room_id")
+    session = combat_sessions.add(CombatSession(
+        player_id=int(player_id),
+        enemy_id=enemy_id,
+        room_id=int(room_id) if room_id else None,
+        enemy_name=enemy_data.get('name', 'Unknown Enemy'),
+        player_health=int(player_current_health),
+        enemy_health=int(enemy_data.get('health', 100)),
+        player_damage=int(player_damage),
+        enemy_damage=int(enemy_data.get('damage', 10)),
+        enemy_attack=int(enemy_data.get('attack', 1)),
+        dice=dice_pool
+    ))
 
     # ✅ Log combat start via RabbitMQ (using case-insensitive access)
     log_activity(player_id, f"Engaged in combat with {enemy_data.get('name', 'Unknown Enemy')}")
 
     return jsonify({
         "message": f"You encountered a {enemy_data.get('name', 'Unknown Enemy')}!",
+        "combat_id": session.combat_id,
         "enemy": {
             "id": enemy_id,
             "name": enemy_data.get('name', 'Unknown Enemy'),
@@ -69,14 +241,20 @@ def start_combat(enemy_id):
             "health": player_current_health,
             "current_health": player_current_health,
             "max_health": player_max_health,
-            "damage": player.get("Damage", player.get("damage", 10))
+            "damage": player_damage
         },
         "combat": True,
+        "dice_seed": dice_pool.seed,
         "turn": "player"  # Player always goes first
     })
 
 @app.route('/combat/attack', methods=['POST'])
 def attack():
+    """
+    Plays one round of a fight.
+    - With "combat_id": uses the server-side session from /combat/start
+    - Without it: the caller sends the full state (player_health, enemy_health, ...)
+    """
     try:
         data = request.get_json()
         if not data:
@@ -84,242 +262,85 @@ def attack():
             return jsonify({"error": "No data received"}), 400
             
         logger.debug(f"Attack request data: {data}")
-        
-        # Get parameters with defaults
-        player_id = data.get("player_id")
-        enemy_id = data.get("enemy_id")
-        player_health = int(data.get("player_health", 100))
-        enemy_health = int(data.get("enemy_health", 100))
-        player_damage = int(data.get("player_damage", 10))
-        enemy_damage = int(data.get("enemy_damage", 10))
-        enemy_attack = int(data.get("enemy_attack", 1))
-        current_turn = data.get("turn", "player")
-        enemy_name = data.get("enemy_name", "enemy")
-        room_id = data.get("room_id")  # Room ID parameter
-        
-        # Validate critical parameters
-        if not enemy_id:
-            logger.error("Missing enemy_id parameter")
-            return jsonify({"error": "enemy_id is required"}), 400
-            
-        if not player_id:
-            logger.error("Missing player_id parameter")
-            return jsonify({"error": "player_id is required"}), 400
-        
-        # Validate room_id is provided
-        if not room_id:
-            logger.warning("Missing room_id parameter - enemy won't be removed from room on defeat")
-            
-        # Convert any string values to integers
-        try:
-            enemy_id = int(enemy_id)
-            player_id = int(player_id)
-            if room_id:  # Only convert if it exists
-                room_id = int(room_id)
-        except (ValueError, TypeError):
-            logger.error(f"Invalid ID values: enemy_id={enemy_id}, player_id={player_id}, room_id={room_id}")
-            return jsonify({"error": "Invalid ID values"}), 400
-        
-        combat_log = []
-        is_combat_over = False
-        winner = None
-        
-        # Rest of your combat logic here
-        try:
-            # Roll dice for damage calculation
-            # dice_response = requests.get(f"{DICE_SERVICE_URL}/roll?sides=6&count=1")
-            dice_response = requests.get(f"{DICE_SERVICE_URL}")
-            
 
-            if dice_response.status_code != 200:
-                logger.error(f"Dice service error: {dice_response.text}")
+        combat_id = data.get("combat_id")
+        if combat_id:
+            session = combat_sessions.get(combat_id)
+            if session is None:
+                return jsonify({"error": "Combat not found or expired"}), 404
+        else:
+            session, error = legacy_session(data)
+            if error:
+                return error
+
+        with session.lock:
+            if session.is_over:
+                return jsonify({"error": "Combat is already over", **combat_response(session, [])}), 409
+
+            try:
+                combat_log = session.play_round()
+            except Exception as e:
+                logger.error(f"Dice error: {str(e)}")
                 return jsonify({"error": "Failed to roll dice"}), 500
-                
-            dice_data = dice_response.json()
-            # dice_roll = dice_data["results"][0]
-            dice_roll = dice_data
-            
-            if current_turn == "player":
-                # Player attacks enemy
-                total_damage = max(1, player_damage * dice_roll // 6)  # Adjust multiplier as needed
-                enemy_health -= total_damage
-                combat_log.append(f"You rolled a {dice_roll} and dealt {total_damage} damage to the {enemy_name}!")
-                
-                # Check if enemy defeated
-                if enemy_health <= 0:
-                    enemy_health = 0
-                    is_combat_over = True
-                    winner = "player"
-                    combat_log.append(f"You defeated the {enemy_name}!")
-
-                    # ✅ Update player's score for defeating the enemy
-                    try:
-                        update_score_url = f"{PLAYER_SERVICE_URL}/player/{player_id}/score"
-                        score_payload = {"points": 50}
-                        score_response = requests.patch(update_score_url, json=score_payload)
-
-                        if score_response.status_code != 200:
-                            logger.warning(f"Score update failed after enemy defeat: {score_response.status_code} - {score_response.text}")
-                            combat_log.append("Victory registered, but score update failed.")
-                        else:
-                            logger.info(f"Score updated for player {player_id} after defeating {enemy_name}")
-                            log_activity(player_id, f"Defeated {enemy_name} (+50 score)")
-                            combat_log.append("You gained 50 points for defeating the enemy!")
-                    except Exception as e:
-                        logger.error(f"Error while updating score after enemy defeat: {str(e)}")
-                        combat_log.append("Could not update score due to server error.")
-
-                    
-                    # Also update player's current health to preserve it
-                    try:
-                        update_response = requests.put(
-                            f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                            json={"current_health": player_health}
-                        )
-                        
-                        if update_response.status_code != 200:
-                            logger.warning(f"Failed to update player health after victory: {update_response.text}")
-                    except Exception as e:
-                        logger.error(f"Error updating player health after victory: {str(e)}")
-                    
-                    # Record enemy defeat in player_room_interaction service if room_id is provided
-                    if room_id:
-                        try:
-                            logger.info(f"Player {player_id} defeated enemy {enemy_id} in room {room_id}")
-                            
-                            # Record the defeat in player_room_interaction service
-                            interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/enemy/{enemy_id}/defeat"
-                            interaction_response = requests.post(interaction_url)
-                            
-                            if interaction_response.status_code in (200, 201):
-                                logger.info(f"Successfully recorded enemy {enemy_id} defeat for player {player_id} in room {room_id}")
-                                combat_log.append("Your victory was recorded.")
-                            else:
-                                logger.error(f"Failed to record enemy defeat: {interaction_response.status_code} - {interaction_response.text}")
-                                combat_log.append("The enemy appears to be defeated, but something went wrong.")
-                        except Exception as e:
-                            logger.error(f"Error recording enemy defeat: {str(e)}")
-                            logger.exception("Stack trace:")
-                    
-                    # Log victory and update player stats
-                    log_activity(player_id, f"Defeated {enemy_name}")
-                    
-                    # Fetch enemy details for points
-                    try:
-                        enemy_response = requests.get(f"{ENEMY_SERVICE_URL}/enemy/{enemy_id}")
-                        if enemy_response.status_code == 200:
-                            enemy = enemy_response.json()
-                            # Try different case formats for points
-                            points = enemy.get("Points", enemy.get("points", 50))
-                            
-                            # Remove score-related code
-                            combat_log.append("You were victorious!")
-                    except Exception as e:
-                        logger.error(f"Error processing victory rewards: {str(e)}")
-                        combat_log.append("You were victorious!")
-                else:
-                    # Switch turn to enemy
-                    current_turn = "enemy"
-            
-            if current_turn == "enemy" and not is_combat_over:
-                # Enemy attacks player
-                try:
-                    # enemy_dice_response = requests.get(f"{DICE_SERVICE_URL}/roll?sides=6&count=1")
-                    enemy_dice_response = requests.get(f"{DICE_SERVICE_URL}")
-
-                    enemy_dice_data = enemy_dice_response.json()
-                    # enemy_dice_roll = enemy_dice_data["results"][0]
-                    enemy_dice_roll = enemy_dice_data
-                    
-                    total_enemy_damage = max(1, enemy_damage * enemy_attack * enemy_dice_roll // 6)
-                    player_health -= total_enemy_damage
-                    combat_log.append(f"The {enemy_name} rolled a {enemy_dice_roll} and dealt {total_enemy_damage} damage to you!")
-                    
-                    # Check if player defeated
-                    if player_health <= 0:
-                        player_health = 0
-                        is_combat_over = True
-                        winner = "enemy"
-                        combat_log.append("You were defeated!")
-                        
-                
-                        
-                        # # Update player health in database to 25% of max health if defeated
-                        # try:
-                        #     # Get current player data first
-                        #     player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-                        #     if player_response.status_code == 200:
-                        #         player_data = player_response.json()
-                                
-                        #         # Handle different case formats for max health
-                        #         max_health = None
-                        #         for key in ["max_health", "MaxHealth"]:
-                        #             if key in player_data:
-                        #                 max_health = player_data[key]
-                        #                 break
-                                
-                        #         # Fall back to Health/health if no max_health is found
-                        #         if max_health is None:
-                        #             for key in ["Health", "health"]:
-                        #                 if key in player_data:
-                        #                     max_health = player_data[key]
-                        #                     break
-                                
-                        #         if max_health is None:
-                        #             max_health = 100  # Default if not found
-                                    
-                        #         # Calculate remaining health and ensure it's at least 1
-                        #         remaining_health = max(1, int(max_health * 0.25))
-                                
-                        #         # Update the player's current health
-                        #         update_response = requests.put(
-                        #             f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                        #             json={"current_health": remaining_health}
-                        #         )
-                                
-                        #         if update_response.status_code == 200:
-                        #             logger.info(f"Updated player {player_id} current health to {remaining_health}")
-                        #             player_health = remaining_health
-                        #             combat_log.append(f"You survived with {remaining_health} health remaining.")
-                        #         else:
-                        #             logger.error(f"Failed to update player health: {update_response.text}")
-                        #             combat_log.append("You survived with some health remaining.")
-                        #     else:
-                        #         logger.error(f"Failed to get player data: {player_response.text}")
-                        #         combat_log.append("You survived with some health remaining.")
-                        # except Exception as e:
-                        #     logger.error(f"Error updating player health after defeat: {str(e)}")
-                        #     player_health = 25  # Default if player update fails
-                        #     combat_log.append("You survived with some health remaining.")
-                        
-                        # Log defeat
-                        log_activity(player_id, f"Defeated by {enemy_name}")
-                    else:
-                        # Switch turn back to player
-                        current_turn = "player"
-                except Exception as e:
-                    logger.error(f"Error during enemy attack: {str(e)}")
-                    combat_log.append("The enemy tried to attack but missed.")
-                    current_turn = "player"  # Ensure turn passes to player
-        
-        except Exception as e:
-            logger.error(f"Error in combat processing: {str(e)}")
-            return jsonify({"error": f"Combat error: {str(e)}"}), 500
-        
-        return jsonify({
-            "combat_log": combat_log,
-            "player_health": player_health,
-            "enemy_health": enemy_health,
-            "turn": current_turn,
-            "is_combat_over": is_combat_over,
-            "winner": winner,
-            "enemy_id": enemy_id,
-            "room_id": room_id
-        })
+
+            finish_if_over(session, combat_log)
+            payload = combat_response(session, combat_log)
+
+        if not combat_id:
+            # Stateless callers never got a combat id
+            payload.pop("combat_id")
+        return jsonify(payload)
     
     except Exception as e:
         logger.error(f"Unhandled exception in attack endpoint: {str(e)}")
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route('/combat/<combat_id>/resolve', methods=['POST'])
+def resolve_combat(combat_id):
+    """
+    Plays every remaining turn of a fight in one request and persists the
+    outcome once.
+    """
+    session = combat_sessions.get(combat_id)
+    if session is None:
+        return jsonify({"error": "Combat not found or expired"}), 404
+
+    with session.lock:
+        if session.is_over:
+            return jsonify({"error": "Combat is already over", **combat_response(session, [])}), 409
+
+        try:
+            combat_log = session.resolve()
+        except Exception as e:
+            logger.error(f"Error resolving combat {combat_id}: {str(e)}")
+            return jsonify({"error": f"Combat error: {str(e)}"}), 500
+
+        finish_if_over(session, combat_log)
+        return jsonify(combat_response(session, combat_log))
+
+@app.route('/combat/<combat_id>', methods=['GET'])
+def get_combat(combat_id):
+    """
+    Returns the current state of a fight in progress.
+    """
+    session = combat_sessions.get(combat_id)
+    if session is None:
+        return jsonify({"error": "Combat not found or expired"}), 404
+    return jsonify(session.to_dict())
+
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5009, debug=True)
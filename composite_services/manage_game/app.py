@@ -1,9 +1,9 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import logging
 from datetime import datetime
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
 
 app = Flask(__name__)
 
@@ -26,20 +26,14 @@ def reset_character_progress(player_id):
     """
     logger.debug(f"Resetting progress for player {player_id}")
     
-    player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
+    # ✅ Reset player progress - restore full health and set room to 0
+    player_response = http_client.patch(f"{PLAYER_SERVICE_URL}/player/{player_id}/stats",
+                                        json={"set": {"room_id": 0, "sum_score": 0}, "restore_health": True})
     if player_response.status_code != 200:
         return jsonify({"error": "Player not found"}), 404
 
-    # Get player data to determine max health
-    player_data = player_response.json()
-    max_health = player_data.get("max_health", player_data.get("MaxHealth", 100))
-    
-    # ✅ Reset player progress - restore full health and set room to 0
-    requests.put(f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                 json={"current_health": max_health, "room_id": 0, "sum_score":0})
-
     # ✅ Reset all enemies
-    requests.get(f"{ENEMY_SERVICE_URL}/reset")
+    http_client.get(f"{ENEMY_SERVICE_URL}/reset")
 
     # ✅ Log reset via shared utility
     log_activity(player_id, "Game progress reset")
@@ -61,28 +55,21 @@ def full_game_reset(player_id):
     }
     
     try:
-        # Step 1: Verify player exists
-        player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-        if player_response.status_code != 200:
-            return jsonify({"error": "Player not found"}), 404
-            
-        player_data = player_response.json()
-        player_name = player_data.get("name", f"Player {player_id}")
-        logger.debug(f"Found player: {player_name}")
-        
-        # Get max health value
-        max_health = player_data.get("max_health", player_data.get("MaxHealth", 100))
-        
-        # Step 2: Reset player stats and location
+        # Step 1-2: Reset player stats and location (full health, base damage);
+        # a 404 means the player doesn't exist
+        player_name = f"Player {player_id}"
         try:
-            player_reset = requests.put(
-                f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                json={"current_health": max_health, "max_health": max_health, "damage": 10, "room_id": 0,"sum_score": 0},
+            player_reset = http_client.patch(
+                f"{PLAYER_SERVICE_URL}/player/{player_id}/stats", 
+                json={"set": {"damage": 10, "room_id": 0, "sum_score": 0}, "restore_health": True},
                 timeout=5
             )
+            if player_reset.status_code == 404:
+                return jsonify({"error": "Player not found"}), 404
             if player_reset.status_code == 200:
                 reset_results["player"] = True
-                logger.debug("Successfully reset player stats")
+                player_name = player_reset.json()["player"].get("name", player_name)
+                logger.debug(f"Successfully reset player stats for {player_name}")
             else:
                 logger.error(f"Failed to reset player: {player_reset.status_code}")
                 reset_results["errors"].append(f"Player reset failed: {player_reset.text}")
@@ -92,7 +79,7 @@ def full_game_reset(player_id):
         
         # Step 3: Clear player's inventory
         try:
-            inventory_reset = requests.delete(
+            inventory_reset = http_client.delete(
                 f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}",
                 timeout=5
             )
@@ -109,7 +96,7 @@ def full_game_reset(player_id):
         # Step 3.5: Reset player room interaction history
         try:
             logger.debug(f"Clearing player interaction history for player {player_id}")
-            player_interaction_reset = requests.post(
+            player_interaction_reset = http_client.post(
                 f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/reset",
                 timeout=5
             )
@@ -131,14 +118,14 @@ def full_game_reset(player_id):
             room_defaults = [
                 {"room_id": 1, "item_ids": [1, 2], "enemy_ids": [], "door_locked": False},
                 {"room_id": 2, "item_ids": [3,5], "enemy_ids": [1], "door_locked": False},
-                {"room_id": 3, "item_ids": [4], "enemy_ids": [2], "door_locked": True}
+                {"room_id": 3, "item_ids": [4], "enemy_ids": [2], "door_locked": True, "required_item_ids": [5]}
             ]
             
             room_update_success = True
             for room_data in room_defaults:
                 room_id = room_data.pop("room_id")  # Extract room_id from the data
                 try:
-                    room_reset = requests.put(
+                    room_reset = http_client.put(
                         f"{ROOM_SERVICE_URL}/room/{room_id}",
                         json=room_data,
                         timeout=5
@@ -200,52 +187,65 @@ def end_game(player_id):
     logger.info(f"Processing end of game for player {player_id}")
     
     try:
-        # Get current player data
-        player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-        if player_response.status_code != 200:
-            return jsonify({"error": "Player not found"}), 404
-            
-        player_data = player_response.json()
-        current_score = player_data.get("sum_score", 0)
         completion_bonus = 100  # Bonus for completing the game
+        final_score = None
         
-        # Update player's score with completion bonus
+        # Update player's score with completion bonus (the response carries the new total)
         try:
             update_score_url = f"{PLAYER_SERVICE_URL}/player/{player_id}/score"
             score_payload = {"points": completion_bonus}
-            score_response = requests.patch(update_score_url, json=score_payload, timeout=5)
+            score_response = http_client.patch(update_score_url, json=score_payload, timeout=5)
             
+            if score_response.status_code == 404:
+                return jsonify({"error": "Player not found"}), 404
             if score_response.status_code == 200:
-                new_score = score_response.json().get("new_sum_score", current_score + completion_bonus)
-                score_message = f"FINAL SCORE: {new_score} (includes +{completion_bonus} completion bonus!)"
+                final_score = score_response.json()["new_sum_score"]
+                score_message = f"FINAL SCORE: {final_score} (includes +{completion_bonus} completion bonus!)"
                 
                 # Log this achievement using the shared utility
                 log_activity(player_id, f"Completed the game! (+{completion_bonus} score)")
-                logger.info(f"Player {player_id} completed the game with final score {new_score}")
+                logger.info(f"Player {player_id} completed the game with final score {final_score}")
             else:
                 logger.warning(f"Failed to award completion bonus: {score_response.status_code}")
-                score_message = f"FINAL SCORE: {current_score}"
         except Exception as e:
             logger.error(f"Error updating score for game completion: {str(e)}")
-            score_message = f"FINAL SCORE: {current_score}"
-        
-        return jsonify({
+
+        if final_score is None:
+            # No bonus awarded: report the score the player already has
+            final_score = get_player_score(player_id)
+            score_message = f"FINAL SCORE: {final_score}" if final_score is not None else "FINAL SCORE: unavailable"
+
+        result = {
             "message": "Congratulations! You've completed the dungeon!",
             "description": "You've reached the end of your journey and emerged victorious!",
             "end_of_game": True,
-            "player_score": current_score + completion_bonus,
             "score_message": score_message
-        })
+        }
+        if final_score is not None:
+            result["player_score"] = final_score
+        return jsonify(result)
     except Exception as e:
         logger.error(f"Error creating end of game response: {str(e)}")
         return jsonify({
             "message": "Congratulations! You've completed the dungeon!",
             "description": "The game is over, but there was an error retrieving your final stats.",
             "end_of_game": True,
-            "player_score": 0,
-            "score_message": "FINAL SCORE: 0"
+            "score_message": "FINAL SCORE: unavailable"
         }), 500
 
+def get_player_score(player_id):
+    """
+    Reads the player's current sum_score, or None if it can't be fetched.
+    """
+    try:
+        response = http_client.get(f"{PLAYER_SERVICE_URL}/player/{player_id}", timeout=5)
+        if response.status_code == 200:
+            return response.json().get("sum_score")
+        logger.warning(f"Failed to fetch score for player {player_id}: {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error fetching score for player {player_id}: {str(e)}")
+    return None
+
 @app.route('/game/hard-reset/<int:player_id>', methods=['POST'])
 def hard_reset(player_id):
     """
@@ -263,34 +263,29 @@ def hard_reset(player_id):
     try:
         # 1. Reset player stats and location
         try:
-            # Get player data to find max health
-            player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
-            if player_response.status_code == 200:
-                player_data = player_response.json()
-                max_health = player_data.get("max_health", player_data.get("MaxHealth", 100))
-                
-                # Reset player to initial state
-                player_reset = requests.put(
-                    f"{PLAYER_SERVICE_URL}/player/{player_id}", 
-                    json={
-                        "current_health": max_health,
-                        "max_health": max_health,
+            # Reset player to initial state (full health, no reading MaxHealth first)
+            player_reset = http_client.patch(
+                f"{PLAYER_SERVICE_URL}/player/{player_id}/stats", 
+                json={
+                    "set": {
                         "damage": 10,
                         "room_id": 0,
                         "sum_score": 0  # Reset score to 0
                     },
-                    timeout=5
-                )
-                
-                if player_reset.status_code == 200:
-                    reset_results["player_reset"] = True
-                    logger.info(f"Successfully reset player {player_id} stats and location")
+                    "restore_health": True
+                },
+                timeout=5
+            )
+            
+            if player_reset.status_code == 200:
+                reset_results["player_reset"] = True
+                logger.info(f"Successfully reset player {player_id} stats and location")
         except Exception as e:
             logger.error(f"Error resetting player stats: {str(e)}")
             
         # 2. Clear player's inventory
         try:
-            inventory_reset = requests.delete(
+            inventory_reset = http_client.delete(
                 f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}",
                 timeout=5
             )
@@ -302,7 +297,7 @@ def hard_reset(player_id):
             
         # 3. Reset player-room interactions
         try:
-            interaction_reset = requests.post(
+            interaction_reset = http_client.post(
                 f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/reset",
                 timeout=5
             )
@@ -318,13 +313,13 @@ def hard_reset(player_id):
             room_defaults = [
                 {"room_id": 1, "item_ids": [1, 2], "enemy_ids": [], "door_locked": False},
                 {"room_id": 2, "item_ids": [3, 5], "enemy_ids": [1], "door_locked": False},
-                {"room_id": 3, "item_ids": [4], "enemy_ids": [2], "door_locked": True}
+                {"room_id": 3, "item_ids": [4], "enemy_ids": [2], "door_locked": True, "required_item_ids": [5]}
             ]
             
             room_reset_success = True
             for room_data in room_defaults:
                 room_id = room_data.pop("room_id")  # Extract room_id from the data
-                room_reset = requests.put(
+                room_reset = http_client.put(
                     f"{ROOM_SERVICE_URL}/room/{room_id}",
                     json=room_data,
                     timeout=5
@@ -366,5 +361,19 @@ def hard_reset(player_id):
             "details": reset_results
         }), 500
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5014, debug=True)
\ No newline at end of file
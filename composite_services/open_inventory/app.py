@@ -1,10 +1,10 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import pika, json
 from datetime import datetime
 import logging
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
 
 
 app = Flask(__name__)
@@ -19,6 +19,32 @@ ITEM_SERVICE_URL = os.getenv("ITEM_SERVICE_URL", "http://item_service:5002")
 ACTIVITY_LOG_SERVICE_URL = os.getenv("ACTIVITY_LOG_SERVICE_URL", "http://activity_log_service:5013")
 
 
+def fetch_items(item_ids):
+    """
+    Fetches several items from the item service in a single multi-get call.
+    Returns {item_id: item}; ids that are missing or could not be fetched
+    are left out.
+    """
+    if not item_ids:
+        return {}
+
+    ids_param = ",".join(str(item_id) for item_id in item_ids)
+    try:
+        response = http_client.get(f"{ITEM_SERVICE_URL}/items", params={"ids": ids_param})
+    except Exception as e:
+        logger.error(f"Error fetching items {item_ids}: {str(e)}")
+        return {}
+
+    if response.status_code != 200:
+        logger.warning(f"Failed to get items {item_ids}: {response.status_code} - {response.text}")
+        return {}
+
+    body = response.json()
+    if body.get("missing"):
+        logger.warning(f"Items not found: {body['missing']}")
+    return {item["item_id"]: item for item in body.get("items", [])}
+
+
 @app.route('/inventory/<int:player_id>', methods=['GET'])
 def view_inventory(player_id):
     """
@@ -26,20 +52,20 @@ def view_inventory(player_id):
     """
 
     # ✅ Step 1: Fetch inventory
-    inventory_response = requests.get(f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}")
+    inventory_response = http_client.get(f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}")
     if inventory_response.status_code != 200:
         return jsonify({"error": "Inventory could not be retrieved."}), 500
 
     inventory_data = inventory_response.json()
     item_ids = inventory_data.get("inventory", [])
 
-    # ✅ Step 2: Fetch item details and enhance inventory items
+    # ✅ Step 2: Fetch item details in one call and enhance inventory items
+    items_by_id = fetch_items(item_ids)
     enhanced_inventory = []
     for item_id in item_ids:
-        item_response = requests.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
+        item_info = items_by_id.get(item_id)
         
-        if item_response.status_code == 200:
-            item_info = item_response.json()
+        if item_info is not None:
             # Create enhanced item with name and description
             # The item service might be using capitalized field names
             enhanced_item = {
@@ -77,13 +103,16 @@ def fetch_item_details_batch():
     if not item_ids:
         return jsonify({"error": "Item IDs are required"}), 400
 
+    try:
+        item_ids = [int(item_id) for item_id in item_ids]
+    except (ValueError, TypeError):
+        return jsonify({"error": "Item IDs must be integers"}), 400
+
+    items_by_id = fetch_items(item_ids)
     items = []
     for item_id in item_ids:
-        # Call the item service to get item details
-        item_response = requests.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
-        
-        if item_response.status_code == 200:
-            items.append(item_response.json())
+        if item_id in items_by_id:
+            items.append(items_by_id[item_id])
         else:
             # Include a placeholder for failed items
             items.append({
@@ -94,5 +123,19 @@ def fetch_item_details_batch():
 
     return jsonify({"items": items})
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5010, debug=True)
@@ -1,10 +1,10 @@
 from flask import Flask, jsonify, request
-import requests
 import os
 import logging
 from datetime import datetime
 import time
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
 
 PLAYER_SERVICE_URL = os.getenv("PLAYER_SERVICE_URL", "http://player_service:5000")
 
@@ -42,7 +42,7 @@ def pick_up_item(room_id, item_id):
         f"Attempting to pick up item {item_id} from room {room_id} for player {player_id}")
 
     # Step 1: Check if the item exists in the room
-    room_response = requests.get(f"{ROOM_SERVICE_URL}/room/{room_id}")
+    room_response = http_client.get(f"{ROOM_SERVICE_URL}/room/{room_id}")
     if room_response.status_code != 200:
         logger.warning(f"Room {room_id} not found: {room_response.text}")
         return jsonify({"error": "Room not found"}), 404
@@ -71,7 +71,7 @@ def pick_up_item(room_id, item_id):
         return jsonify({"error": "Item not found in the room"}), 404
 
     # Step 2: Get item details to include in the activity log
-    item_response = requests.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
+    item_response = http_client.get(f"{ITEM_SERVICE_URL}/item/{item_id}")
     if item_response.status_code != 200:
         logger.error(f"Failed to get item details: {item_response.text}")
         return jsonify({"error": "Failed to get item details"}), 500
@@ -90,8 +90,8 @@ def pick_up_item(room_id, item_id):
 
     # Step 3: Check if the player has already picked up this item
     # by querying the player_room_interaction service
-    interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/interactions"
-    interaction_response = requests.get(interaction_url)
+    interaction_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/items/picked"
+    interaction_response = http_client.get(interaction_url, params={"ids": item_id})
     
     if interaction_response.status_code == 200:
         interaction_data = interaction_response.json()
@@ -108,7 +108,7 @@ def pick_up_item(room_id, item_id):
 
     # Step 4: Record that the player picked up the item using player_room_interaction service
     pickup_url = f"{PLAYER_ROOM_INTERACTION_SERVICE_URL}/player/{player_id}/room/{room_id}/item/{item_id}/pickup"
-    pickup_response = requests.post(pickup_url)
+    pickup_response = http_client.post(pickup_url)
     
     if pickup_response.status_code not in (200, 201):
         logger.error(f"Failed to record item pickup in player_room_interaction service: {pickup_response.text}")
@@ -119,7 +119,7 @@ def pick_up_item(room_id, item_id):
     # Step 5: Add the item to the player's inventory
     inventory_url = f"{INVENTORY_SERVICE_URL}/inventory/player/{player_id}/item/{item_id}"
     logger.debug(f"Adding item to inventory: {inventory_url}")
-    inventory_response = requests.post(inventory_url)
+    inventory_response = http_client.post(inventory_url)
 
     if inventory_response.status_code != 201:
         logger.error(
@@ -134,7 +134,7 @@ def pick_up_item(room_id, item_id):
     try:
         update_score_url = f"{PLAYER_SERVICE_URL}/player/{player_id}/score"
         score_payload = {"points": 10}
-        score_response = requests.patch(update_score_url, json=score_payload)
+        score_response = http_client.patch(update_score_url, json=score_payload)
         
         if score_response.status_code != 200:
             logger.warning(f"Score update failed: {score_response.status_code} - {score_response.text}")
@@ -167,7 +167,7 @@ def pick_up_item(room_id, item_id):
         }
         
         logger.debug(f"Calling apply_item_effects service: {effects_url} with data: {effects_data}")
-        effects_response = requests.post(effects_url, json=effects_data)
+        effects_response = http_client.post(effects_url, json=effects_data)
         
         if effects_response.status_code == 200:
             effects_data = effects_response.json()
@@ -215,5 +215,19 @@ def activity_log():
         return jsonify({"error": "Failed to log activity"}), 500
 
 
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5019, debug=True)
\ No newline at end of file
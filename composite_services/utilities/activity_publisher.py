@@ -0,0 +1,440 @@
+# composite_services/utilities/activity_publisher.py
+import pika
+import logging
+import os
+import time
+import queue
+import threading
+from collections import deque
+import json
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# RabbitMQ configuration
+RABBITMQ_HOST = os.getenv("RABBITMQ_HOST", "rabbitmq")
+ACTIVITY_LOG_QUEUE = "activity_log_queue"
+
+# Publisher configuration
+ACTIVITY_BUFFER_SIZE = int(os.getenv("ACTIVITY_BUFFER_SIZE", "10000"))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "100"))
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "0.5"))  # seconds
+ACTIVITY_RECONNECT_MAX_DELAY = float(os.getenv("ACTIVITY_RECONNECT_MAX_DELAY", "30"))
+ACTIVITY_SHUTDOWN_TIMEOUT = float(os.getenv("ACTIVITY_SHUTDOWN_TIMEOUT", "2"))
+# Nacks of the same message before it is set aside (spooled, or dropped without a spool)
+ACTIVITY_MAX_NACKS = int(os.getenv("ACTIVITY_MAX_NACKS", "5"))
+
+
+class ActivityPublisher:
+    """
+    Publishes activity messages to RabbitMQ from a background thread.
+
+    Callers only put the message on a bounded in-memory buffer, so they
+    never wait on the broker. The background thread runs one long-lived
+    SelectConnection with publisher confirms. It takes up to
+    ACTIVITY_BATCH_SIZE buffered messages, publishes them all back to back
+    and then waits for their confirms, tracked by delivery tag (the broker
+    usually acks a whole batch with one multiple=True ack). So a batch costs
+    one round-trip, not one per message; the next batch goes out once the
+    previous one is confirmed. Reconnects with backoff if the broker goes
+    away, republishing whatever was unconfirmed.
+
+    With a `spool` (see spool.Spool), messages go to local disk while the
+    broker is unreachable (or the buffer is full), and the thread replays
+    the spool into the queue, one confirmed batch at a time, once the
+    broker is back. Without one, or if the spool is unusable, such messages
+    are dropped and counted.
+
+    Nacked messages are retried after the same backoff as a reconnect;
+    after ACTIVITY_MAX_NACKS nacks a message is set aside (spooled, or
+    dropped) so one message the broker keeps refusing can't hold up the rest.
+    """
+
+    def __init__(self, host=RABBITMQ_HOST, queue_name=ACTIVITY_LOG_QUEUE,
+                 buffer_size=ACTIVITY_BUFFER_SIZE, batch_size=ACTIVITY_BATCH_SIZE, spool=None):
+        self.host = host
+        self.queue_name = queue_name
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self._buffer = queue.Queue(maxsize=buffer_size)
+        # (message, nacks) taken off the buffer, waiting to be published
+        self._pending = deque()
+        # delivery tag -> (message, nacks) published but not yet confirmed
+        # (nacks is None for messages replayed from the spool)
+        self._in_flight = {}
+        # Nacked messages of the batch in flight, to go out again after it
+        self._retry = []
+        self._batch_nacked = False
+        self._batch_len = 0
+        # (segment, end_offset, count) while a spool batch is in flight
+        self._replaying = None
+        self._next_tag = 1
+        self._delay = 1.0
+        self._connection = None
+        self._channel = None
+        self._opened = False
+        self._timer = None
+        # Set when the thread found nothing to send, so publish() wakes it
+        self._idle = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.connected = False
+        # Set once a connection attempt fails or a live connection is lost
+        self.broker_down = False
+        self.spool = spool
+        self._counters = {
+            "enqueued": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "published": 0,
+            "dropped": 0,
+            "nacked": 0,
+            "batches": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "connects": 0,
+            "connect_failures": 0
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def start(self):
+        """Starts the background thread if it is not already running."""
+        # Restart the thread after a fork (threads don't survive it)
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="activity-publisher", daemon=True)
+            self._thread.start()
+
+    def publish(self, message):
+        """
+        Buffers a message for publishing, or spools it to disk while the
+        broker is down or the buffer is full. Returns False (and counts a
+        drop) only if neither worked; never blocks on the broker.
+        """
+        self.start()
+        if not self.broker_down:
+            try:
+                self._buffer.put_nowait(message)
+                self._count("enqueued")
+                if self._idle:
+                    self._wake()
+                return True
+            except queue.Full:
+                pass
+
+        if self._spool_message(message):
+            return True
+        self._count("dropped")
+        logger.warning(f"Activity buffer full ({self.buffer_size}) and spool unavailable, dropping message")
+        return False
+
+    def _wake(self):
+        """Asks the (idle) publisher thread to send what is buffered now."""
+        connection = self._connection
+        if connection is None:
+            return
+        self._idle = False
+        try:
+            connection.ioloop.add_callback_threadsafe(lambda: self._schedule(0))
+        except Exception:
+            # Closing; the thread picks the buffer up after reconnecting
+            pass
+
+    def _spool_message(self, message):
+        if self.spool is None or not self.spool.append(message):
+            return False
+        self._count("spooled")
+        return True
+
+    def _spill_to_spool(self):
+        """Moves everything held in memory to the spool (broker is down)."""
+        if self.spool is None:
+            return
+        while self._pending:
+            if not self._spool_message(self._pending[0][0]):
+                return
+            self._pending.popleft()
+        while True:
+            try:
+                message = self._buffer.get_nowait()
+            except queue.Empty:
+                return
+            if not self._spool_message(message):
+                # Keep it for when the broker returns
+                self._pending.append((message, 0))
+                return
+
+    def _connect(self):
+        return pika.SelectConnection(
+            pika.ConnectionParameters(
+                host=self.host,
+                heartbeat=30,
+                connection_attempts=1,
+                socket_timeout=5,
+                blocked_connection_timeout=30
+            ),
+            on_open_callback=self._on_connection_open,
+            on_open_error_callback=self._on_connection_open_error,
+            on_close_callback=self._on_connection_closed
+        )
+
+    def _on_connection_open(self, connection):
+        self._opened = True
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_open_error(self, connection, error):
+        logger.error(f"Failed to connect to RabbitMQ: {error!r}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        if self._opened:
+            logger.error(f"Activity publisher lost its RabbitMQ connection: {str(reason)}")
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        channel.add_on_close_callback(self._on_channel_closed)
+        # Ensure the queue exists and is durable
+        channel.queue_declare(
+            queue=self.queue_name, durable=True,
+            callback=lambda frame: channel.confirm_delivery(
+                ack_nack_callback=self._on_confirm,
+                callback=lambda frame: self._on_ready(channel)
+            )
+        )
+
+    def _on_channel_closed(self, channel, reason):
+        self._channel = None
+        connection = self._connection
+        if connection is not None and not (connection.is_closing or connection.is_closed):
+            connection.close()
+
+    def _on_ready(self, channel):
+        # Broker acknowledges every publish, so a message is only forgotten once it's safe
+        self._channel = channel
+        self._next_tag = 1
+        self._delay = 1.0
+        self.connected = True
+        self.broker_down = False
+        self._count("connects")
+        logger.info(f"Activity publisher connected to RabbitMQ at {self.host}")
+        self._schedule(0)
+
+    def _schedule(self, delay):
+        """Runs _pump() after `delay` seconds, replacing any earlier schedule."""
+        connection = self._connection
+        if connection is None:
+            return
+        if self._timer is not None:
+            connection.ioloop.remove_timeout(self._timer)
+        self._timer = connection.ioloop.call_later(delay, self._pump)
+
+    def _fill_pending(self):
+        """Takes up to a batch of whatever is buffered."""
+        while len(self._pending) < self.batch_size:
+            try:
+                self._pending.append((self._buffer.get_nowait(), 0))
+            except queue.Empty:
+                break
+
+    def _pump(self):
+        """Sends the next batch, unless one is still waiting for confirms."""
+        self._timer = None
+        if self.spool is not None:
+            self.spool.sync()
+        if self._in_flight or self._channel is None:
+            return
+
+        self._fill_pending()
+        if self._pending:
+            entries = list(self._pending)
+            self._pending.clear()
+            self._publish_batch(entries)
+            return
+
+        batch = self.spool.read_batch(self.batch_size) if self.spool is not None and self.spool.has_backlog() else None
+        if batch is not None:
+            segment, end_offset, messages = batch
+            if not messages:
+                # Nothing usable in that stretch (corrupt lines); move past it
+                self.spool.commit(segment, end_offset, 0)
+                self._schedule(0)
+                return
+            self._replaying = (segment, end_offset, len(messages))
+            self._publish_batch([(message, None) for message in messages])
+            return
+
+        # Idle: publish() wakes us; the timer is a fallback and keeps the spool synced
+        self._idle = True
+        self._schedule(ACTIVITY_FLUSH_INTERVAL)
+
+    def _publish_batch(self, entries):
+        """Publishes every entry back to back; _on_confirm() settles them."""
+        # Tracked before sending, so a failure part way requeues them all
+        tags = []
+        for entry in entries:
+            self._in_flight[self._next_tag] = entry
+            tags.append(self._next_tag)
+            self._next_tag += 1
+        self._batch_len = len(entries)
+        try:
+            for tag in tags:
+                self._send(self._channel, self._in_flight[tag][0])
+        except Exception as e:
+            # The channel is going away; _on_connection_closed requeues what is in flight
+            logger.error(f"Failed to publish activity batch: {str(e)}")
+
+    def _send(self, channel, message):
+        channel.basic_publish(
+            exchange='',
+            routing_key=self.queue_name,
+            body=json.dumps(message),
+            properties=pika.BasicProperties(
+                delivery_mode=2  # Make message persistent
+            )
+        )
+
+    def _on_confirm(self, frame):
+        """Ack/nack for one delivery tag, or for every tag up to it (multiple)."""
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = sorted(tag for tag in self._in_flight if tag <= method.delivery_tag)
+        else:
+            tags = [method.delivery_tag]
+        for tag in tags:
+            entry = self._in_flight.pop(tag, None)
+            if entry is None:
+                continue
+            message, nacks = entry
+            if acked:
+                if nacks is not None:
+                    self._count("published")
+                continue
+            self._count("nacked")
+            self._batch_nacked = True
+            if nacks is None:
+                # Spooled: the checkpoint isn't moved, so the batch is replayed again
+                continue
+            if nacks + 1 >= ACTIVITY_MAX_NACKS:
+                self._set_aside(message)
+            else:
+                self._retry.append((message, nacks + 1))
+        if not self._in_flight:
+            self._batch_done()
+
+    def _batch_done(self):
+        if self._replaying is not None:
+            segment, end_offset, count = self._replaying
+            self._replaying = None
+            if not self._batch_nacked:
+                self.spool.commit(segment, end_offset, count)
+                self._count("replayed", count)
+                self._count("published", count)
+        else:
+            with self._lock:
+                self._counters["batches"] += 1
+                self._counters["last_batch_size"] = self._batch_len
+                self._counters["max_batch_size"] = max(self._counters["max_batch_size"], self._batch_len)
+
+        # Nacked messages go out first next time, in their original order
+        self._pending.extendleft(reversed(self._retry))
+        self._retry = []
+        if self._batch_nacked:
+            # Retrying straight away would spin against a broker that is refusing
+            # messages (e.g. a full queue with overflow=reject-publish)
+            self._batch_nacked = False
+            logger.warning(f"RabbitMQ nacked activity messages. Retrying in {self._delay:.0f}s")
+            self._schedule(self._delay)
+            self._delay = min(self._delay * 2, ACTIVITY_RECONNECT_MAX_DELAY)
+        else:
+            self._delay = 1.0
+            self._schedule(0)
+
+    def _requeue_in_flight(self):
+        """After losing the connection: unconfirmed messages are sent again."""
+        entries = [self._in_flight[tag] for tag in sorted(self._in_flight)]
+        self._in_flight = {}
+        # Spooled ones stay in the spool (the checkpoint wasn't moved)
+        self._pending.extendleft(reversed(self._retry + [entry for entry in entries if entry[1] is not None]))
+        self._retry = []
+        self._batch_nacked = False
+        self._replaying = None
+
+    def _set_aside(self, message):
+        """Gives up on publishing a message for now: spools it, or drops it."""
+        if self._spool_message(message):
+            logger.warning(f"Activity message nacked {ACTIVITY_MAX_NACKS} times, moved to the spool")
+            return
+        self._count("dropped")
+        logger.error(f"Activity message nacked {ACTIVITY_MAX_NACKS} times, dropping it")
+
+    def _wait(self, delay):
+        """Sleeps before reconnecting, fsyncing spooled writes meanwhile."""
+        until = time.monotonic() + delay
+        while time.monotonic() < until:
+            if self.spool is not None:
+                self.spool.sync()
+            time.sleep(min(0.1, max(0.0, until - time.monotonic())))
+
+    def _run(self):
+        while True:
+            self._opened = False
+            self._timer = None
+            try:
+                self._connection = self._connect()
+                # Returns once the connection has closed (or failed to open)
+                self._connection.ioloop.start()
+            except Exception as e:
+                logger.error(f"Activity publisher connection failed: {str(e)}")
+            self._connection = None
+            self._channel = None
+            self._idle = False
+            self.connected = False
+            self.broker_down = True
+            self._requeue_in_flight()
+            if self._opened:
+                # Lost a live connection: reconnect straight away
+                continue
+
+            self._count("connect_failures")
+            self._spill_to_spool()
+            if self.spool is not None:
+                self.spool.sync(force=True)
+            logger.error(f"Activity publisher can't reach RabbitMQ at {self.host}. Retrying in {self._delay:.0f}s")
+            self._wait(self._delay)
+            self._delay = min(self._delay * 2, ACTIVITY_RECONNECT_MAX_DELAY)
+
+    def flush(self, timeout=ACTIVITY_SHUTDOWN_TIMEOUT):
+        """Waits up to `timeout` seconds for buffered messages to be confirmed."""
+        deadline = time.monotonic() + timeout
+        while (self._buffer.qsize() or self._pending or self._in_flight) and time.monotonic() < deadline:
+            if not self.connected:
+                break
+            time.sleep(0.05)
+        # Whatever is still in memory goes to disk so it survives the restart
+        # (unconfirmed messages too: at least once, so a duplicate is fine)
+        if self.spool is not None:
+            for message, nacks in list(self._in_flight.values()):
+                if nacks is not None:
+                    self._spool_message(message)
+        self._spill_to_spool()
+        if self.spool is not None:
+            self.spool.sync(force=True)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats["queue_depth"] = self._buffer.qsize() + len(self._pending) + len(self._in_flight)
+        stats["buffer_size"] = self.buffer_size
+        stats["connected"] = self.connected
+        stats["spool"] = self.spool.stats() if self.spool is not None else None
+        return stats
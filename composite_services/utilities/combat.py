@@ -0,0 +1,180 @@
+# composite_services/utilities/combat.py
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+
+from composite_services.utilities.dice import DICE_SIDES
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Combat session configuration
+MAX_COMBAT_SESSIONS = int(os.getenv("MAX_COMBAT_SESSIONS", "10000"))
+COMBAT_IDLE_TIMEOUT = float(os.getenv("COMBAT_IDLE_TIMEOUT", "900"))  # seconds
+# Safety cap for /combat/<id>/resolve; every round deals at least 1 damage
+MAX_COMBAT_ROUNDS = int(os.getenv("MAX_COMBAT_ROUNDS", "1000"))
+
+
+def player_hit(damage, roll, sides=DICE_SIDES, maximum=max):
+    """
+    Damage the player deals for one roll. Pass maximum=numpy.maximum to
+    evaluate whole arrays of fights at once.
+    """
+    return maximum(1, damage * roll // sides)
+
+
+def enemy_hit(damage, attack, roll, sides=DICE_SIDES, maximum=max):
+    """
+    Damage an enemy deals for one roll. Pass maximum=numpy.maximum to
+    evaluate whole arrays of fights at once.
+    """
+    return maximum(1, damage * attack * roll // sides)
+
+
+class CombatSession:
+    """
+    Server-side state of one fight. A round is the player's swing followed
+    by the enemy's, exactly as /combat/attack has always played it.
+    """
+
+    def __init__(self, player_id, enemy_id, player_health, enemy_health,
+                 player_damage, enemy_damage, enemy_attack, dice,
+                 enemy_name="enemy", room_id=None, combat_id=None):
+        self.combat_id = combat_id or uuid.uuid4().hex
+        self.player_id = player_id
+        self.enemy_id = enemy_id
+        self.room_id = room_id
+        self.enemy_name = enemy_name
+        self.player_health = player_health
+        self.enemy_health = enemy_health
+        self.player_damage = player_damage
+        self.enemy_damage = enemy_damage
+        self.enemy_attack = enemy_attack
+        self.dice = dice
+        self.turn = "player"
+        self.rounds = 0
+        self.is_over = False
+        self.winner = None
+        self.persisted = False
+        self.last_active = time.monotonic()
+        # Held by whoever is playing turns so concurrent requests can't interleave
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def play_round(self):
+        """Plays the current turn(s) and returns the combat log lines."""
+        combat_log = []
+
+        if self.turn == "player":
+            dice_roll = self.dice.roll()
+            total_damage = player_hit(self.player_damage, dice_roll)
+            self.enemy_health -= total_damage
+            combat_log.append(f"You rolled a {dice_roll} and dealt {total_damage} damage to the {self.enemy_name}!")
+
+            if self.enemy_health <= 0:
+                self.enemy_health = 0
+                self.is_over = True
+                self.winner = "player"
+                combat_log.append(f"You defeated the {self.enemy_name}!")
+            else:
+                self.turn = "enemy"
+
+        if self.turn == "enemy" and not self.is_over:
+            try:
+                enemy_dice_roll = self.dice.roll()
+                total_enemy_damage = enemy_hit(self.enemy_damage, self.enemy_attack, enemy_dice_roll)
+                self.player_health -= total_enemy_damage
+                combat_log.append(f"The {self.enemy_name} rolled a {enemy_dice_roll} and dealt {total_enemy_damage} damage to you!")
+
+                if self.player_health <= 0:
+                    self.player_health = 0
+                    self.is_over = True
+                    self.winner = "enemy"
+                    combat_log.append("You were defeated!")
+                else:
+                    self.turn = "player"
+            except Exception as e:
+                logger.error(f"Error during enemy attack: {str(e)}")
+                combat_log.append("The enemy tried to attack but missed.")
+                self.turn = "player"
+
+        self.rounds += 1
+        self.touch()
+        return combat_log
+
+    def resolve(self, max_rounds=MAX_COMBAT_ROUNDS):
+        """Plays every remaining round and returns the combined combat log."""
+        combat_log = []
+        while not self.is_over and self.rounds < max_rounds:
+            combat_log.extend(self.play_round())
+        return combat_log
+
+    def to_dict(self):
+        return {
+            "combat_id": self.combat_id,
+            "player_id": self.player_id,
+            "enemy_id": self.enemy_id,
+            "room_id": self.room_id,
+            "player_health": self.player_health,
+            "enemy_health": self.enemy_health,
+            "turn": self.turn,
+            "rounds": self.rounds,
+            "is_combat_over": self.is_over,
+            "winner": self.winner
+        }
+
+
+class CombatSessionStore:
+    """
+    In-memory combat sessions keyed by combat id. Bounded to `max_sessions`
+    (least recently used evicted first) and sessions idle for longer than
+    `idle_timeout` seconds are dropped.
+    """
+
+    def __init__(self, max_sessions=MAX_COMBAT_SESSIONS, idle_timeout=COMBAT_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire_idle(self, now):
+        # Sessions are kept in last-used order, so stale ones sit at the front
+        while self._sessions:
+            combat_id, session = next(iter(self._sessions.items()))
+            if now - session.last_active <= self.idle_timeout:
+                break
+            self._sessions.popitem(last=False)
+            logger.debug(f"Combat {combat_id} expired after being idle")
+
+    def add(self, session):
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            self._sessions[session.combat_id] = session
+            self._sessions.move_to_end(session.combat_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, combat_id):
+        """Returns the session, or None if it is unknown or has expired."""
+        with self._lock:
+            self._expire_idle(time.monotonic())
+            session = self._sessions.get(combat_id)
+            if session is not None:
+                session.touch()
+                self._sessions.move_to_end(combat_id)
+            return session
+
+    def discard(self, combat_id):
+        with self._lock:
+            self._sessions.pop(combat_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
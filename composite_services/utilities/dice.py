@@ -0,0 +1,131 @@
+# composite_services/utilities/dice.py
+import os
+import random
+import secrets
+import logging
+import threading
+from collections import deque, OrderedDict
+
+from composite_services.utilities import http_client
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Dice configuration
+DICE_SIDES = 6
+DICE_POOL_SIZE = int(os.getenv("DICE_POOL_SIZE", "64"))
+MAX_DICE_POOLS = int(os.getenv("MAX_DICE_POOLS", "10000"))
+# "local" rolls in-process; "remote" fills pools from DICE_SERVICE_URL in batches
+DICE_SOURCE = os.getenv("DICE_SOURCE", "local")
+DICE_SERVICE_URL = os.getenv("DICE_SERVICE_URL", "http://dice_service:5030/roll")
+
+
+class SeededSource:
+    """
+    Rolls dice from a seeded RNG. `rng_factory` is any callable taking a seed
+    and returning an object with randint(a, b), e.g. random.Random.
+    """
+
+    def __init__(self, seed, rng_factory=random.Random):
+        self._rng = rng_factory(seed)
+
+    def __call__(self, count, sides):
+        return [self._rng.randint(1, sides) for _ in range(count)]
+
+
+class RemoteSource:
+    """
+    Fetches rolls from a dice service in batches (one call per refill, not
+    per roll). The service must accept ?sides=&count= and return a list.
+    """
+
+    def __init__(self, url=DICE_SERVICE_URL):
+        self.url = url
+
+    def __call__(self, count, sides):
+        response = http_client.get(self.url, params={"sides": sides, "count": count})
+        response.raise_for_status()
+        rolls = response.json()
+        return rolls if isinstance(rolls, list) else [rolls]
+
+
+class DicePool:
+    """
+    A pre-generated pool of rolls for one combat. Rolls are produced `size`
+    at a time from the pool's source, so the same seed always yields the
+    same sequence of rolls. With another `source` (e.g. RemoteSource) the
+    rolls can't be replayed, so the pool has no seed (None).
+    """
+
+    def __init__(self, seed=None, sides=DICE_SIDES, size=DICE_POOL_SIZE, source=None):
+        if source is not None:
+            if seed is not None:
+                raise ValueError("A seed only applies to locally rolled dice")
+            self.seed = None
+        else:
+            self.seed = seed if seed is not None else secrets.randbits(32)
+            source = SeededSource(self.seed)
+        self.sides = sides
+        self.size = size
+        self.source = source
+        self.rolls_drawn = 0
+        self._rolls = deque()
+        self._lock = threading.Lock()
+
+    def roll(self):
+        """Returns the next roll (1..sides)."""
+        with self._lock:
+            if not self._rolls:
+                self._rolls.extend(self.source(self.size, self.sides))
+            self.rolls_drawn += 1
+            return self._rolls.popleft()
+
+
+def new_pool(seed=None):
+    """
+    Creates a dice pool using the configured DICE_SOURCE. Raises ValueError
+    for a seed in remote mode: the dice service's rolls can't be replayed.
+    """
+    if DICE_SOURCE == "remote":
+        if seed is not None:
+            raise ValueError("Seeded dice need DICE_SOURCE=local; remote rolls can't be replayed")
+        return DicePool(source=RemoteSource())
+    return DicePool(seed=seed)
+
+
+class DicePoolRegistry:
+    """
+    Keeps one dice pool per combat, evicting the least recently used pool
+    once MAX_DICE_POOLS is reached.
+    """
+
+    def __init__(self, max_pools=MAX_DICE_POOLS):
+        self.max_pools = max_pools
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, combat_key, seed=None):
+        """Creates (or replaces) the pool for a combat and returns it."""
+        pool = new_pool(seed)
+        with self._lock:
+            self._pools[combat_key] = pool
+            self._pools.move_to_end(combat_key)
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        if pool.seed is not None:
+            logger.debug(f"Dice pool for combat {combat_key} seeded with {pool.seed}")
+        return pool
+
+    def get(self, combat_key):
+        """Returns the pool for a combat, starting a fresh one if needed."""
+        with self._lock:
+            pool = self._pools.get(combat_key)
+            if pool is not None:
+                self._pools.move_to_end(combat_key)
+                return pool
+        return self.start(combat_key)
+
+    def discard(self, combat_key):
+        with self._lock:
+            self._pools.pop(combat_key, None)
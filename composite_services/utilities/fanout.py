@@ -0,0 +1,103 @@
+# composite_services/utilities/fanout.py
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from composite_services.utilities.http_client import HTTP_CONNECT_TIMEOUT
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "32"))
+
+# Shared by every request in the process so threads are reused, not respawned
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="fanout")
+
+
+class FanOut:
+    """
+    Runs independent downstream calls concurrently against one overall
+    deadline and records how long each downstream took.
+
+    Usage:
+        fan = FanOut(deadline=8)
+        results = fan.run({
+            "player": ("player", http_client.get, player_url),
+            "room": ("room", http_client.get, room_url),
+        })
+        response.headers["Server-Timing"] = fan.server_timing()
+
+    Each call is keyed by a result name and tagged with the downstream it
+    hits; timings are summed per downstream. A call that raises or misses
+    the deadline yields None.
+
+    A running call can't be cancelled, so each one is given what is left of
+    the deadline as its `timeout=` (funcs must accept it, as the http_client
+    helpers do). That way the worker thread is freed about when the request
+    gives up on it, rather than after the full client read timeout.
+    """
+
+    def __init__(self, deadline):
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def _record(self, downstream, elapsed):
+        with self._lock:
+            self.timings[downstream] = self.timings.get(downstream, 0.0) + elapsed
+
+    def _timed(self, downstream, func, args):
+        remaining = self.remaining()
+        if remaining <= 0:
+            # Waited in the executor queue past the deadline
+            raise TimeoutError(f"deadline passed before calling {downstream}")
+        started = time.monotonic()
+        try:
+            return func(*args, timeout=(min(HTTP_CONNECT_TIMEOUT, remaining), remaining))
+        finally:
+            self._record(downstream, time.monotonic() - started)
+
+    def run(self, calls):
+        """
+        Executes `calls` ({name: (downstream, func, *args)}) concurrently and
+        returns {name: result}. Waits at most until the overall deadline.
+        """
+        if not calls:
+            return {}
+
+        futures = {}
+        for name, (downstream, func, *args) in calls.items():
+            futures[name] = _executor.submit(self._timed, downstream, func, args)
+
+        done, _ = wait(futures.values(), timeout=self.remaining())
+
+        results = {}
+        for name, future in futures.items():
+            if future not in done:
+                # Only stops calls still queued; a running one ends at its timeout
+                future.cancel()
+                logger.warning(f"Downstream call '{name}' missed the request deadline")
+                results[name] = None
+                continue
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Downstream call '{name}' failed: {str(e)}")
+                results[name] = None
+        return results
+
+    def timings_ms(self):
+        with self._lock:
+            timings = {name: round(elapsed * 1000, 1) for name, elapsed in self.timings.items()}
+        timings["total"] = round((time.monotonic() - self.started) * 1000, 1)
+        return timings
+
+    def server_timing(self):
+        """Formats the timings as a Server-Timing header value."""
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timings_ms().items())
@@ -0,0 +1,148 @@
+# composite_services/utilities/http_client.py
+import os
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Connection pool / timeout configuration
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "2"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_GET_RETRIES = int(os.getenv("HTTP_GET_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_sessions = {}
+_request_counts = {}
+_lock = threading.Lock()
+
+
+def _downstream_key(url):
+    """Returns the scheme://host:port part of a URL, used to pick a session."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_session():
+    """
+    Creates a session with a bounded keep-alive pool. Only idempotent GETs
+    are retried; everything else fails fast and lets the caller decide.
+
+    The pool doesn't block: when all HTTP_POOL_MAXSIZE connections are busy
+    a request opens a one-off connection (closed afterwards) instead of
+    waiting for one, since requests gives urllib3 no timeout for that wait.
+    """
+    retry = Retry(
+        total=HTTP_GET_RETRIES,
+        connect=HTTP_GET_RETRIES,
+        read=HTTP_GET_RETRIES,
+        status=HTTP_GET_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url):
+    """
+    Returns the pooled session for the downstream service that serves `url`.
+    Each downstream (scheme + host + port) gets its own session and pool.
+    """
+    key = _downstream_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _build_session()
+                _sessions[key] = session
+                _request_counts[key] = 0
+                logger.debug(f"Created pooled HTTP session for {key}")
+    return session
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request through the pooled session for the target service.
+    A default (connect, read) timeout is applied unless one is given.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    session = get_session(url)
+    key = _downstream_key(url)
+    with _lock:
+        _request_counts[key] += 1
+    return session.request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def connection_stats():
+    """
+    Reports per-downstream request and connection counts. `reused` is the
+    number of requests (including retries) that went over an existing
+    keep-alive connection instead of opening a new one.
+    """
+    stats = {}
+    with _lock:
+        items = list(_sessions.items())
+        counts = dict(_request_counts)
+
+    for key, session in items:
+        adapter = session.get_adapter(key)
+        connections_opened = 0
+        wire_requests = 0
+        pools = adapter.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            wire_requests += pool.num_requests
+
+        stats[key] = {
+            "requests": counts.get(key, 0),
+            "wire_requests": wire_requests,
+            "connections_opened": connections_opened,
+            "reused": max(0, wire_requests - connections_opened),
+            "pool_maxsize": HTTP_POOL_MAXSIZE
+        }
+    return stats
@@ -0,0 +1,261 @@
+# composite_services/utilities/spool.py
+import os
+import json
+import time
+import fcntl
+import logging
+import threading
+from datetime import datetime
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Spool configuration ("" disables spooling)
+ACTIVITY_SPOOL_DIR = os.getenv("ACTIVITY_SPOOL_DIR", "/var/spool/activity_log")
+ACTIVITY_SPOOL_SEGMENT_BYTES = int(os.getenv("ACTIVITY_SPOOL_SEGMENT_BYTES", str(1024 * 1024)))
+ACTIVITY_SPOOL_FSYNC_INTERVAL = float(os.getenv("ACTIVITY_SPOOL_FSYNC_INTERVAL", "0.2"))  # seconds
+ACTIVITY_SPOOL_FSYNC_BATCH = int(os.getenv("ACTIVITY_SPOOL_FSYNC_BATCH", "100"))
+
+SEGMENT_SUFFIX = ".spool"
+CHECKPOINT_FILE = "replay.offset"
+LOCK_FILE = "spool.lock"
+
+
+class Spool:
+    """
+    Append-only local spool for messages that could not be handed to the
+    broker.
+
+    Messages are written as JSON lines to numbered segment files; a segment
+    is closed and a new one started once it reaches `segment_bytes`. Writes
+    only go to the OS page cache on the calling thread; fsync happens in
+    batches from sync(), which the publisher thread calls. Replay reads the
+    oldest segment from a checkpointed offset and deletes segments once
+    fully replayed, so every message is delivered at least once.
+
+    One process owns a spool directory at a time (guarded by a lock file);
+    if the directory can't be used spooling is disabled.
+    """
+
+    def __init__(self, directory=ACTIVITY_SPOOL_DIR, segment_bytes=ACTIVITY_SPOOL_SEGMENT_BYTES,
+                 fsync_interval=ACTIVITY_SPOOL_FSYNC_INTERVAL, fsync_batch=ACTIVITY_SPOOL_FSYNC_BATCH):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.enabled = None if directory else False
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._file = None
+        self._file_name = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._counters = {
+            "spooled": 0,
+            "replayed": 0,
+            "corrupt_lines": 0,
+            "write_errors": 0,
+            "fsyncs": 0
+        }
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _ensure_open(self):
+        """Claims the spool directory on first use. Caller holds the lock."""
+        if self.enabled is not None:
+            return self.enabled
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(self._path(LOCK_FILE), "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.enabled = True
+            logger.info(f"Activity spool ready at {self.directory}")
+        except OSError as e:
+            logger.error(f"Activity spool disabled, cannot use {self.directory}: {str(e)}")
+            self.enabled = False
+        return self.enabled
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX))
+
+    def _rotate(self):
+        """Closes the current segment and starts the next one. Caller holds the lock."""
+        self._close_current()
+        segments = self._segments()
+        sequence = int(segments[-1].split("-")[1].split(".")[0]) + 1 if segments else 1
+        self._file_name = f"activity-{sequence:012d}{SEGMENT_SUFFIX}"
+        self._file = open(self._path(self._file_name), "ab")
+
+    def _close_current(self):
+        if self._file is None:
+            return
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._counters["fsyncs"] += 1
+        self._file.close()
+        self._file = None
+        self._file_name = None
+
+    def append(self, message):
+        """
+        Appends a message to the current segment. Returns False if the spool
+        is unavailable. Does not fsync; see sync().
+        """
+        line = (json.dumps(message) + "\n").encode("utf-8")
+        with self._lock:
+            if not self._ensure_open():
+                return False
+            try:
+                if self._file is None or self._file.tell() >= self.segment_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._file.flush()
+                self._unsynced += 1
+                self._counters["spooled"] += 1
+            except OSError as e:
+                self._counters["write_errors"] += 1
+                logger.error(f"Failed to write to activity spool: {str(e)}")
+                return False
+        return True
+
+    def sync(self, force=False):
+        """
+        fsyncs the current segment once `fsync_batch` writes are pending or
+        `fsync_interval` has passed since the last fsync.
+        """
+        with self._lock:
+            if self._file is None or not self._unsynced:
+                return
+            now = time.monotonic()
+            if not force and self._unsynced < self.fsync_batch and now - self._last_sync < self.fsync_interval:
+                return
+            try:
+                os.fsync(self._file.fileno())
+                self._counters["fsyncs"] += 1
+            except OSError as e:
+                logger.error(f"Failed to fsync activity spool: {str(e)}")
+            self._unsynced = 0
+            self._last_sync = now
+
+    def _read_checkpoint(self):
+        try:
+            with open(self._path(CHECKPOINT_FILE)) as f:
+                name, offset = f.read().split()
+                return name, int(offset)
+        except (OSError, ValueError):
+            return None, 0
+
+    def _write_checkpoint(self, name, offset):
+        temp_path = self._path(CHECKPOINT_FILE + ".tmp")
+        with open(temp_path, "w") as f:
+            f.write(f"{name} {offset}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path(CHECKPOINT_FILE))
+
+    def read_batch(self, limit):
+        """
+        Returns (segment, end_offset, messages) for up to `limit` messages
+        from the oldest unreplayed segment, or None if the spool is empty.
+        Pass segment and end_offset to commit() once they are delivered.
+        """
+        with self._lock:
+            if not self._ensure_open():
+                return None
+            segments = self._segments()
+            if not segments:
+                return None
+            segment = segments[0]
+            if segment == self._file_name:
+                # Never replay the segment that is still being written
+                if self._file.tell() == 0:
+                    return None
+                self._close_current()
+
+        checkpoint_name, offset = self._read_checkpoint()
+        if checkpoint_name != segment:
+            offset = 0
+
+        messages = []
+        with open(self._path(segment), "rb") as f:
+            f.seek(offset)
+            while len(messages) < limit:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    # Torn write from a crash; nothing after it is usable
+                    with self._lock:
+                        self._counters["corrupt_lines"] += 1
+                    f.seek(0, os.SEEK_END)
+                    break
+                try:
+                    messages.append(json.loads(line))
+                except ValueError:
+                    with self._lock:
+                        self._counters["corrupt_lines"] += 1
+            end_offset = f.tell()
+        return segment, end_offset, messages
+
+    def commit(self, segment, end_offset, replayed):
+        """
+        Records that a batch from read_batch() was delivered. Fully replayed
+        segments are deleted.
+        """
+        with self._lock:
+            self._counters["replayed"] += replayed
+        if end_offset >= os.path.getsize(self._path(segment)):
+            os.remove(self._path(segment))
+            try:
+                os.remove(self._path(CHECKPOINT_FILE))
+            except FileNotFoundError:
+                pass
+        else:
+            self._write_checkpoint(segment, end_offset)
+
+    def has_backlog(self):
+        with self._lock:
+            # Claims the directory too, so segments left by a previous run are seen
+            if not self._ensure_open():
+                return False
+            segments = self._segments()
+            if not segments:
+                return False
+            return len(segments) > 1 or segments[0] != self._file_name or self._file.tell() > 0
+
+    def _oldest_timestamp(self):
+        """Timestamp of the oldest unreplayed message, if it has one."""
+        segments = self._segments()
+        if not segments:
+            return None
+        checkpoint_name, offset = self._read_checkpoint()
+        try:
+            with open(self._path(segments[0]), "rb") as f:
+                f.seek(offset if checkpoint_name == segments[0] else 0)
+                return datetime.fromisoformat(json.loads(f.readline())["timestamp"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def stats(self):
+        """Spool size, counters and replay lag (age of the oldest unreplayed message)."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["enabled"] = bool(self.enabled)
+            stats["segments"] = 0
+            stats["bytes"] = 0
+            stats["replay_lag_seconds"] = 0.0
+            if not self.enabled:
+                return stats
+            segments = self._segments()
+            stats["segments"] = len(segments)
+            stats["bytes"] = sum(os.path.getsize(self._path(name)) for name in segments)
+            checkpoint_name, offset = self._read_checkpoint()
+            if checkpoint_name in segments:
+                stats["bytes"] -= offset
+            oldest = self._oldest_timestamp()
+        if oldest is not None:
+            stats["replay_lag_seconds"] = round(max(0.0, (datetime.utcnow() - oldest).total_seconds()), 1)
+        return stats
@@ -23,6 +23,15 @@ CREATE TABLE Enemy (
     Loot JSON DEFAULT NULL
 );
 
+-- Room -> enemy index, kept in sync with Room.EnemyIDs by the room service
+CREATE TABLE EnemyPlacement (
+    RoomID INT NOT NULL,
+    EnemyID INT NOT NULL,
+    Position INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (RoomID, EnemyID),
+    INDEX ix_EnemyPlacement_EnemyID (EnemyID)
+);
+
 -- ✅ Use `item_db`
 USE item_db;
 CREATE TABLE Item (
@@ -42,14 +51,44 @@ CREATE TABLE Inventory (
     PRIMARY KEY (PlayerID, ItemID)
 );
 
+-- Every item a player has ever held, kept after it leaves the inventory
+CREATE TABLE ItemHeld (
+    PlayerID INT NOT NULL,
+    ItemID INT NOT NULL,
+    FirstHeldAt DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (PlayerID, ItemID)
+);
+
 -- ✅ Use `activity_log_db`
 USE activity_log_db;
 DROP TABLE IF EXISTS ActivityLog;
+-- Partitioned by time; the activity log service splits pmax into day/month
+-- partitions ahead of time and drops expired ones (see partitions.py).
+-- MySQL requires the partition column in every unique key, hence the PK.
 CREATE TABLE ActivityLog (
-    LogID INT AUTO_INCREMENT PRIMARY KEY,
+    LogID BIGINT AUTO_INCREMENT,
     PlayerID INT NOT NULL,
     Action VARCHAR(255) NOT NULL,
-    Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    Timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (LogID, Timestamp),
+    INDEX idx_activity_player_time (PlayerID, Timestamp, LogID),
+    INDEX idx_activity_player_log (PlayerID, LogID),
+    INDEX idx_activity_time (Timestamp, LogID)
+)
+PARTITION BY RANGE (TO_DAYS(Timestamp)) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Per-player, per-hour counters maintained by the activity log consumer
+DROP TABLE IF EXISTS ActivityRollup;
+CREATE TABLE ActivityRollup (
+    PlayerID INT NOT NULL,
+    Hour DATETIME NOT NULL,
+    ActionType VARCHAR(32) NOT NULL,
+    Count INT NOT NULL DEFAULT 0,
+    Points INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (PlayerID, Hour, ActionType),
+    INDEX idx_rollup_hour (Hour, ActionType)
 );
 
 
@@ -57,9 +96,29 @@ CREATE TABLE ActivityLog (
 USE score_db;
 CREATE TABLE Score (
     ScoreID INT AUTO_INCREMENT PRIMARY KEY,
+    PlayerID INT NOT NULL,
     Points INT NOT NULL,
     Reason ENUM('enemy_defeat', 'item_pickup', 'enter_room') NOT NULL,
-    Timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    Timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_score_player_time (PlayerID, Timestamp, ScoreID),
+    INDEX idx_score_player_reason (PlayerID, Reason, Timestamp, ScoreID)
+);
+
+-- Running totals and hourly buckets, updated with every Score insert
+CREATE TABLE ScoreTotal (
+    PlayerID INT NOT NULL,
+    Reason ENUM('enemy_defeat', 'item_pickup', 'enter_room') NOT NULL,
+    Points INT NOT NULL DEFAULT 0,
+    Entries INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (PlayerID, Reason)
+);
+
+CREATE TABLE ScoreBucket (
+    PlayerID INT NOT NULL,
+    Hour DATETIME NOT NULL,
+    Points INT NOT NULL DEFAULT 0,
+    Entries INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (PlayerID, Hour)
 );
 
 -- ✅ Use `room_db`
@@ -73,6 +132,14 @@ CREATE TABLE Room (
     PRIMARY KEY (RoomID)
 );
 
+-- Items needed to open a room's locked door (all of them)
+CREATE TABLE DoorRequirement (
+    RoomID INT NOT NULL,
+    ItemID INT NOT NULL,
+    PRIMARY KEY (RoomID, ItemID),
+    FOREIGN KEY (RoomID) REFERENCES Room (RoomID) ON DELETE CASCADE
+);
+
 -- ✅ Sample Data for Items
 USE item_db;
 INSERT INTO Item (Name, Description, HasEffect, Effect, Points) VALUES
@@ -93,6 +160,12 @@ VALUES
 ('Dark Mage', 'A powerful mage casting spells', 80, 25, 1),
 ('Troll', 'A large troll with regeneration', 150, 30, 1);
 
+-- Enemy placements matching the Room seed data below
+INSERT INTO EnemyPlacement (RoomID, EnemyID, Position)
+VALUES
+(2, 1, 0),
+(3, 2, 0);
+
 -- Insert data into Room table
 USE room_db;
 INSERT INTO Room (Description, ItemIDs, EnemyIDs, DoorLocked)
@@ -101,6 +174,11 @@ VALUES
 ('A sun-drenched room with a marble fountain at its center, water sparkling as it cascades down. Colorful tapestries adorn the walls depicting epic battles. There are doors to the south and east.', '[3, 5]', '[1]', FALSE),
 ('A mysterious cave with stalactites hanging from the ceiling, dripping water creating eerie echoes. Glowing mushrooms provide faint blue light. A heavy iron door to the west appears to be locked.', '[4]', '[2]', TRUE);
 
+-- The cave door needs the Lockpick
+INSERT INTO DoorRequirement (RoomID, ItemID)
+VALUES
+(3, 5);
+
 -- Insert data into Player table
 -- USE player_db;
 -- INSERT INTO Player (Name, CharacterClass, Health, Damage, RoomID)
@@ -109,7 +187,8 @@ VALUES
 
 -- Insert sample score data
 USE score_db;
-INSERT INTO Score (Points, Reason) VALUES
-(200, 'enemy_defeat'),
-(150, 'item_pickup'),
-(100, 'enter_room'); 
\ No newline at end of file
+-- (ScoreTotal/ScoreBucket are filled from these on the score service's first start)
+INSERT INTO Score (PlayerID, Points, Reason) VALUES
+(1, 200, 'enemy_defeat'),
+(1, 150, 'item_pickup'),
+(1, 100, 'enter_room'); 
\ No newline at end of file
@@ -0,0 +1,180 @@
+# simulation/combat_balance.py
+"""
+Monte-Carlo combat balance simulator.
+
+Plays many fights at once as NumPy arrays, one batch per character class
+against each enemy, using the same damage formulas as the fight_enemy
+service (composite_services/utilities/combat.py). No services are needed.
+
+Usage:
+    python -m simulation.combat_balance
+    python -m simulation.combat_balance --fights 1000000 --seed 42 --json
+"""
+import os
+import re
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from composite_services.utilities.combat import player_hit, enemy_hit, MAX_COMBAT_ROUNDS
+from composite_services.utilities.dice import DICE_SIDES
+from atomic_services.player.classes import CLASS_STATS
+
+# The enemy rows the database is seeded with
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mysql-init", "02-schema.sql")
+
+ENEMY_INSERT = re.compile(r"INSERT INTO Enemy \(([^)]*)\)\s*VALUES\s*(.*?);", re.DOTALL)
+SQL_ROW = re.compile(r"\(((?:'(?:[^']|'')*'|[^()'])*)\)")
+SQL_VALUE = re.compile(r"'((?:[^']|'')*)'|([^,\s]+)")
+
+
+def sql_value(quoted, bare):
+    """One SQL literal from the seed INSERT as a Python value."""
+    if quoted is not None:
+        return quoted.replace("''", "'")
+    if bare.upper() == "NULL":
+        return None
+    if bare.upper() in ("TRUE", "FALSE"):
+        return bare.upper() == "TRUE"
+    return int(bare)
+
+
+def load_schema_enemies(path=SCHEMA_FILE):
+    """
+    Enemy rows from the INSERT INTO Enemy seed in the mysql-init schema,
+    numbered in insertion order like their AUTO_INCREMENT ids.
+    """
+    with open(path) as f:
+        match = ENEMY_INSERT.search(f.read())
+    if not match:
+        raise ValueError(f"No INSERT INTO Enemy in {path}")
+    columns = [column.strip() for column in match.group(1).split(",")]
+    enemies = []
+    for enemy_id, row in enumerate(SQL_ROW.findall(match.group(2)), start=1):
+        values = dict(zip(columns, (sql_value(*value.groups()) for value in SQL_VALUE.finditer(row))))
+        enemies.append({
+            "id": enemy_id,
+            "name": values["Name"],
+            "health": values["Health"],
+            "damage": values["Damage"],
+            "attack": values["Attack"]
+        })
+    return enemies
+
+
+def load_seed_data(path=None):
+    """
+    Class stats as the player service assigns them and enemies as the
+    database is seeded, or both from a JSON file with "classes" and
+    "enemies" when `path` is given.
+    """
+    if path is None:
+        return CLASS_STATS, load_schema_enemies()
+    with open(path) as f:
+        data = json.load(f)
+    return data["classes"], data["enemies"]
+
+
+def simulate(player_health, player_damage, enemy_health, enemy_damage, enemy_attack,
+             fights, rng, max_rounds=MAX_COMBAT_ROUNDS):
+    """
+    Plays `fights` independent fights of one class against one enemy.
+    Each round is the player's swing and then, if the enemy survived, the
+    enemy's swing, exactly like CombatSession.play_round().
+
+    Returns (won, rounds, health_left) arrays of length `fights`.
+    """
+    player_hp = np.full(fights, player_health, dtype=np.int64)
+    enemy_hp = np.full(fights, enemy_health, dtype=np.int64)
+    rounds = np.zeros(fights, dtype=np.int64)
+    won = np.zeros(fights, dtype=bool)
+    active = np.ones(fights, dtype=bool)
+
+    for _ in range(max_rounds):
+        if not active.any():
+            break
+        rounds += active
+
+        rolls = rng.integers(1, DICE_SIDES + 1, size=fights)
+        enemy_hp -= np.where(active, player_hit(player_damage, rolls, maximum=np.maximum), 0)
+        enemy_down = active & (enemy_hp <= 0)
+        won |= enemy_down
+        active &= ~enemy_down
+
+        rolls = rng.integers(1, DICE_SIDES + 1, size=fights)
+        player_hp -= np.where(active, enemy_hit(enemy_damage, enemy_attack, rolls, maximum=np.maximum), 0)
+        active &= player_hp > 0
+
+    return won, rounds, np.maximum(player_hp, 0)
+
+
+def summarize(player_health, won, rounds, health_left):
+    """Win rate, turn-count distribution and expected health loss for one matchup."""
+    health_lost = player_health - health_left
+    percentiles = np.percentile(rounds, [50, 90, 99])
+    counts = np.bincount(rounds)
+    return {
+        "win_rate": float(won.mean()),
+        "turns": {
+            "mean": float(rounds.mean()),
+            "p50": int(percentiles[0]),
+            "p90": int(percentiles[1]),
+            "p99": int(percentiles[2]),
+            "max": int(rounds.max()),
+            "distribution": {str(turns): int(n) for turns, n in enumerate(counts) if n}
+        },
+        "expected_health_lost": float(health_lost.mean()),
+        "expected_health_lost_on_win": float(health_lost[won].mean()) if won.any() else None
+    }
+
+
+def run(classes, enemies, fights, seed=None):
+    """Simulates every class against every enemy; returns nested results."""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for class_name, stats in classes.items():
+        results[class_name] = {}
+        for enemy in enemies:
+            won, rounds, health_left = simulate(
+                stats["max_health"], stats["damage"],
+                enemy["health"], enemy["damage"], enemy.get("attack", 1),
+                fights, rng
+            )
+            results[class_name][enemy["name"]] = summarize(stats["max_health"], won, rounds, health_left)
+    return results
+
+
+def format_table(results):
+    lines = [f"{'Class':<10} {'Enemy':<18} {'Win %':>7} {'Turns':>6} {'p90':>4} {'HP lost':>8}"]
+    for class_name, matchups in results.items():
+        for enemy_name, r in matchups.items():
+            lines.append(
+                f"{class_name:<10} {enemy_name:<18} {r['win_rate'] * 100:>6.1f}% "
+                f"{r['turns']['mean']:>6.2f} {r['turns']['p90']:>4} {r['expected_health_lost']:>8.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate combat balance for every class against every enemy.")
+    parser.add_argument("--seed-data", default=None,
+                        help="JSON file with 'classes' and 'enemies' (default: the player service and mysql-init seed)")
+    parser.add_argument("--fights", type=int, default=100000, help="fights per class/enemy pair")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible runs")
+    parser.add_argument("--json", action="store_true", help="print full results as JSON")
+    args = parser.parse_args(argv)
+
+    classes, enemies = load_seed_data(args.seed_data)
+    results = run(classes, enemies, args.fights, args.seed)
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+import importlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# A script run by hand against the running services (python tests/test_atomic_services.py)
+collect_ignore = ["test_atomic_services.py"]
+
+
+def import_service_module(service, module, env=None):
+    """
+    Imports `module` from atomic_services/<service> the way the service
+    runs it (its directory on sys.path, sibling modules imported by bare
+    name). Services share module names (app, models), so any previously
+    imported copies are dropped first.
+    """
+    service_dir = os.path.join(ROOT, "atomic_services", service)
+    for name in [name for name, mod in sys.modules.items()
+                 if getattr(mod, "__file__", None) and os.path.dirname(mod.__file__).startswith(
+                     os.path.join(ROOT, "atomic_services")) and "." not in name]:
+        del sys.modules[name]
+    old_env = {key: os.environ.get(key) for key in (env or {})}
+    os.environ.update(env or {})
+    sys.path.insert(0, service_dir)
+    try:
+        return importlib.import_module(module)
+    finally:
+        sys.path.remove(service_dir)
+        for key, value in old_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@pytest.fixture
+def service_module(tmp_path):
+    """import_service_module() with DATABASE_URL pointing at a fresh SQLite file."""
+    def load(service, module="app", **env):
+        env.setdefault("DATABASE_URL", f"sqlite:///{tmp_path / (service + '.db')}")
+        return import_service_module(service, module, env)
+    return load
@@ -0,0 +1,202 @@
+import json
+from types import SimpleNamespace
+
+import pika
+
+from composite_services.utilities import activity_publisher
+from composite_services.utilities.activity_publisher import ActivityPublisher
+from composite_services.utilities.spool import Spool
+
+
+class FakeIOLoop:
+    """Single-threaded stand-in for the SelectConnection ioloop, on virtual time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+        self.sequence = 0
+
+    def call_later(self, delay, callback):
+        handle = [self.now + delay, self.sequence, callback]
+        self.sequence += 1
+        self.timers.append(handle)
+        return handle
+
+    def remove_timeout(self, handle):
+        if handle in self.timers:
+            self.timers.remove(handle)
+
+    def add_callback_threadsafe(self, callback):
+        self.call_later(0, callback)
+
+    def stop(self):
+        pass
+
+    def run(self, until, max_time=300):
+        while not until():
+            assert self.timers and self.now <= max_time, "condition never reached"
+            handle = min(self.timers, key=lambda h: (h[0], h[1]))
+            self.timers.remove(handle)
+            self.now = max(self.now, handle[0])
+            handle[2]()
+
+
+class FakeBroker:
+    """Confirms everything published since the last round-trip with as few frames as it can."""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.delivered = []
+        self.confirm_frames = 0
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.broker = connection.broker
+        self.next_tag = 1
+        self.unconfirmed = []
+
+    def add_on_close_callback(self, callback):
+        pass
+
+    def queue_declare(self, queue, durable, callback):
+        self.connection.ioloop.call_later(0, lambda: callback(None))
+
+    def confirm_delivery(self, ack_nack_callback, callback):
+        self.on_confirm = ack_nack_callback
+        self.connection.ioloop.call_later(0, lambda: callback(None))
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        if not self.unconfirmed:
+            self.connection.ioloop.call_later(0.01, self._confirm)
+        self.unconfirmed.append((self.next_tag, json.loads(body)))
+        self.next_tag += 1
+
+    def _confirm(self):
+        batch, self.unconfirmed = self.unconfirmed, []
+        run_end = None
+        for tag, message in batch:
+            if message.get("action") in self.broker.refuse:
+                if run_end is not None:
+                    self._frame(pika.spec.Basic.Ack(delivery_tag=run_end, multiple=True))
+                    run_end = None
+                self._frame(pika.spec.Basic.Nack(delivery_tag=tag, multiple=False))
+            else:
+                self.broker.delivered.append(message)
+                run_end = tag
+        if run_end is not None:
+            self._frame(pika.spec.Basic.Ack(delivery_tag=run_end, multiple=True))
+
+    def _frame(self, method):
+        self.broker.confirm_frames += 1
+        self.on_confirm(SimpleNamespace(method=method))
+
+
+class FakeConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.ioloop = FakeIOLoop()
+        self.is_closing = False
+        self.is_closed = False
+
+    def channel(self, on_open_callback):
+        channel = FakeChannel(self)
+        self.ioloop.call_later(0, lambda: on_open_callback(channel))
+
+
+def connected_publisher(broker, **kwargs):
+    publisher = ActivityPublisher(**kwargs)
+    # Driven by hand on the fake ioloop instead of the background thread
+    publisher.start = lambda: None
+    connection = FakeConnection(broker)
+    publisher._connection = connection
+    publisher._on_connection_open(connection)
+    connection.ioloop.run(lambda: publisher.connected)
+    return publisher, connection.ioloop
+
+
+def message(n, action="moved"):
+    return {"player_id": n, "action": action}
+
+
+def test_batch_is_confirmed_with_one_round_trip():
+    broker = FakeBroker()
+    publisher, ioloop = connected_publisher(broker, batch_size=100)
+    for n in range(250):
+        publisher.publish(message(n))
+    ioloop.run(lambda: len(broker.delivered) == 250)
+
+    assert [m["player_id"] for m in broker.delivered] == list(range(250))
+    # 100 + 100 + 50, each acked by one multiple=True frame
+    assert broker.confirm_frames == 3
+    stats = publisher.stats()
+    assert (stats["published"], stats["batches"], stats["max_batch_size"], stats["queue_depth"]) == (250, 3, 100, 0)
+
+
+def test_nacked_message_backs_off_then_is_set_aside(monkeypatch):
+    monkeypatch.setattr(activity_publisher, "ACTIVITY_MAX_NACKS", 3)
+    broker = FakeBroker(refuse={"poison"})
+    publisher, ioloop = connected_publisher(broker)
+    publisher.publish(message(1))
+    publisher.publish(message(2, "poison"))
+    publisher.publish(message(3))
+    ioloop.run(lambda: publisher.stats()["dropped"] == 1)
+    ioloop.run(lambda: publisher.stats()["queue_depth"] == 0)
+
+    assert [m["player_id"] for m in broker.delivered] == [1, 3]
+    assert publisher.stats()["nacked"] == 3
+    # Retries waited 1s, then 2s, instead of spinning
+    assert ioloop.now >= 3
+
+
+def test_unconfirmed_messages_are_requeued_in_order():
+    broker = FakeBroker()
+    publisher, ioloop = connected_publisher(broker)
+    for n in range(5):
+        publisher.publish(message(n))
+    publisher._pump()
+    assert len(publisher._in_flight) == 5
+    publisher.publish(message(5))
+
+    # The connection drops before the confirms arrive
+    publisher._requeue_in_flight()
+    publisher._fill_pending()
+    assert [entry[0]["player_id"] for entry in publisher._pending] == list(range(6))
+
+
+def test_spool_is_replayed_and_checkpointed(tmp_path):
+    spool = Spool(directory=str(tmp_path), segment_bytes=200)
+    broker = FakeBroker()
+    publisher = ActivityPublisher(batch_size=4, spool=spool)
+    publisher.start = lambda: None
+    publisher.broker_down = True
+    for n in range(10):
+        assert publisher.publish(message(n))
+    assert spool.has_backlog()
+
+    connection = FakeConnection(broker)
+    publisher._connection = connection
+    publisher._on_connection_open(connection)
+    connection.ioloop.run(lambda: len(broker.delivered) == 10 and not publisher._in_flight)
+
+    assert [m["player_id"] for m in broker.delivered] == list(range(10))
+    assert not spool.has_backlog()
+    assert publisher.stats()["replayed"] == 10
+
+
+def test_nacked_spool_batch_is_not_checkpointed(tmp_path):
+    spool = Spool(directory=str(tmp_path))
+    publisher = ActivityPublisher(spool=spool)
+    publisher.start = lambda: None
+    publisher.broker_down = True
+    publisher.publish(message(1))
+    broker = FakeBroker(refuse={"moved"})
+
+    connection = FakeConnection(broker)
+    publisher._connection = connection
+    publisher._on_connection_open(connection)
+    connection.ioloop.run(lambda: publisher.stats()["nacked"] >= 2)
+
+    assert spool.has_backlog()
+    assert publisher.stats()["replayed"] == 0
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from atomic_services.utilities.catalog import CatalogCache
+
+Base = declarative_base()
+
+
+class Thing(Base):
+    __tablename__ = "things"
+    ThingID = Column(Integer, primary_key=True)
+    Name = Column(String(50), nullable=False)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.add_all([Thing(ThingID=1, Name="sword"), Thing(ThingID=2, Name="shield")])
+        session.commit()
+    return Session
+
+
+@pytest.fixture
+def catalog(session_factory):
+    catalog = CatalogCache("things", lambda thing: ({"name": thing.Name}, thing.Name.encode()),
+                           lambda thing: thing.ThingID)
+    catalog.watch(session_factory, Thing)
+    with session_factory() as session:
+        catalog.warm(session.query(Thing).all())
+    return catalog
+
+
+def cached_name(catalog, thing_id):
+    entry = catalog.get(thing_id, lambda key: pytest.fail(f"{key} was not cached"))
+    return entry[0]["name"]
+
+
+def test_rolled_back_write_keeps_the_entry(session_factory, catalog):
+    with session_factory() as session:
+        session.get(Thing, 1).Name = "broken sword"
+        # Flushed, so the change is collected, but never committed
+        session.flush()
+        session.rollback()
+        # A later commit on the same session doesn't pick the discarded change up
+        session.get(Thing, 2).Name = "tower shield"
+        session.commit()
+
+    assert cached_name(catalog, 1) == "sword"
+    # Only the committed change was dropped
+    assert catalog.stats()["invalidations"] == 1
+    with session_factory() as session:
+        assert catalog.get(2, lambda key: session.get(Thing, key))[0]["name"] == "tower shield"
+
+
+def test_committed_write_invalidates(session_factory, catalog):
+    with session_factory() as session:
+        session.get(Thing, 1).Name = "great sword"
+        session.add(Thing(ThingID=3, Name="bow"))
+        session.commit()
+
+    assert catalog.stats()["invalidations"] == 1
+    with session_factory() as session:
+        entry = catalog.get(1, lambda key: session.get(Thing, key))
+    assert entry[0]["name"] == "great sword"
+    assert cached_name(catalog, 2) == "shield"
+
+
+def test_deleted_row_is_dropped(session_factory, catalog):
+    with session_factory() as session:
+        session.delete(session.get(Thing, 2))
+        session.commit()
+        assert catalog.get(2, lambda key: session.get(Thing, key)) is None
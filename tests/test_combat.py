@@ -0,0 +1,123 @@
+import pytest
+
+from composite_services.utilities import combat
+from composite_services.utilities.combat import CombatSession, CombatSessionStore, player_hit, enemy_hit
+
+
+class LoadedDice:
+    """Rolls the given values in order."""
+
+    def __init__(self, *rolls):
+        self.rolls = list(rolls)
+
+    def roll(self):
+        return self.rolls.pop(0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(combat, "time", clock)
+    return clock
+
+
+def session(*rolls, player_health=100, enemy_health=30, combat_id=None):
+    return CombatSession(player_id=1, enemy_id=2, player_health=player_health, enemy_health=enemy_health,
+                         player_damage=20, enemy_damage=5, enemy_attack=2, dice=LoadedDice(*rolls),
+                         enemy_name="goblin", combat_id=combat_id)
+
+
+def test_hits_deal_at_least_one_damage():
+    # d6: damage scales with roll / 6
+    assert player_hit(20, 3) == 10
+    assert player_hit(1, 1) == 1
+    assert enemy_hit(5, 2, 6) == 10
+    assert enemy_hit(0, 2, 6) == 1
+    assert player_hit(20, 3, sides=20) == 3
+
+
+def test_round_is_player_swing_then_enemy_swing():
+    fight = session(3, 6)
+    log = fight.play_round()
+
+    assert (fight.enemy_health, fight.player_health) == (20, 90)
+    assert log == ["You rolled a 3 and dealt 10 damage to the goblin!",
+                   "The goblin rolled a 6 and dealt 10 damage to you!"]
+    assert (fight.turn, fight.rounds, fight.is_over) == ("player", 1, False)
+
+
+def test_player_win_ends_the_fight_before_the_enemy_swings():
+    fight = session(6, 6, enemy_health=15)
+    log = fight.play_round()
+
+    assert (fight.enemy_health, fight.player_health) == (0, 100)
+    assert (fight.is_over, fight.winner) == (True, "player")
+    assert log[-1] == "You defeated the goblin!"
+    # The enemy's roll was never used
+    assert fight.dice.rolls == [6]
+
+
+def test_enemy_win():
+    fight = session(1, 6, player_health=10)
+    log = fight.play_round()
+
+    assert (fight.player_health, fight.is_over, fight.winner) == (0, True, "enemy")
+    assert log[-1] == "You were defeated!"
+
+
+def test_resolve_plays_to_the_end_or_the_round_cap():
+    fight = session(3, 1, 3, 1, 3, enemy_health=30)
+    fight.resolve()
+    assert (fight.rounds, fight.winner, fight.player_health) == (3, "player", 98)
+
+    endless = session(*([1] * 20), player_health=10 ** 6, enemy_health=10 ** 6)
+    endless.resolve(max_rounds=5)
+    assert (endless.rounds, endless.is_over) == (5, False)
+    assert endless.to_dict()["is_combat_over"] is False
+
+
+def test_store_evicts_least_recently_used(clock):
+    store = CombatSessionStore(max_sessions=2, idle_timeout=60)
+    for combat_id in ("a", "b"):
+        store.add(session(combat_id=combat_id))
+    # Using "a" makes "b" the least recently used
+    store.get("a")
+    store.add(session(combat_id="c"))
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+    assert len(store) == 2
+
+
+def test_store_expires_idle_sessions(clock):
+    store = CombatSessionStore(idle_timeout=60)
+    store.add(session(combat_id="old"))
+    clock.now += 30
+    store.add(session(combat_id="new"))
+    clock.now += 31
+
+    assert store.get("old") is None
+    assert store.get("new") is not None
+    # get() counts as activity
+    clock.now += 59
+    assert store.get("new") is not None
+    clock.now += 61
+    assert store.get("new") is None
+    assert len(store) == 0
+
+
+def test_store_discard(clock):
+    store = CombatSessionStore()
+    store.add(session(combat_id="a"))
+    store.discard("a")
+    store.discard("missing")
+    assert store.get("a") is None
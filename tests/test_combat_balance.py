@@ -0,0 +1,30 @@
+from simulation.combat_balance import load_seed_data, load_schema_enemies, run
+
+
+def test_seed_data_comes_from_the_player_service_and_schema():
+    classes, enemies = load_seed_data()
+    assert classes["Warrior"] == {"max_health": 200, "damage": 10}
+    assert enemies[0] == {"id": 1, "name": "Goblin", "health": 50, "damage": 10, "attack": 1}
+    assert [enemy["id"] for enemy in enemies] == list(range(1, len(enemies) + 1))
+
+
+def test_schema_enemy_rows_are_parsed(tmp_path):
+    schema = tmp_path / "schema.sql"
+    schema.write_text(
+        "INSERT INTO Item (Name) VALUES ('Sword');\n"
+        "INSERT INTO Enemy (Name, Description, Health, Damage, Attack)\n"
+        "VALUES\n"
+        "('Rat', 'Small, but (very) angry', 5, 1, 1),\n"
+        "('Ogre''s Pet', 'It''s big', 40, 8, 2);\n"
+    )
+    assert load_schema_enemies(str(schema)) == [
+        {"id": 1, "name": "Rat", "health": 5, "damage": 1, "attack": 1},
+        {"id": 2, "name": "Ogre's Pet", "health": 40, "damage": 8, "attack": 2},
+    ]
+
+
+def test_run_covers_every_class_and_enemy():
+    classes, enemies = load_seed_data()
+    results = run(classes, enemies, fights=100, seed=1)
+    assert set(results) == set(classes)
+    assert all(len(matchups) == len(enemies) for matchups in results.values())
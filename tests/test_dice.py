@@ -0,0 +1,29 @@
+import pytest
+
+from composite_services.utilities import dice
+from composite_services.utilities.dice import DicePool, DicePoolRegistry, RemoteSource, new_pool
+
+
+def rolls(pool, count=20):
+    return [pool.roll() for _ in range(count)]
+
+
+def test_same_seed_replays_the_same_rolls():
+    assert rolls(DicePool(seed=42, size=8)) == rolls(DicePool(seed=42, size=3))
+    assert DicePool(seed=42).seed == 42
+    assert DicePool().seed is not None
+
+
+def test_remote_pool_reports_no_seed(monkeypatch):
+    monkeypatch.setattr(dice, "DICE_SOURCE", "remote")
+    pool = DicePoolRegistry().start("1:2")
+    assert isinstance(pool.source, RemoteSource)
+    assert pool.seed is None
+
+
+def test_remote_pool_rejects_a_seed(monkeypatch):
+    monkeypatch.setattr(dice, "DICE_SOURCE", "remote")
+    with pytest.raises(ValueError):
+        new_pool(seed=42)
+    with pytest.raises(ValueError):
+        DicePool(seed=42, source=lambda count, sides: [1] * count)
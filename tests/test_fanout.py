@@ -0,0 +1,32 @@
+import time
+
+from composite_services.utilities.fanout import FanOut
+
+
+def test_calls_get_the_remaining_deadline_as_timeout():
+    seen = {}
+
+    def call(name, timeout):
+        seen[name] = timeout
+        return name
+
+    fan = FanOut(deadline=0.5)
+    assert fan.run({"a": ("svc", call, "a"), "b": ("svc", call, "b")}) == {"a": "a", "b": "b"}
+    for connect, read in seen.values():
+        assert 0 < read <= 0.5
+        assert connect <= read
+
+
+def test_slow_call_is_bounded_by_its_timeout():
+    def slow(timeout):
+        # Stands in for a downstream that never answers: the read times out
+        time.sleep(min(timeout[1], 5))
+        raise TimeoutError("read timed out")
+
+    fan = FanOut(deadline=0.2)
+    started = time.monotonic()
+    assert fan.run({"slow": ("svc", slow)}) == {"slow": None}
+    assert time.monotonic() - started < 1
+    # The worker gave up near the deadline too, not after the client read timeout
+    time.sleep(0.1)
+    assert fan.timings_ms()["svc"] < 500
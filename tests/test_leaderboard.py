@@ -0,0 +1,44 @@
+import random
+from bisect import bisect_left
+
+from atomic_services.player.leaderboard import IndexableSkipList, Leaderboard
+
+
+def test_skip_list_matches_sorted_list():
+    rng = random.Random(7)
+    skip_list = IndexableSkipList()
+    expected = []
+    for _ in range(3000):
+        key = (rng.randint(-50, 50), rng.randint(1, 200))
+        if key in expected:
+            assert skip_list.remove(key)
+            expected.remove(key)
+        else:
+            skip_list.insert(key)
+            expected.append(key)
+            expected.sort()
+        probe = (rng.randint(-50, 50),)
+        assert skip_list.bisect_left(probe) == bisect_left(expected, probe)
+    assert len(skip_list) == len(expected)
+    assert skip_list.slice(0, len(expected)) == expected
+    assert skip_list.slice(10, 25) == expected[10:25]
+    assert skip_list.slice(-5, 3) == expected[:3]
+    assert skip_list.slice(len(expected) - 2, len(expected) + 5) == expected[-2:]
+    assert not skip_list.remove((1000, 1000))
+
+
+def test_ranks_ties_and_neighbours():
+    board = Leaderboard()
+    board.rebuild([(1, "a", 10), (2, "b", 30), (3, "c", 10), (4, "d", None)])
+    assert [(e["player_id"], e["rank"]) for e in board.top(10)] == [(2, 1), (1, 2), (3, 2), (4, 4)]
+
+    board.update(4, 50, "dee")
+    assert board.top(1) == [{"rank": 1, "player_id": 4, "name": "dee", "sum_score": 50}]
+    entry = board.rank(1, around=1)
+    assert entry["rank"] == 3
+    assert [e["player_id"] for e in entry["neighbours"]] == [2, 1, 3]
+
+    board.remove(2)
+    assert len(board) == 3
+    assert board.rank(2) is None
+    assert [e["player_id"] for e in board.top(2, offset=1)] == [1, 3]
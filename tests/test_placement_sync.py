@@ -0,0 +1,48 @@
+import time
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition never reached"
+        time.sleep(0.01)
+
+
+def test_failed_sync_is_retried_with_latest_enemy_ids(service_module):
+    placement_sync = service_module("room", module="placement_sync")
+    sync = placement_sync.PlacementSync(url="http://enemy.invalid", retry_delay=0.01, max_delay=0.05)
+    pushed = []
+    attempts = {"count": 0}
+
+    def push(room_id, enemy_ids):
+        attempts["count"] += 1
+        # The enemy service is down for the first three attempts
+        if attempts["count"] <= 3:
+            return False
+        pushed.append((room_id, enemy_ids))
+        return True
+
+    sync.push = push
+    sync.submit(1, [4])
+    wait_until(lambda: attempts["count"] >= 2)
+    # A later write replaces the unsent EnemyIDs of the same room
+    sync.submit(1, [4, 5])
+    sync.reconcile([(2, None)])
+    wait_until(lambda: sync.stats()["backlog"] == 0)
+
+    assert pushed == [(1, [4, 5]), (2, [])]
+    stats = sync.stats()
+    assert (stats["synced"], stats["failures"]) == (2, 3)
+
+
+def test_room_writes_queue_a_sync(service_module):
+    app_module = service_module("room", ENEMY_SERVICE_URL="http://enemy.invalid")
+    submitted = []
+    app_module.placement_sync.submit = lambda room_id, enemy_ids: submitted.append((room_id, enemy_ids))
+    client = app_module.app.test_client()
+
+    room_id = client.post("/room", json={"description": "Cellar", "enemy_ids": [2]}).get_json()["room"]["room_id"]
+    client.post(f"/room/{room_id}/enemy/3")
+    client.delete(f"/room/{room_id}")
+
+    assert submitted == [(room_id, [2]), (room_id, [2, 3]), (room_id, [])]
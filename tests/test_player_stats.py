@@ -0,0 +1,123 @@
+import pytest
+
+
+@pytest.fixture
+def player_app(service_module):
+    return service_module("player")
+
+
+@pytest.fixture
+def client(player_app):
+    return player_app.app.test_client()
+
+
+def create_player(client, name, character_class="Warrior"):
+    response = client.post("/player", json={"name": name, "character_class": character_class})
+    assert response.status_code == 201
+    return response.get_json()["player"]
+
+
+def patch_stats(client, player_id, body):
+    return client.patch(f"/player/{player_id}/stats", json=body)
+
+
+def stats(client, player_id, body):
+    response = patch_stats(client, player_id, body)
+    assert response.status_code == 200, response.get_json()
+    player = response.get_json()["player"]
+    return {key: player[key] for key in ("current_health", "max_health", "damage", "sum_score", "room_id")}
+
+
+# Warrior: 200 health, 10 damage
+@pytest.mark.parametrize("body, expected", [
+    ({"current_health": -50}, {"current_health": 150}),
+    # Health stays within 0..MaxHealth
+    ({"current_health": -500}, {"current_health": 0}),
+    ({"current_health": 500}, {"current_health": 200}),
+    ({"health": -30}, {"current_health": 170}),
+    # Damage doesn't go below 0; the score can
+    ({"damage": -100}, {"damage": 0}),
+    ({"sum_score": -5}, {"sum_score": -5}),
+    # Lowering MaxHealth pulls CurrentHealth down with it
+    ({"max_health": -150}, {"max_health": 50, "current_health": 50}),
+    ({"max_health": -500}, {"max_health": 1, "current_health": 1}),
+    # Raising it leaves CurrentHealth where it was
+    ({"max_health": 100}, {"max_health": 300, "current_health": 200}),
+    ({"max_health": 50, "current_health": 500}, {"max_health": 250, "current_health": 250}),
+])
+def test_deltas_are_clamped(client, body, expected):
+    player = create_player(client, "clamp")
+    result = stats(client, player["player_id"], body)
+    assert {key: result[key] for key in expected} == expected
+
+
+@pytest.mark.parametrize("body, expected", [
+    ({"set": {"current_health": 42}}, {"current_health": 42}),
+    ({"set": {"current_health": 999}}, {"current_health": 200}),
+    ({"set": {"room_id": 3}, "sum_score": 5}, {"room_id": 3, "sum_score": 5}),
+    ({"set": {"max_health": 120}}, {"max_health": 120, "current_health": 120}),
+    # A delta applies on top of a set value
+    ({"set": {"damage": 30}, "damage": -5}, {"damage": 25}),
+    ({"set": {"max_health": 250}, "restore_health": True}, {"max_health": 250, "current_health": 250}),
+])
+def test_set_fields(client, body, expected):
+    player = create_player(client, "setter")
+    result = stats(client, player["player_id"], body)
+    assert {key: result[key] for key in expected} == expected
+
+
+def test_restore_health_fills_to_max(client):
+    player_id = create_player(client, "healer")["player_id"]
+    stats(client, player_id, {"current_health": -120})
+    assert stats(client, player_id, {"restore_health": True})["current_health"] == 200
+
+
+@pytest.mark.parametrize("body, error", [
+    ({}, "No stat changes provided"),
+    ({"mana": 5}, "Unknown stat: mana"),
+    ({"set": {"name": 5}}, "Unknown stat: name"),
+    ({"damage": "5"}, "damage must be an integer"),
+    ({"damage": True}, "damage must be an integer"),
+    ({"set": {"room_id": 1.5}}, "room_id must be an integer"),
+])
+def test_invalid_changes_are_rejected(client, body, error):
+    player = create_player(client, "invalid")
+    response = patch_stats(client, player["player_id"], body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_unknown_player(client):
+    assert patch_stats(client, 404, {"damage": 1}).status_code == 404
+
+
+def test_batch_update(player_app, client):
+    first = create_player(client, "first")["player_id"]
+    second = create_player(client, "second", "Rogue")["player_id"]
+
+    response = client.patch("/players/stats", json={"updates": [
+        {"player_id": second, "current_health": -200, "sum_score": 7},
+        {"player_id": 999, "damage": 1},
+        {"player_id": first, "set": {"room_id": 2}, "sum_score": 3},
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["not_found"] == [999]
+    players = {player["player_id"]: player for player in body["players"]}
+    assert (players[second]["current_health"], players[second]["sum_score"]) == (0, 7)
+    assert (players[first]["room_id"], players[first]["sum_score"]) == (2, 3)
+    # The leaderboard follows the committed scores
+    assert [entry["player_id"] for entry in player_app.leaderboard.top(2)] == [second, first]
+
+
+def test_batch_with_an_invalid_update_changes_nothing(client):
+    player_id = create_player(client, "atomic")["player_id"]
+    response = client.patch("/players/stats", json={"updates": [
+        {"player_id": player_id, "damage": 5},
+        {"player_id": player_id, "mana": 1},
+    ]})
+    assert response.status_code == 400
+    assert client.get(f"/player/{player_id}").get_json()["damage"] == 10
+
+    assert client.patch("/players/stats", json={"updates": []}).status_code == 400
+    assert client.patch("/players/stats", json={"updates": [{"damage": 1}]}).status_code == 400
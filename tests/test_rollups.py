@@ -0,0 +1,39 @@
+import pytest
+
+# Action strings as the services log them
+CASES = [
+    ("Defeated by Goblin", ("player_defeated", 0)),
+    ("Defeated Goblin (+50 score)", ("enemy_defeated", 50)),
+    ("Defeated Goblin", ("enemy_defeated", 0)),
+    ("Engaged in combat with Goblin", ("combat_started", 0)),
+    ("Entered Room 3: Armoury", ("room_entered", 0)),
+    ("Entered Armoury (+5 score)", ("score_awarded", 5)),
+    ("Picked up Key from room 3 (+10 score)", ("score_awarded", 10)),
+    ("Picked up Key (ID: 5) from room 3", ("item_picked", 0)),
+    ("Increased current health by 50 from Potion", ("item_used", 0)),
+    ("Viewed inventory", ("inventory_viewed", 0)),
+    ("Completed the game! (+100 score)", ("game_completed", 100)),
+    ("Game progress reset", ("game_reset", 0)),
+    ("HARD RESET performed on game", ("game_reset", 0)),
+    ("Full game reset performed for Alice", ("game_reset", 0)),
+    # Unknown actions still count, as "other", and keep their points
+    ("Danced a jig", ("other", 0)),
+    ("Found a secret (+7 score)", ("other", 7)),
+    ("", ("other", 0)),
+    (None, ("other", 0)),
+]
+
+
+@pytest.fixture
+def rollups(service_module):
+    # rollups.py imports `from models import ActivityRollup` like the service does
+    return service_module("activity_log", module="rollups")
+
+
+@pytest.mark.parametrize("action, expected", CASES)
+def test_classify_action(rollups, action, expected):
+    assert rollups.classify_action(action) == expected
+
+
+def test_every_action_type_is_covered(rollups):
+    assert {action_type for _, (action_type, _) in CASES} == set(rollups.ACTION_TYPES)
@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def room_views(service_module, monkeypatch):
+    module = service_module("room", module="room_views")
+    clock = Clock()
+    monkeypatch.setattr(module, "time", clock)
+    module.clock = clock
+    return module
+
+
+def subscribed_cache(module, **kwargs):
+    cache = module.RoomViewCache(**kwargs)
+    cache.set_subscribed(True)
+    return cache
+
+
+def store(cache, player_id, room_id, view=None):
+    cache.put(player_id, room_id, view or {"room": room_id}, cache.generation(player_id))
+
+
+def test_least_recently_used_view_is_evicted(room_views):
+    cache = subscribed_cache(room_views, max_size=2)
+    store(cache, 1, 10)
+    store(cache, 1, 11)
+    # Reading (1, 10) makes (1, 11) the least recently used
+    assert cache.get(1, 10) == {"room": 10}
+    store(cache, 1, 12)
+
+    assert cache.get(1, 11) is None
+    assert cache.get(1, 10) == {"room": 10}
+    assert cache.get(1, 12) == {"room": 12}
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_views_expire_after_ttl(room_views):
+    cache = subscribed_cache(room_views, ttl=60)
+    store(cache, 1, 10)
+    room_views.clock.now += 60
+    assert cache.get(1, 10) == {"room": 10}
+    room_views.clock.now += 1
+    assert cache.get(1, 10) is None
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_invalidation_in_flight_stops_a_stale_put(room_views):
+    cache = subscribed_cache(room_views)
+    # The request takes its token, then a pickup event lands before it stores the view
+    token = cache.generation(1)
+    cache.handle_event({"type": "item_picked", "player_id": 1, "room_id": 10})
+    cache.put(1, 10, {"room": 10, "item_ids": [5]}, token)
+    assert cache.get(1, 10) is None
+
+    # Other players' tokens are unaffected
+    other = cache.generation(2)
+    cache.put(2, 10, {"room": 10}, other)
+    assert cache.get(2, 10) == {"room": 10}
+
+
+def test_room_write_drops_every_players_view_and_pending_puts(room_views):
+    cache = subscribed_cache(room_views)
+    store(cache, 1, 10)
+    store(cache, 2, 10)
+    store(cache, 1, 11)
+    token = cache.generation(3)
+    cache.invalidate_room(10)
+
+    assert cache.get(1, 10) is None
+    assert cache.get(2, 10) is None
+    assert cache.get(1, 11) == {"room": 11}
+    cache.put(3, 10, {"room": 10}, token)
+    assert cache.get(3, 10) is None
+
+
+def test_player_reset_drops_all_of_their_views(room_views):
+    cache = subscribed_cache(room_views)
+    store(cache, 1, 10)
+    store(cache, 1, 11)
+    store(cache, 2, 10)
+    cache.handle_event({"type": "player_reset", "player_id": 1})
+
+    assert cache.get(1, 10) is None
+    assert cache.get(1, 11) is None
+    assert cache.get(2, 10) == {"room": 10}
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_nothing_is_served_or_kept_while_unsubscribed(room_views):
+    cache = room_views.RoomViewCache()
+    store(cache, 1, 10)
+    assert cache.get(1, 10) is None
+    assert cache.stats()["bypassed"] == 1
+
+    cache.set_subscribed(True)
+    store(cache, 1, 10)
+    # Losing the subscription drops what was cached: events may be missed from now on
+    cache.set_subscribed(False)
+    cache.set_subscribed(True)
+    assert cache.get(1, 10) is None
+
+
+class FakeInteractionService:
+    def __init__(self):
+        self.calls = 0
+        self.items_picked = []
+
+    def get(self, url, timeout):
+        self.calls += 1
+        return SimpleNamespace(status_code=200, json=lambda: {
+            "items_picked": list(self.items_picked), "enemies_defeated": []
+        })
+
+
+def test_room_endpoint_falls_back_to_the_interaction_service(service_module):
+    app_module = service_module("room", ENEMY_SERVICE_URL="http://enemy.invalid")
+    app_module.placement_sync.submit = lambda room_id, enemy_ids: None
+    interactions = FakeInteractionService()
+    app_module.interaction_service = interactions
+    client = app_module.app.test_client()
+    room_id = client.post("/room", json={"description": "Hall", "item_ids": [5, 6]}).get_json()["room"]["room_id"]
+
+    # Not subscribed to interaction events: every request asks the interaction service
+    for _ in range(2):
+        assert client.get(f"/room/{room_id}?player_id=1").get_json()["item_ids"] == [5, 6]
+    assert interactions.calls == 2
+
+    app_module.room_views.set_subscribed(True)
+    client.get(f"/room/{room_id}?player_id=1")
+    client.get(f"/room/{room_id}?player_id=1")
+    assert interactions.calls == 3
+
+    interactions.items_picked = [5]
+    app_module.room_views.handle_event({"type": "item_picked", "player_id": 1, "room_id": room_id})
+    assert client.get(f"/room/{room_id}?player_id=1").get_json()["item_ids"] == [6]
+    assert interactions.calls == 4
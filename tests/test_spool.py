@@ -0,0 +1,121 @@
+import os
+
+from composite_services.utilities.spool import Spool, SEGMENT_SUFFIX
+
+
+def message(n):
+    return {"player_id": n, "action": "moved", "timestamp": "2026-01-01T00:00:00"}
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def replay_all(spool, limit=3):
+    """Reads and commits batches until the spool is empty, like the publisher does."""
+    replayed = []
+    while True:
+        batch = spool.read_batch(limit)
+        if batch is None:
+            return replayed
+        segment, end_offset, messages = batch
+        replayed.extend(m["player_id"] for m in messages)
+        spool.commit(segment, end_offset, len(messages))
+
+
+def crash(spool):
+    """Drops a spool the way a killed process would: no fsync or close, the lock released."""
+    spool._lock_file.close()
+
+
+def test_segments_rotate_at_segment_bytes(tmp_path):
+    line_bytes = len(b'{"player_id": 0, "action": "moved", "timestamp": "2026-01-01T00:00:00"}\n')
+    spool = Spool(directory=str(tmp_path), segment_bytes=3 * line_bytes)
+    for n in range(10):
+        assert spool.append(message(n))
+
+    names = segments(tmp_path)
+    assert names == [f"activity-{sequence:012d}{SEGMENT_SUFFIX}" for sequence in range(1, 5)]
+    # A segment is closed once it reaches segment_bytes, so each holds three lines
+    assert [os.path.getsize(tmp_path / name) // line_bytes for name in names] == [3, 3, 3, 1]
+    assert spool.stats()["spooled"] == 10
+
+
+def test_fsync_is_batched(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: fsyncs.append(fd) or real_fsync(fd))
+    spool = Spool(directory=str(tmp_path), fsync_interval=3600, fsync_batch=3)
+
+    spool.append(message(1))
+    spool.append(message(2))
+    # Appends never fsync; sync() waits for a full batch (or the interval)
+    spool.sync()
+    assert fsyncs == []
+
+    spool.append(message(3))
+    spool.sync()
+    assert len(fsyncs) == 1
+    spool.sync()
+    assert len(fsyncs) == 1
+
+    spool.append(message(4))
+    spool.sync(force=True)
+    assert len(fsyncs) == 2
+    assert spool.stats()["fsyncs"] == 2
+
+
+def test_fsync_after_interval(tmp_path, monkeypatch):
+    fsyncs = []
+    monkeypatch.setattr(os, "fsync", lambda fd: fsyncs.append(fd))
+    spool = Spool(directory=str(tmp_path), fsync_interval=0, fsync_batch=1000)
+    spool.append(message(1))
+    spool.sync()
+    assert len(fsyncs) == 1
+
+
+def test_replay_is_in_order_across_segments(tmp_path):
+    spool = Spool(directory=str(tmp_path), segment_bytes=200)
+    for n in range(20):
+        spool.append(message(n))
+    assert len(segments(tmp_path)) > 2
+
+    assert replay_all(spool) == list(range(20))
+    assert segments(tmp_path) == []
+    assert not spool.has_backlog()
+    assert spool.stats()["replayed"] == 20
+
+
+def test_replay_resumes_from_checkpoint_after_crash(tmp_path):
+    spool = Spool(directory=str(tmp_path))
+    for n in range(10):
+        spool.append(message(n))
+    segment, end_offset, messages = spool.read_batch(4)
+    spool.commit(segment, end_offset, len(messages))
+    # Read but never committed: must be delivered again
+    spool.read_batch(3)
+    crash(spool)
+
+    restarted = Spool(directory=str(tmp_path))
+    assert restarted.has_backlog()
+    assert replay_all(restarted) == list(range(4, 10))
+
+
+def test_torn_and_corrupt_lines_are_skipped_after_crash(tmp_path):
+    spool = Spool(directory=str(tmp_path))
+    for n in range(3):
+        spool.append(message(n))
+    with open(tmp_path / segments(tmp_path)[0], "ab") as f:
+        f.write(b"not json\n")
+        # The process died halfway through writing a line
+        f.write(b'{"player_id": 99, "act')
+    crash(spool)
+
+    restarted = Spool(directory=str(tmp_path))
+    # New messages go to a fresh segment, never after the torn line
+    restarted.append(message(3))
+    assert len(segments(tmp_path)) == 2
+
+    assert replay_all(restarted, limit=10) == [0, 1, 2, 3]
+    assert restarted.stats()["corrupt_lines"] == 2
+    assert segments(tmp_path) == []
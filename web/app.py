@@ -1,9 +1,10 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 import requests
 import os
 from datetime import datetime
 import logging
-from composite_services.utilities.activity_logger import log_activity
+from composite_services.utilities.activity_logger import log_activity, publisher_stats
+from composite_services.utilities import http_client
 import secrets
 import pika
 import json 
@@ -50,7 +51,7 @@ def login():
     # Check if player exists
     try:
         # Try to find player by name
-        player_search_response = requests.get(
+        player_search_response = http_client.get(
             f"{PLAYER_SERVICE_URL}/player/name/{player_name}",
             timeout=5  # Add timeout to prevent long waits
         )
@@ -64,7 +65,7 @@ def login():
             
             # Reset game state for existing player
             try:
-                requests.post(
+                http_client.post(
                     f"{MANAGE_GAME_SERVICE_URL}/game/full-reset/{player_id}",
                     timeout=5
                 )
@@ -93,7 +94,7 @@ def create_new_player(player_name, character_class):
     """Helper function to create a new player."""
     try:
         logger.info(f"Attempting to create new player: {player_name}, class: {character_class}")
-        new_player_response = requests.post(
+        new_player_response = http_client.post(
             f"{PLAYER_SERVICE_URL}/player",
             json={"name": player_name, "character_class": character_class},
             timeout=5
@@ -122,7 +123,7 @@ def create_new_player(player_name, character_class):
             logger.warn(f"Player name '{player_name}' already exists, trying to retrieve existing player")
             # Try to retrieve the existing player
             try:
-                retry_response = requests.get(
+                retry_response = http_client.get(
                     f"{PLAYER_SERVICE_URL}/player/name/{player_name}",
                     timeout=5
                 )
@@ -158,7 +159,7 @@ def logout():
     if player_id:
         try:
             # Call the manage_game_service to reset the game
-            requests.post(
+            http_client.post(
                 f"{MANAGE_GAME_SERVICE_URL}/game/full-reset/{player_id}",
                 timeout=5
             )
@@ -182,7 +183,7 @@ def get_current_player_id():
 def check_logged_in():
     """Ensures the player is logged in for protected routes."""
     # List of routes that don't require login
-    public_routes = ['login', 'login_page', 'logout', 'static']
+    public_routes = ['login', 'login_page', 'logout', 'static', 'http_metrics', 'activity_metrics']
     
     # Check if the route requires login
     if request.endpoint not in public_routes and 'player_id' not in session:
@@ -211,7 +212,7 @@ def get_player_room():
     player_id = get_current_player_id()
 
     # Get player data from player service
-    response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
+    response = http_client.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
     if response.status_code != 200:
         logger.error(f"Failed to get player data: {response.text}")
         return jsonify({"error": "Could not retrieve player data"}), response.status_code
@@ -268,7 +269,7 @@ def enter_room():
     
     try:
         logger.debug(f"Forwarding request to {room_url}")
-        response = requests.post(room_url, json=data)
+        response = http_client.post(room_url, json=data)
         
         # Check for room-specific errors first
         if response.status_code == 403:
@@ -285,7 +286,7 @@ def enter_room():
                 # Check if this is a room that doesn't exist response (end of game)
                 if "room not found" in error_data.get("error", "").lower():
                     # Get the current player room to check if it's beyond what we have
-                    player_response = requests.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
+                    player_response = http_client.get(f"{PLAYER_SERVICE_URL}/player/{player_id}")
                     if player_response.status_code == 200:
                         player_data = player_response.json()
                         current_room = player_data.get("RoomID", player_data.get("room_id", 0))
@@ -318,7 +319,7 @@ def create_end_of_game_response(player_id, message="Congratulations! You've comp
     """
     try:
         # Call the manage_game service to handle end-of-game logic
-        response = requests.post(
+        response = http_client.post(
             f"{MANAGE_GAME_SERVICE_URL}/game/end/{player_id}",
             json={"message": message},
             timeout=5
@@ -370,7 +371,7 @@ def pick_up_item():
     # Simply pass the request to the composite service
     try:
         pickup_url = f"{PICK_UP_ITEM_SERVICE_URL}/room/{room_id}/item/{item_id}/pickup"
-        response = requests.post(pickup_url, json=pickup_data)
+        response = http_client.post(pickup_url, json=pickup_data)
         
         # Pass through the response
         return jsonify(response.json()), response.status_code
@@ -398,7 +399,7 @@ def view_inventory():
     inventory_url = f"{OPEN_INVENTORY_SERVICE_URL}/inventory/{player_id}"
     logger.debug(f"Calling inventory service: {inventory_url}")
 
-    response = requests.get(inventory_url)
+    response = http_client.get(inventory_url)
     logger.debug(f"Inventory service response: {response.status_code} - {response.text}")
 
     if response.status_code != 200:
@@ -425,7 +426,7 @@ def fetch_item_details():
     item_url = f"{ITEM_SERVICE_URL}/item/{item_id}"
     logger.debug(f"Fetching item details from: {item_url}")
 
-    response = requests.get(item_url)
+    response = http_client.get(item_url)
     logger.debug(f"Item service response: {response.status_code} - {response.text}")
 
     if response.status_code != 200:
@@ -452,7 +453,7 @@ def fetch_item_details_batch(item_ids):
     """
     try:
         # Call the open_inventory service batch endpoint
-        response = requests.post(
+        response = http_client.post(
             f"{OPEN_INVENTORY_SERVICE_URL}/items/batch",
             json={"item_ids": item_ids},
             timeout=5
@@ -477,7 +478,7 @@ def get_room_info(room_id):
     room_url = f"{ROOM_SERVICE_URL}/room/{room_id}?player_id={player_id}"
     logger.debug(f"Calling room service: {room_url}")
 
-    response = requests.get(room_url)
+    response = http_client.get(room_url)
     if response.status_code != 200:
         logger.error(f"Failed to get room info: {response.text}")
         return jsonify({"error": "Room not found"}), 404
@@ -502,7 +503,7 @@ def player_stats():
     logger.debug(f"Calling player service: {player_url}")
 
     try:
-        response = requests.get(player_url)
+        response = http_client.get(player_url)
         logger.debug(f"Player service response: {response.status_code} - {response.text}")
 
         if response.status_code != 200:
@@ -525,9 +526,15 @@ def start_combat(enemy_id):
     # Call the fight_enemy service
     combat_url = f"{COMBAT_SERVICE_URL}/combat/start/{enemy_id}"
     combat_data = {"player_id": player_id}
+
+    # Room (for recording the defeat) and optional dice seed travel with the session
+    data = request.get_json(silent=True) or {}
+    for key in ("room_id", "seed"):
+        if data.get(key) is not None:
+            combat_data[key] = data[key]
     
     try:
-        response = requests.post(combat_url, json=combat_data)
+        response = http_client.post(combat_url, json=combat_data)
         
         if response.status_code != 200:
             return jsonify({"error": "Failed to start combat"}), response.status_code
@@ -553,7 +560,7 @@ def combat_attack():
     # Simply pass the request to the composite service
     try:
         attack_url = f"{COMBAT_SERVICE_URL}/combat/attack"
-        response = requests.post(attack_url, json=data)
+        response = http_client.post(attack_url, json=data)
         
         # Pass through the response
         return jsonify(response.json()), response.status_code
@@ -561,6 +568,19 @@ def combat_attack():
         logger.error(f"Error connecting to combat service: {str(e)}")
         return jsonify({"error": f"Failed to connect to combat service: {str(e)}"}), 500
 
+@app.route("/combat/<combat_id>/resolve", methods=["POST"])
+def combat_resolve(combat_id):
+    """Proxy to the fight_enemy service: plays out the rest of a fight in one call."""
+    try:
+        resolve_url = f"{COMBAT_SERVICE_URL}/combat/{combat_id}/resolve"
+        response = http_client.post(resolve_url)
+
+        # Pass through the response
+        return jsonify(response.json()), response.status_code
+    except requests.RequestException as e:
+        logger.error(f"Error connecting to combat service: {str(e)}")
+        return jsonify({"error": f"Failed to connect to combat service: {str(e)}"}), 500
+
 
         
 @app.route("/hard_reset", methods=["POST"])
@@ -579,7 +599,7 @@ def hard_reset():
     
     try:
         # Call the manage_game service to perform the hard reset
-        response = requests.post(
+        response = http_client.post(
             f"{MANAGE_GAME_SERVICE_URL}/game/hard-reset/{player_id}",
             timeout=10
         )
@@ -617,15 +637,16 @@ def player_activity_logs(player_id=None):
         return jsonify({"error": "Player ID is required"}), 400
     
     try:
-        # Call activity log service directly
-        response = requests.get(
+        # Call activity log service directly; since=/before=/limit= pass through
+        params = {key: request.args[key] for key in ("since", "before", "limit") if key in request.args}
+        response = http_client.get(
             f"{ACTIVITY_LOG_SERVICE_URL}/log/{player_id}",
+            params=params,
             timeout=5
         )
         
         if response.status_code == 200:
-            logs = response.json()
-            return jsonify({"logs": logs}), 200
+            return jsonify(response.json()), 200
         else:
             logger.error(f"Failed to retrieve activity logs: {response.status_code}")
             return jsonify({"error": "Failed to retrieve activity logs"}), response.status_code
@@ -633,5 +654,69 @@ def player_activity_logs(player_id=None):
         logger.error(f"Error retrieving activity logs: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/player_activity_logs/stream', methods=['GET'])
+def player_activity_log_stream():
+    """
+    Relays the activity log service's live stream (Server-Sent Events)
+    for the current player.
+    """
+    player_id = get_current_player_id()
+    if not player_id:
+        return jsonify({"error": "Player ID is required"}), 400
+
+    # ?since=<cursor> starts after the list the page loaded; a reconnecting
+    # EventSource resumes after the last event it saw (Last-Event-ID wins)
+    params = {"player_id": player_id}
+    if request.args.get("since"):
+        params["since"] = request.args["since"]
+    headers = {}
+    if request.headers.get("Last-Event-ID"):
+        headers["Last-Event-ID"] = request.headers["Last-Event-ID"]
+
+    try:
+        # Long-lived, so kept out of the shared connection pool
+        upstream = requests.get(
+            f"{ACTIVITY_LOG_SERVICE_URL}/log/stream",
+            params=params,
+            headers=headers,
+            stream=True,
+            timeout=(http_client.HTTP_CONNECT_TIMEOUT, 60)
+        )
+    except requests.RequestException as e:
+        logger.error(f"Error connecting to activity log stream: {str(e)}")
+        return jsonify({"error": "Failed to connect to activity log service"}), 503
+
+    if upstream.status_code != 200:
+        upstream.close()
+        return jsonify({"error": "Activity log stream unavailable"}), upstream.status_code
+
+    def relay():
+        try:
+            for chunk in upstream.iter_content(chunk_size=None):
+                yield chunk
+        except requests.RequestException as e:
+            logger.warning(f"Activity log stream ended: {str(e)}")
+        finally:
+            upstream.close()
+
+    response = Response(stream_with_context(relay()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route('/metrics/http', methods=['GET'])
+def http_metrics():
+    """
+    Reports pooled connection reuse per downstream service.
+    """
+    return jsonify(http_client.connection_stats())
+
+@app.route('/metrics/activity', methods=['GET'])
+def activity_metrics():
+    """
+    Reports the activity-log publisher's buffer depth and drop counters.
+    """
+    return jsonify(publisher_stats())
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5050, debug=True)